@@ -0,0 +1,200 @@
+"""
+Per-upstream circuit breakers.
+
+A breaker trips OPEN after `failure_threshold` consecutive bad calls — errors,
+timeouts, 5xx/429 responses, or calls slower than `slow_call_seconds`. While
+open, calls fail immediately with CircuitOpenError, which the providers treat
+like any other upstream error: they fall straight back to the estimator
+instead of waiting out a timeout. After `open_seconds` the breaker goes
+HALF_OPEN and lets a few probe calls through; a good probe closes it, a bad
+one re-opens it.
+
+Config (env, shared by all breakers):
+    CIRCUIT_FAILURE_THRESHOLD   default 5
+    CIRCUIT_SLOW_CALL_SECONDS   default 8
+    CIRCUIT_OPEN_SECONDS        default 30
+    CIRCUIT_HALF_OPEN_PROBES    default 1
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Literal
+
+import httpx
+import requests
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+BREAKERS: dict[str, "CircuitBreaker"] = {}
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name: str):
+        super().__init__(f"circuit '{name}' is open")
+        self.name = name
+
+
+def _is_failure(exc: BaseException) -> bool:
+    """Client errors (4xx other than 429) say nothing about upstream health."""
+    status = None
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+    elif isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+    if status is not None:
+        return status >= 500 or status == 429
+    return True
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int | None = None,
+        slow_call_seconds: float | None = None,
+        open_seconds: float | None = None,
+        half_open_probes: int | None = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold or int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+        self.slow_call_seconds = slow_call_seconds or float(os.getenv("CIRCUIT_SLOW_CALL_SECONDS", "8"))
+        self.open_seconds = open_seconds or float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+        self.half_open_probes = half_open_probes or int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "1"))
+
+        self._lock = threading.Lock()
+        self._state: CircuitState = "closed"
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        # Counters for the status endpoint
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+        BREAKERS[name] = self
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state
+
+    # ── state machine ─────────────────────────────────────────────────────────
+
+    def _maybe_half_open(self, now: float) -> None:
+        if self._state == "open" and now - self._opened_at >= self.open_seconds:
+            self._state = "half_open"
+            self._probes_in_flight = 0
+
+    def _trip(self, now: float) -> None:
+        self._state = "open"
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self.times_opened += 1
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            if self._state == "open" or (
+                self._state == "half_open" and self._probes_in_flight >= self.half_open_probes
+            ):
+                self.short_circuited += 1
+                raise CircuitOpenError(self.name)
+            if self._state == "half_open":
+                self._probes_in_flight += 1
+            self.calls += 1
+
+    def record(self, ok: bool, elapsed: float) -> None:
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            now = time.monotonic()
+            if slow:
+                self.slow_calls += 1
+            if not ok:
+                self.failures += 1
+            bad = slow or not ok
+
+            if self._state == "half_open":
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if bad:
+                    self._trip(now)
+                else:
+                    self._state = "closed"
+                    self._consecutive_failures = 0
+                return
+
+            if bad:
+                self._consecutive_failures += 1
+                if self._state == "closed" and self._consecutive_failures >= self.failure_threshold:
+                    self._trip(now)
+            else:
+                self._consecutive_failures = 0
+
+    # ── guarded calls ─────────────────────────────────────────────────────────
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        self.before_call()
+        started = time.monotonic()
+        try:
+            result = fn()
+        except BaseException as exc:
+            self.record(not _is_failure(exc), time.monotonic() - started)
+            raise
+        self.record(True, time.monotonic() - started)
+        return result
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.before_call()
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self.release()
+            raise
+        except BaseException as exc:
+            self.record(not _is_failure(exc), time.monotonic() - started)
+            raise
+        self.record(True, time.monotonic() - started)
+        return result
+
+    def release(self) -> None:
+        """Give back a call slot without judging upstream health (e.g. cancelled)."""
+        with self._lock:
+            if self._state == "half_open":
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._consecutive_failures = 0
+            self._probes_in_flight = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_half_open(now)
+            retry_in = 0.0
+            if self._state == "open":
+                retry_in = max(0.0, self.open_seconds - (now - self._opened_at))
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "retry_in_seconds": round(retry_in, 1),
+                "failure_threshold": self.failure_threshold,
+                "slow_call_seconds": self.slow_call_seconds,
+                "open_seconds": self.open_seconds,
+                "calls": self.calls,
+                "failures": self.failures,
+                "slow_calls": self.slow_calls,
+                "short_circuited": self.short_circuited,
+                "times_opened": self.times_opened,
+            }
+
+
+def breaker_states() -> dict[str, dict[str, Any]]:
+    return {name: b.snapshot() for name, b in BREAKERS.items()}
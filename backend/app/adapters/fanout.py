@@ -0,0 +1,118 @@
+"""
+Provider fan-out — runs candidate × provider calls concurrently on bounded
+thread pools and lets the caller join the results.
+
+Each provider has its own pool, sized to its in-flight limit (process-wide,
+shared by all requests), so a slow upstream cannot starve the others: calls
+queued behind a saturated provider wait in that provider's queue and never
+hold a thread another provider could use.
+
+Config (env):
+    PROVIDER_FANOUT_MODE                "concurrent" (default) | "sequential"
+    AWARD_PROVIDER_MAX_CONCURRENCY      default 8
+    AIRFARE_PROVIDER_MAX_CONCURRENCY    default 8
+    HOTEL_PROVIDER_MAX_CONCURRENCY      default 8
+"""
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Hashable
+
+_DEFAULT_LIMITS: dict[str, int] = {
+    "award":   8,
+    "airfare": 8,
+    "hotel":   8,
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def provider_limits() -> dict[str, int]:
+    """Per-provider in-flight limits, read from env with the defaults above."""
+    return {
+        name: _env_int(f"{name.upper()}_PROVIDER_MAX_CONCURRENCY", default)
+        for name, default in _DEFAULT_LIMITS.items()
+    }
+
+
+class ProviderFanout:
+    """
+    Submit provider calls as futures.
+
+    In "sequential" mode calls run inline on the caller's thread (the original
+    behaviour) and an already-completed future is returned, so callers use the
+    same join code in both modes.
+    """
+
+    def __init__(self, limits: dict[str, int] | None = None, mode: str | None = None):
+        self.mode = (mode or os.getenv("PROVIDER_FANOUT_MODE", "concurrent")).lower()
+        self.limits = limits or provider_limits()
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        if self.mode == "concurrent":
+            self._executors = {
+                name: ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"fanout-{name}")
+                for name, limit in self.limits.items()
+            }
+        self._lock = threading.Lock()
+
+    def _executor(self, provider: str) -> ThreadPoolExecutor:
+        executor = self._executors.get(provider)
+        if executor is None:
+            # Unconfigured provider: its own pool at the largest configured limit.
+            with self._lock:
+                executor = self._executors.get(provider)
+                if executor is None:
+                    executor = ThreadPoolExecutor(
+                        max_workers=max(self.limits.values(), default=1),
+                        thread_name_prefix=f"fanout-{provider}",
+                    )
+                    self._executors[provider] = executor
+        return executor
+
+    def submit(self, provider: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        if self.mode != "concurrent":
+            fut: Future = Future()
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except BaseException as exc:  # surface through .result() like the pool does
+                fut.set_exception(exc)
+            return fut
+        return self._executor(provider).submit(fn, *args, **kwargs)
+
+    def join(
+        self,
+        pending: dict[Hashable, Future],
+        timeout: float | None = None,
+    ) -> tuple[dict[Hashable, Any], set[Hashable]]:
+        """
+        Wait for *pending* until *timeout* seconds have passed.
+
+        Returns (results for futures that completed, keys that missed the
+        deadline). Late calls keep running in the pool, so their results still
+        land in the provider caches for the next request.
+        """
+        if pending:
+            wait(pending.values(), timeout=timeout)
+        results: dict[Hashable, Any] = {}
+        missed: set[Hashable] = set()
+        for key, fut in pending.items():
+            if fut.done():
+                results[key] = fut.result()
+            else:
+                missed.add(key)
+        return results, missed
+
+    def shutdown(self) -> None:
+        for executor in list(self._executors.values()):
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Shared process-wide instance used by the routers.
+FANOUT = ProviderFanout()
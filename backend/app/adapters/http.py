@@ -0,0 +1,110 @@
+"""
+Pooled HTTP clients — one keep-alive client per upstream host.
+
+Every provider call used to open a fresh TCP+TLS connection. Clients here are
+created lazily, once per host, and reused so connections stay warm between
+calls. The sync side uses a `requests.Session`; the async side an
+`httpx.AsyncClient` for use from FastAPI async routes. An async client's
+connections belong to the event loop that opened them, so async clients are
+kept per (event loop, host).
+
+Config (env):
+    HTTP_POOL_SIZE              max pooled connections per host (default 20)
+    HTTP_KEEPALIVE_SECONDS      idle keep-alive expiry for async clients (default 60)
+    HTTP_CONNECT_TIMEOUT        connect timeout in seconds (default 5)
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+HTTP_POOL_SIZE = int(_env_float("HTTP_POOL_SIZE", 20))
+HTTP_KEEPALIVE_SECONDS = _env_float("HTTP_KEEPALIVE_SECONDS", 60.0)
+HTTP_CONNECT_TIMEOUT = _env_float("HTTP_CONNECT_TIMEOUT", 5.0)
+
+_sessions: dict[str, requests.Session] = {}
+# event loop → host → client; a loop's clients go away with the loop
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]] = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc
+
+
+def timeout(read_seconds: float) -> tuple[float, float]:
+    """(connect, read) timeout pair for `requests`; the read part is per call."""
+    return (min(HTTP_CONNECT_TIMEOUT, read_seconds), read_seconds)
+
+
+def async_timeout(read_seconds: float) -> httpx.Timeout:
+    return httpx.Timeout(read_seconds, connect=min(HTTP_CONNECT_TIMEOUT, read_seconds))
+
+
+def get_session(url: str) -> requests.Session:
+    """Shared, thread-safe keep-alive session for the host of *url*."""
+    host = host_of(url)
+    session = _sessions.get(host)
+    if session is not None:
+        return session
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+    return session
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    """Shared async client for the host of *url* on the running event loop."""
+    loop = asyncio.get_running_loop()
+    host = host_of(url)
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(host)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=HTTP_POOL_SIZE,
+                    max_keepalive_connections=HTTP_POOL_SIZE,
+                    keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+                ),
+                timeout=async_timeout(15),
+            )
+            clients[host] = client
+    return client
+
+
+def close_sessions() -> None:
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+async def aclose_async_clients() -> None:
+    """Close the running loop's clients (those of other loops can't be awaited here)."""
+    with _lock:
+        clients = list(_async_clients.pop(asyncio.get_running_loop(), {}).values())
+    for client in clients:
+        await client.aclose()
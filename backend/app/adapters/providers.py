@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable
 
-import requests
+from app.adapters import http
+from app.adapters.circuit import CircuitBreaker
+from app.cache import TTLCache
+from app.adapters.singleflight import AsyncSingleFlight, SingleFlight
+from app.adapters.tokens import TokenFile, TokenManager
+from app.store import DATA_DIR
 
 AMADEUS_AUTH_URL = "https://test.api.amadeus.com/v1/security/oauth2/token"
 AMADEUS_FLIGHT_URL = "https://test.api.amadeus.com/v2/shopping/flight-offers"
@@ -134,13 +143,60 @@ PROGRAM_CPP: dict[str, dict[str, float]] = {
 SEATS_AERO_SEARCH_URL = "https://seats.aero/partnerapi/search"
 SEATS_AERO_TRIPS_URL  = "https://seats.aero/partnerapi/trips"
 
-_token_cache: dict[str, Any] = {"token": None, "expires_at": 0.0}
-
 # Per-source provider caches (TTLs per PRD §11)
-_AWARD_CACHE: dict[str, tuple[float, dict]] = {}
-_AIRFARE_CACHE: dict[str, tuple[float, dict]] = {}
 _AWARD_CACHE_TTL   = 7200    # 2 hours — Seats.aero
 _AIRFARE_CACHE_TTL = 43200   # 12 hours — Amadeus flights
+# Stale-while-revalidate: entries this far past their TTL are still served
+# (flagged "stale") while a background worker refetches them. 0 disables.
+_AWARD_CACHE_GRACE   = int(os.getenv("AWARD_CACHE_GRACE_SECONDS", "3600"))
+_AIRFARE_CACHE_GRACE = int(os.getenv("AIRFARE_CACHE_GRACE_SECONDS", "21600"))
+_AWARD_CACHE = TTLCache(
+    "award", _AWARD_CACHE_TTL, max_entries=5000, grace_seconds=_AWARD_CACHE_GRACE, persistent=True,
+)
+_AIRFARE_CACHE = TTLCache(
+    "airfare", _AIRFARE_CACHE_TTL, max_entries=5000, grace_seconds=_AIRFARE_CACHE_GRACE, persistent=True,
+)
+# Hotel rates move slowly; quotes and the raw offer list share one TTL.
+_HOTEL_CACHE_TTL = int(os.getenv("HOTEL_CACHE_TTL_SECONDS", "21600"))  # 6 hours
+_HOTEL_CACHE = TTLCache("hotel", _HOTEL_CACHE_TTL, max_entries=5000, persistent=True)
+_HOTEL_OFFERS_CACHE = TTLCache("hotel_offers", _HOTEL_CACHE_TTL, max_entries=2000, persistent=True)
+
+# In-flight upstream fetches, keyed like the caches above
+_AWARD_INFLIGHT = SingleFlight()
+_AIRFARE_INFLIGHT = SingleFlight()
+_HOTEL_INFLIGHT = SingleFlight()
+_AWARD_INFLIGHT_ASYNC = AsyncSingleFlight()
+_AIRFARE_INFLIGHT_ASYNC = AsyncSingleFlight()
+_HOTEL_INFLIGHT_ASYNC = AsyncSingleFlight()
+
+# Background revalidation of stale cache entries (at most one per key)
+_REFRESHER = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+_REFRESHING: set[str] = set()
+_REFRESHING_LOCK = threading.Lock()
+
+
+def _refresh_in_background(key: str, fn: Callable[[], Any]) -> None:
+    with _REFRESHING_LOCK:
+        if key in _REFRESHING:
+            return
+        _REFRESHING.add(key)
+
+    def _run() -> None:
+        try:
+            fn()
+        finally:
+            with _REFRESHING_LOCK:
+                _REFRESHING.discard(key)
+
+    try:
+        _REFRESHER.submit(_run)
+    except RuntimeError:  # executor shut down
+        with _REFRESHING_LOCK:
+            _REFRESHING.discard(key)
+
+
+def _stale_copy(result: dict[str, Any]) -> dict[str, Any]:
+    return {**result, "stale": True}
 
 # Seats.aero source → human-readable program name mapping (partial)
 # IATA carrier code → full airline name
@@ -206,34 +262,568 @@ _SEATS_SOURCE_TO_PROGRAM: dict[str, str] = {
 }
 
 
-def _amadeus_token() -> str | None:
+# Map cabin to Seats.aero response field prefix (Y/W/J/F)
+_CABIN_PREFIX_MAP: dict[str, str] = {
+    "economy": "Y", "premium_economy": "W", "business": "J", "first": "F",
+}
+
+
+# ── Upstream HTTP (pooled clients behind per-upstream circuit breakers) ─────
+
+_SEATS_SEARCH_BREAKER    = CircuitBreaker("seats_aero_search")
+_SEATS_TRIPS_BREAKER     = CircuitBreaker("seats_aero_trips")
+_AMADEUS_AUTH_BREAKER    = CircuitBreaker("amadeus_auth")
+_AMADEUS_FLIGHTS_BREAKER = CircuitBreaker("amadeus_flights")
+_AMADEUS_HOTELS_BREAKER  = CircuitBreaker("amadeus_hotels")
+
+
+def _get_json(breaker: CircuitBreaker, url: str, params: dict, headers: dict, read_timeout: float) -> Any:
+    def _do() -> Any:
+        r = http.get_session(url).get(url, params=params, headers=headers, timeout=http.timeout(read_timeout))
+        r.raise_for_status()
+        return r.json()
+    return breaker.call(_do)
+
+
+def _post_json(breaker: CircuitBreaker, url: str, data: dict, read_timeout: float) -> Any:
+    def _do() -> Any:
+        r = http.get_session(url).post(url, data=data, timeout=http.timeout(read_timeout))
+        r.raise_for_status()
+        return r.json()
+    return breaker.call(_do)
+
+
+async def _aget_json(breaker: CircuitBreaker, url: str, params: dict, headers: dict, read_timeout: float) -> Any:
+    async def _do() -> Any:
+        r = await http.get_async_client(url).get(
+            url, params=params, headers=headers, timeout=http.async_timeout(read_timeout),
+        )
+        r.raise_for_status()
+        return r.json()
+    return await breaker.acall(_do)
+
+
+# ── Amadeus auth ──────────────────────────────────────────────────────────────
+
+def _amadeus_credentials() -> tuple[str, str] | None:
     cid = os.getenv("AMADEUS_CLIENT_ID")
     csec = os.getenv("AMADEUS_CLIENT_SECRET")
     if not cid or not csec:
         return None
-    # Return cached token if it has more than 60 seconds left
-    if _token_cache["token"] and time.time() < _token_cache["expires_at"] - 60:
-        return _token_cache["token"]
+    return cid, csec
+
+
+def _fetch_amadeus_token() -> tuple[str, float] | None:
+    creds = _amadeus_credentials()
+    if not creds:
+        return None
+    cid, csec = creds
     try:
-        r = requests.post(
+        payload = _post_json(
+            _AMADEUS_AUTH_BREAKER,
             AMADEUS_AUTH_URL,
             data={
                 "grant_type": "client_credentials",
                 "client_id": cid,
                 "client_secret": csec,
             },
-            timeout=12,
+            read_timeout=12,
         )
-        r.raise_for_status()
-        data = r.json()
-        token = data.get("access_token")
-        expires_in = int(data.get("expires_in", 1799))
-        _token_cache["token"] = token
-        _token_cache["expires_at"] = time.time() + expires_in
-        return token
+        token = payload.get("access_token")
+        expires_in = float(payload.get("expires_in", 1799))
     except Exception:
+        return None  # includes a body that isn't a token object
+    if not token or not isinstance(token, str):
+        return None
+    return token, expires_in
+
+
+# Refreshed in the background ahead of expiry (started by the app lifespan) and
+# shared with the node's other workers through an owner-only file; set
+# AMADEUS_TOKEN_PATH empty to keep it in this process only.
+AMADEUS_TOKEN_PATH = os.getenv("AMADEUS_TOKEN_PATH", str(DATA_DIR / "amadeus_token.json"))
+AMADEUS_TOKENS = TokenManager(
+    "amadeus",
+    fetch=_fetch_amadeus_token,
+    refresh_ahead_seconds=float(os.getenv("AMADEUS_TOKEN_REFRESH_AHEAD_SECONDS", "300")),
+    shared=TokenFile(Path(AMADEUS_TOKEN_PATH)) if AMADEUS_TOKEN_PATH else None,
+)
+
+
+def start_token_refresh() -> None:
+    """Fetch the Amadeus token at startup and keep it fresh from then on."""
+    if _amadeus_credentials():
+        AMADEUS_TOKENS.start()
+
+
+def _amadeus_token() -> str | None:
+    if not _amadeus_credentials():
+        return None
+    return AMADEUS_TOKENS.get()
+
+
+async def _amadeus_token_async() -> str | None:
+    if not _amadeus_credentials():
+        return None
+    # Normally a plain read; only a cold start waits, on the shared refresh.
+    return AMADEUS_TOKENS.current() or await asyncio.to_thread(AMADEUS_TOKENS.get)
+
+
+# ── Award (Seats.aero) parsing ────────────────────────────────────────────────
+
+def _seats_search_params(origin: str, destination: str, depart_date: str, return_date: str) -> dict[str, str]:
+    return {
+        "origin_airport":      origin,
+        "destination_airport": destination,
+        "start_date":          depart_date,
+        "end_date":            return_date or depart_date,
+    }
+
+
+def _select_award(
+    items: list[dict],
+    cabin_prefix: str,
+    depart_date: str,
+    window_end: str,
+    duration_nights: int,
+) -> tuple[dict, str, str] | None:
+    """Pick the cheapest usable Seats.aero item → (item, cost_field, tax_field)."""
+    # Filter to items with availability for the requested cabin
+    avail_field = f"{cabin_prefix}Available"
+    cost_field  = f"{cabin_prefix}MileageCostRaw"
+    tax_field   = f"{cabin_prefix}TotalTaxesRaw"
+
+    available_items = [
+        x for x in items
+        if x.get(avail_field) is True
+        and (x.get(cost_field) or 0) > 0
+        # Only trust USD taxes
+        and x.get("TaxesCurrency", "USD") == "USD"
+    ]
+
+    # Fall back to any cabin if preferred cabin unavailable
+    if not available_items:
+        available_items = [
+            x for x in items
+            if (x.get("YAvailable") or x.get("JAvailable") or x.get("WAvailable") or x.get("FAvailable"))
+            and x.get("TaxesCurrency", "USD") == "USD"
+        ]
+        # Re-map to economy prefix if falling back
+        if available_items:
+            cost_field   = "YMileageCostRaw"
+            tax_field    = "YTotalTaxesRaw"
+
+    # Filter items to those whose departure date falls within the valid window:
+    # departure must be >= depart_date and <= (window_end - duration_nights)
+    if available_items and window_end and duration_nights:
+        try:
+            win_start_dt = datetime.strptime(depart_date, "%Y-%m-%d").date()
+            win_end_dt = datetime.strptime(window_end, "%Y-%m-%d").date()
+            latest_depart_dt = win_end_dt - timedelta(days=duration_nights)
+            date_filtered = [
+                x for x in available_items
+                if x.get("Date")
+                and win_start_dt
+                <= datetime.strptime(x["Date"][:10], "%Y-%m-%d").date()
+                <= latest_depart_dt
+            ]
+            if date_filtered:
+                available_items = date_filtered
+        except Exception:
+            pass
+
+    if not available_items:
         return None
+    # Pick cheapest by mileage cost for requested cabin
+    best = min(available_items, key=lambda x: int(x.get(cost_field) or 999_999_999))
+    return best, cost_field, tax_field
+
+
+def _trip_segments(trips: Any) -> list[dict]:
+    return trips if isinstance(trips, list) else trips.get("data", [])
+
+
+def _award_result(
+    best: dict,
+    cost_field: str,
+    tax_field: str,
+    segments: list[dict],
+    destination: str,
+    depart_date: str,
+    now: str,
+    now_ts: float,
+) -> dict[str, Any] | None:
+    route = ROUTE_DATA.get(destination, {})
+
+    # Extract the actual departure date from this result
+    best_depart_date = depart_date
+    raw_date = best.get("Date", "")
+    if raw_date and len(raw_date) >= 10:
+        best_depart_date = raw_date[:10]
+
+    points = int(best.get(cost_field) or 0)
+    # Taxes stored in cents in Seats.aero response
+    taxes_raw = best.get(tax_field) or 0
+    taxes = round(float(taxes_raw) / 100.0, 2)
+
+    src_program = str(best.get("Source") or "")
+    program_label = _SEATS_SOURCE_TO_PROGRAM.get(src_program.lower(), src_program.upper() or "MR")
+
+    # Use UpdatedAt for data freshness
+    updated_at_str = best.get("UpdatedAt", "")
+    retrieved_at_ts = now_ts
+    if updated_at_str:
+        try:
+            dt = datetime.fromisoformat(updated_at_str.replace("Z", "+00:00"))
+            retrieved_at_ts = dt.timestamp()
+        except Exception:
+            pass
 
+    # Extract operating airline from YAirlines field (comma-sep IATA codes)
+    airlines_str = str(best.get("YAirlines") or "")
+    raw_carrier = airlines_str.split(",")[0].strip() if airlines_str else ""
+    operating_carrier = _IATA_TO_AIRLINE.get(raw_carrier, raw_carrier)
+
+    # Flight-level data (from the trips endpoint) for exact matching
+    flight_number = ""
+    exact_match = False
+    if segments:
+        first_seg = segments[0]
+        flight_number = str(first_seg.get("FlightNumber") or "")
+        if not operating_carrier:
+            operating_carrier = str(first_seg.get("OperatingCarrier") or "")
+        exact_match = bool(flight_number)
+
+    if points <= 0:
+        return None
+    return {
+        "points_cost":            points,
+        "taxes_fees":             taxes,
+        "program":                program_label,
+        "availability_indicator": "available",
+        "source_url":             "",
+        "retrieved_at":           now,
+        "as_of":                  now,
+        "source":                 "seats_aero_live",
+        "airline":                operating_carrier or route.get("airlines", [""])[0],
+        "duration":               route.get("duration", ""),
+        "city_name":              route.get("city", destination),
+        # Matching metadata (PRD §6 / confidence scoring)
+        "operating_carrier":      operating_carrier,
+        "flight_number":          flight_number,
+        "exact_flight_match":     exact_match,
+        "retrieved_at_ts":        retrieved_at_ts,
+        # Date optimization
+        "depart_date":            best_depart_date,
+    }
+
+
+def _award_estimate(
+    origin: str,
+    destination: str,
+    cabin: str,
+    depart_date: str,
+    window_end: str,
+    duration_nights: int,
+    now: str,
+    now_ts: float,
+) -> dict[str, Any]:
+    """Per-route award estimator (fallback when Seats.aero is unavailable)."""
+    route = ROUTE_DATA.get(destination, {})
+    seed = hash(origin + destination)
+
+    cabin_key = cabin if cabin in ("economy", "premium_economy", "business", "first") else "economy"
+    target_cpp = PROGRAM_CPP["MR"].get(cabin_key, 1.7)
+
+    cash_pp_base = route.get("cash_pp_base", 400)
+    cash_pp_var  = max(1, route.get("cash_pp_range", 150))
+    est_cash_pp  = cash_pp_base + (abs(seed) % cash_pp_var)
+
+    taxes_base = route.get("taxes_base", 80)
+    taxes_var  = max(1, route.get("taxes_range", 40))
+    taxes = float(taxes_base + (abs(seed) % taxes_var))
+
+    pts = int((est_cash_pp - taxes) / target_cpp * 100)
+
+    pts_key   = "pts_business" if cabin in ("business", "first") else "pts_economy"
+    chart_pts = route.get(pts_key, pts)
+    pts       = int(pts * 0.4 + chart_pts * 0.6) if chart_pts else pts
+
+    airline = _pick(route.get("airlines", ["United"]), seed)
+
+    # For estimator, pick the midpoint of the valid departure window
+    est_depart_date = depart_date
+    if depart_date and window_end and duration_nights:
+        try:
+            start_dt = datetime.strptime(depart_date, "%Y-%m-%d").date()
+            end_dt = datetime.strptime(window_end, "%Y-%m-%d").date()
+            latest_depart_dt = end_dt - timedelta(days=duration_nights)
+            if latest_depart_dt >= start_dt:
+                mid_days = (latest_depart_dt - start_dt).days // 2
+                est_depart_date = (start_dt + timedelta(days=mid_days)).isoformat()
+        except Exception:
+            pass
+
+    return {
+        "points_cost":            max(10000, pts),
+        "taxes_fees":             taxes,
+        "program":                "MR",
+        "availability_indicator": "estimated",
+        "source_url":             "",
+        "retrieved_at":           now,
+        "as_of":                  now,
+        "source":                 "award_estimator_mvp",
+        "airline":                airline,
+        "duration":               route.get("duration", ""),
+        "city_name":              route.get("city", destination),
+        # Matching metadata (empty for estimator)
+        "operating_carrier":      "",
+        "flight_number":          "",
+        "exact_flight_match":     False,
+        "retrieved_at_ts":        now_ts,
+        # Date optimization
+        "depart_date":            est_depart_date,
+    }
+
+
+# ── Airfare (Amadeus) parsing ─────────────────────────────────────────────────
+
+def _airfare_params(origin: str, destination: str, travelers: int, depart_date: str, return_date: str) -> dict[str, Any]:
+    params = {
+        "originLocationCode": origin,
+        "destinationLocationCode": destination,
+        "departureDate": depart_date,
+        "adults": max(1, int(travelers)),
+        "currencyCode": "USD",
+        "max": 3,
+    }
+    if return_date and return_date != depart_date:
+        params["returnDate"] = return_date
+    return params
+
+
+def _airfare_result(data: list[dict], destination: str, travelers: int, now: str) -> dict[str, Any] | None:
+    route = ROUTE_DATA.get(destination, {})
+    best = None
+    best_price = float("inf")
+    for offer in data:
+        price = float(offer.get("price", {}).get("grandTotal", 0) or 0)
+        if 0 < price < best_price:
+            best_price = price
+            best = offer
+    if not best or best_price <= 0:
+        return None
+
+    # Extract airline and duration from first itinerary
+    itineraries = best.get("itineraries", [])
+    airline = ""
+    duration_str = ""
+    if itineraries:
+        segments = itineraries[0].get("segments", [])
+        if segments:
+            carrier = segments[0].get("carrierCode", "")
+            airline = _IATA_TO_AIRLINE.get(carrier, carrier)
+        raw_dur = itineraries[0].get("duration", "")
+        if raw_dur.startswith("PT"):
+            raw_dur = raw_dur[2:]
+            h = raw_dur.split("H")[0] if "H" in raw_dur else "0"
+            m = raw_dur.split("H")[-1].replace("M", "") if "M" in raw_dur else "0"
+            duration_str = f"{h}h {m}m"
+    price_pp = round(best_price / max(travelers, 1), 2)
+    return {
+        "cash_price_total": best_price,
+        "cash_price_pp": price_pp,
+        "airline": airline or route.get("airlines", [""])[0],
+        "duration": duration_str or route.get("duration", ""),
+        "city_name": route.get("city", destination),
+        "country": route.get("country", ""),
+        "as_of": now,
+        "source": "amadeus_test",
+    }
+
+
+def _airfare_estimate(origin: str, destination: str, travelers: int, now: str) -> dict[str, Any]:
+    """Per-route mock with deterministic but realistic pricing."""
+    route = ROUTE_DATA.get(destination, {})
+    seed = hash(origin + destination)
+    base = route.get("cash_pp_base", 400)
+    var = max(1, route.get("cash_pp_range", 150))
+    price_pp = base + (abs(seed) % var)
+    airline = _pick(route.get("airlines", ["United"]), seed)
+
+    return {
+        "cash_price_total": float(price_pp * max(travelers, 1)),
+        "cash_price_pp": float(price_pp),
+        "airline": airline,
+        "duration": route.get("duration", ""),
+        "city_name": route.get("city", destination),
+        "country": route.get("country", ""),
+        "as_of": now,
+        "source": "airfare_adapter_mock",
+    }
+
+
+# ── Hotel (Amadeus) parsing ───────────────────────────────────────────────────
+
+def _hotel_params(destination: str, travelers: int) -> dict[str, Any]:
+    return {"cityCode": destination, "adults": max(1, int(travelers)), "roomQuantity": 1}
+
+
+def _hotel_prices(data: list[dict]) -> list[float]:
+    prices: list[float] = []
+    for h in data:
+        offers = h.get("offers", [])
+        for o in offers:
+            total = o.get("price", {}).get("total")
+            if total is not None:
+                try:
+                    prices.append(float(total))
+                except Exception:
+                    continue
+    return prices
+
+
+def _hotel_quote(prices: list[float], nights: int, as_of: str) -> dict[str, Any]:
+    cash_rate = min(prices)
+    points_rate = int((cash_rate * max(1, nights) / 0.012))
+    fees = max(20.0, cash_rate * 0.08)
+    return {
+        "cash_rate_all_in": float(cash_rate),
+        "points_rate": points_rate,
+        "fees_on_points": float(fees),
+        "as_of": as_of,
+        "source": "amadeus_test",
+    }
+
+
+def _hotel_estimate(destination: str, nights: int, now: str) -> dict[str, Any]:
+    cash_rate = float((140 + (hash(destination) % 120)) * max(nights, 1))
+    points_rate = int((32000 + (hash(destination + "hotel") % 30000)) * max(nights / 5, 0.6))
+    fees = float(35 + (hash(destination) % 40))
+    return {
+        "cash_rate_all_in": cash_rate,
+        "points_rate": points_rate,
+        "fees_on_points": fees,
+        "as_of": now,
+        "source": "hotel_adapter_mock",
+    }
+
+
+# ── Live fetches and stale-entry revalidation ─────────────────────────────────
+# Shared by the sync and async providers: a stale cache hit is served at once
+# and refreshed here, on the background refresher's threads.
+
+def _fetch_award_live(
+    seats_key: str,
+    cache_key: str,
+    origin: str,
+    destination: str,
+    cabin_prefix: str,
+    depart_date: str,
+    return_date: str,
+    window_end: str,
+    duration_nights: int,
+    now: str,
+    now_ts: float,
+) -> dict[str, Any] | None:
+    try:
+        payload = _get_json(
+            _SEATS_SEARCH_BREAKER,
+            SEATS_AERO_SEARCH_URL,
+            params=_seats_search_params(origin, destination, depart_date, return_date),
+            headers={"Partner-Authorization": seats_key},
+            read_timeout=15,
+        )
+        picked = _select_award(payload.get("data", []), cabin_prefix, depart_date, window_end, duration_nights)
+        if not picked:
+            return None
+        best, cost_field, tax_field = picked
+
+        # Optionally fetch flight-level data for exact matching
+        segments: list[dict] = []
+        avail_id = best.get("ID") or ""
+        if avail_id:
+            try:
+                trips = _get_json(
+                    _SEATS_TRIPS_BREAKER,
+                    SEATS_AERO_TRIPS_URL,
+                    params={"id": avail_id},
+                    headers={"Partner-Authorization": seats_key},
+                    read_timeout=10,
+                )
+                segments = _trip_segments(trips)
+            except Exception:
+                pass
+
+        result = _award_result(best, cost_field, tax_field, segments, destination, depart_date, now, now_ts)
+        if result:
+            _AWARD_CACHE.set(cache_key, result)
+        return result
+    except Exception:
+        return None
+
+
+def _revalidate_award(
+    seats_key: str,
+    cache_key: str,
+    origin: str,
+    destination: str,
+    cabin_prefix: str,
+    depart_date: str,
+    return_date: str,
+    window_end: str,
+    duration_nights: int,
+) -> None:
+    _refresh_in_background(f"award:{cache_key}", lambda: _AWARD_INFLIGHT.do(cache_key, lambda: _fetch_award_live(
+        seats_key, cache_key, origin, destination, cabin_prefix,
+        depart_date, return_date, window_end, duration_nights, _now(), time.time(),
+    )))
+
+
+def _fetch_airfare_live(
+    cache_key: str,
+    origin: str,
+    destination: str,
+    travelers: int,
+    depart_date: str,
+    return_date: str,
+    now: str,
+) -> dict[str, Any] | None:
+    token = _amadeus_token()
+    if not token:
+        return None
+    try:
+        payload = _get_json(
+            _AMADEUS_FLIGHTS_BREAKER,
+            AMADEUS_FLIGHT_URL,
+            params=_airfare_params(origin, destination, travelers, depart_date, return_date),
+            headers={"Authorization": f"Bearer {token}"},
+            read_timeout=15,
+        )
+        result = _airfare_result(payload.get("data", []), destination, travelers, now)
+        if result:
+            _AIRFARE_CACHE.set(cache_key, result)
+        return result
+    except Exception:
+        return None
+
+
+def _revalidate_airfare(
+    cache_key: str,
+    origin: str,
+    destination: str,
+    travelers: int,
+    depart_date: str,
+    return_date: str,
+) -> None:
+    _refresh_in_background(f"airfare:{cache_key}", lambda: _AIRFARE_INFLIGHT.do(cache_key, lambda: _fetch_airfare_live(
+        cache_key, origin, destination, travelers, depart_date, return_date, _now(),
+    )))
+
+
+# ── Sync providers ────────────────────────────────────────────────────────────
+# Cache misses go through single-flight keyed on the provider cache key, so a
+# burst of identical searches makes one upstream call and shares its result.
 
 class AwardProvider:
     """Award inventory: tries Seats.aero live API, then falls back to per-route estimator."""
@@ -251,219 +841,62 @@ class AwardProvider:
     ) -> dict[str, Any]:
         now = _now()
         now_ts = time.time()
-        route = ROUTE_DATA.get(destination, {})
-        seed = hash(origin + destination)
-
-        # Map cabin to Seats.aero response field prefix (Y/W/J/F)
-        cabin_prefix_map = {
-            "economy": "Y", "premium_economy": "W", "business": "J", "first": "F",
-        }
-        cabin_prefix = cabin_prefix_map.get(cabin, "Y")
+        cabin_prefix = _CABIN_PREFIX_MAP.get(cabin, "Y")
 
         seats_key = os.getenv("SEATS_AERO_API_KEY")
         if seats_key and depart_date:
             cache_key = f"{origin}:{destination}:{cabin_prefix}:{depart_date}"
-            cached = _AWARD_CACHE.get(cache_key)
-            if cached and (now_ts - cached[0]) < _AWARD_CACHE_TTL:
-                return cached[1]
-
-            try:
-                r = requests.get(
-                    SEATS_AERO_SEARCH_URL,
-                    params={
-                        "origin_airport":      origin,
-                        "destination_airport": destination,
-                        "start_date":          depart_date,
-                        "end_date":            return_date or depart_date,
-                    },
-                    headers={"Partner-Authorization": seats_key},
-                    timeout=15,
+            cached = _AWARD_CACHE.get_stale(cache_key)
+            if cached:
+                value, stale = cached
+                if not stale:
+                    return value
+                _revalidate_award(
+                    seats_key, cache_key, origin, destination, cabin_prefix,
+                    depart_date, return_date, window_end, duration_nights,
                 )
-                r.raise_for_status()
-                payload = r.json()
-                items = payload.get("data", [])
-
-                # Filter to items with availability for the requested cabin
-                avail_field = f"{cabin_prefix}Available"
-                cost_field  = f"{cabin_prefix}MileageCostRaw"
-                tax_field   = f"{cabin_prefix}TotalTaxesRaw"
-
-                available_items = [
-                    x for x in items
-                    if x.get(avail_field) is True
-                    and (x.get(cost_field) or 0) > 0
-                    # Only trust USD taxes
-                    and x.get("TaxesCurrency", "USD") == "USD"
-                ]
-
-                # Fall back to any cabin if preferred cabin unavailable
-                if not available_items:
-                    available_items = [
-                        x for x in items
-                        if (x.get("YAvailable") or x.get("JAvailable") or x.get("WAvailable") or x.get("FAvailable"))
-                        and x.get("TaxesCurrency", "USD") == "USD"
-                    ]
-                    # Re-map to economy prefix if falling back
-                    if available_items:
-                        cabin_prefix = "Y"
-                        cost_field   = "YMileageCostRaw"
-                        tax_field    = "YTotalTaxesRaw"
-
-                # Filter items to those whose departure date falls within the valid window:
-                # departure must be >= depart_date and <= (window_end - duration_nights)
-                if available_items and window_end and duration_nights:
-                    try:
-                        win_start_dt = datetime.strptime(depart_date, "%Y-%m-%d").date()
-                        win_end_dt = datetime.strptime(window_end, "%Y-%m-%d").date()
-                        latest_depart_dt = win_end_dt - timedelta(days=duration_nights)
-                        date_filtered = [
-                            x for x in available_items
-                            if x.get("Date")
-                            and win_start_dt
-                            <= datetime.strptime(x["Date"][:10], "%Y-%m-%d").date()
-                            <= latest_depart_dt
-                        ]
-                        if date_filtered:
-                            available_items = date_filtered
-                    except Exception:
-                        pass
-
-                if available_items:
-                    # Pick cheapest by mileage cost for requested cabin
-                    best = min(available_items, key=lambda x: int(x.get(cost_field) or 999_999_999))
-
-                    # Extract the actual departure date from this result
-                    best_depart_date = depart_date
-                    raw_date = best.get("Date", "")
-                    if raw_date and len(raw_date) >= 10:
-                        best_depart_date = raw_date[:10]
-
-                    points = int(best.get(cost_field) or 0)
-                    # Taxes stored in cents in Seats.aero response
-                    taxes_raw = best.get(tax_field) or 0
-                    taxes = round(float(taxes_raw) / 100.0, 2)
-
-                    src_program = str(best.get("Source") or "")
-                    program_label = _SEATS_SOURCE_TO_PROGRAM.get(src_program.lower(), src_program.upper() or "MR")
-
-                    # Use UpdatedAt for data freshness
-                    updated_at_str = best.get("UpdatedAt", "")
-                    retrieved_at_ts = now_ts
-                    if updated_at_str:
-                        try:
-                            dt = datetime.fromisoformat(updated_at_str.replace("Z", "+00:00"))
-                            retrieved_at_ts = dt.timestamp()
-                        except Exception:
-                            pass
-
-                    # Extract operating airline from YAirlines field (comma-sep IATA codes)
-                    airlines_str = str(best.get("YAirlines") or "")
-                    raw_carrier = airlines_str.split(",")[0].strip() if airlines_str else ""
-                    operating_carrier = _IATA_TO_AIRLINE.get(raw_carrier, raw_carrier)
-
-                    # Optionally fetch flight-level data for exact matching
-                    avail_id = best.get("ID") or ""
-                    flight_number = ""
-                    exact_match = False
-                    if avail_id:
-                        try:
-                            tr = requests.get(
-                                SEATS_AERO_TRIPS_URL,
-                                params={"id": avail_id},
-                                headers={"Partner-Authorization": seats_key},
-                                timeout=10,
-                            )
-                            tr.raise_for_status()
-                            trips = tr.json()
-                            segs = trips if isinstance(trips, list) else trips.get("data", [])
-                            if segs:
-                                first_seg = segs[0]
-                                flight_number = str(first_seg.get("FlightNumber") or "")
-                                if not operating_carrier:
-                                    operating_carrier = str(first_seg.get("OperatingCarrier") or "")
-                                exact_match = bool(flight_number)
-                        except Exception:
-                            pass
-
-                    if points > 0:
-                        result = {
-                            "points_cost":            points,
-                            "taxes_fees":             taxes,
-                            "program":                program_label,
-                            "availability_indicator": "available",
-                            "source_url":             "",
-                            "retrieved_at":           now,
-                            "as_of":                  now,
-                            "source":                 "seats_aero_live",
-                            "airline":                operating_carrier or route.get("airlines", [""])[0],
-                            "duration":               route.get("duration", ""),
-                            "city_name":              route.get("city", destination),
-                            # Matching metadata (PRD §6 / confidence scoring)
-                            "operating_carrier":      operating_carrier,
-                            "flight_number":          flight_number,
-                            "exact_flight_match":     exact_match,
-                            "retrieved_at_ts":        retrieved_at_ts,
-                            # Date optimization
-                            "depart_date":            best_depart_date,
-                        }
-                        _AWARD_CACHE[cache_key] = (now_ts, result)
-                        return result
-            except Exception:
-                pass
-
-        # ── Per-route estimator (fallback) ────────────────────────────────────
-        cabin_key = cabin if cabin in ("economy", "premium_economy", "business", "first") else "economy"
-        target_cpp = PROGRAM_CPP["MR"].get(cabin_key, 1.7)
-
-        cash_pp_base = route.get("cash_pp_base", 400)
-        cash_pp_var  = max(1, route.get("cash_pp_range", 150))
-        est_cash_pp  = cash_pp_base + (abs(seed) % cash_pp_var)
-
-        taxes_base = route.get("taxes_base", 80)
-        taxes_var  = max(1, route.get("taxes_range", 40))
-        taxes = float(taxes_base + (abs(seed) % taxes_var))
+                return _stale_copy(value)
 
-        pts = int((est_cash_pp - taxes) / target_cpp * 100)
+            result = _AWARD_INFLIGHT.do(cache_key, lambda: _fetch_award_live(
+                seats_key, cache_key, origin, destination, cabin_prefix,
+                depart_date, return_date, window_end, duration_nights, now, now_ts,
+            ))
+            if result:
+                return result
 
-        pts_key   = "pts_business" if cabin in ("business", "first") else "pts_economy"
-        chart_pts = route.get(pts_key, pts)
-        pts       = int(pts * 0.4 + chart_pts * 0.6) if chart_pts else pts
+        return _award_estimate(origin, destination, cabin, depart_date, window_end, duration_nights, now, now_ts)
 
-        airline = _pick(route.get("airlines", ["United"]), seed)
-
-        # For estimator, pick the midpoint of the valid departure window
-        est_depart_date = depart_date
-        if depart_date and window_end and duration_nights:
-            try:
-                start_dt = datetime.strptime(depart_date, "%Y-%m-%d").date()
-                end_dt = datetime.strptime(window_end, "%Y-%m-%d").date()
-                latest_depart_dt = end_dt - timedelta(days=duration_nights)
-                if latest_depart_dt >= start_dt:
-                    mid_days = (latest_depart_dt - start_dt).days // 2
-                    est_depart_date = (start_dt + timedelta(days=mid_days)).isoformat()
-            except Exception:
-                pass
+    def estimate(
+        self,
+        origin: str,
+        destination: str,
+        travelers: int,
+        cabin: str = "economy",
+        depart_date: str = "",
+        return_date: str = "",
+        window_end: str = "",
+        duration_nights: int = 5,
+    ) -> dict[str, Any]:
+        """Estimator-only quote, same signature as `search` (used past a deadline)."""
+        return _award_estimate(origin, destination, cabin, depart_date, window_end, duration_nights, _now(), time.time())
 
-        return {
-            "points_cost":            max(10000, pts),
-            "taxes_fees":             taxes,
-            "program":                "MR",
-            "availability_indicator": "estimated",
-            "source_url":             "",
-            "retrieved_at":           now,
-            "as_of":                  now,
-            "source":                 "award_estimator_mvp",
-            "airline":                airline,
-            "duration":               route.get("duration", ""),
-            "city_name":              route.get("city", destination),
-            # Matching metadata (empty for estimator)
-            "operating_carrier":      "",
-            "flight_number":          "",
-            "exact_flight_match":     False,
-            "retrieved_at_ts":        now_ts,
-            # Date optimization
-            "depart_date":            est_depart_date,
-        }
+    def peek(
+        self,
+        origin: str,
+        destination: str,
+        travelers: int,
+        cabin: str = "economy",
+        depart_date: str = "",
+        return_date: str = "",
+        window_end: str = "",
+        duration_nights: int = 5,
+    ) -> dict[str, Any] | None:
+        """The quote `search` would return without an upstream call, else None."""
+        if os.getenv("SEATS_AERO_API_KEY") and depart_date:
+            return _AWARD_CACHE.peek(f"{origin}:{destination}:{_CABIN_PREFIX_MAP.get(cabin, 'Y')}:{depart_date}")
+        return self.estimate(
+            origin, destination, travelers, cabin, depart_date, return_date, window_end, duration_nights,
+        )
 
 
 class AirfareProvider:
@@ -476,140 +909,302 @@ class AirfareProvider:
         return_date: str,
     ) -> dict[str, Any]:
         now = _now()
-        now_ts = time.time()
-        route = ROUTE_DATA.get(destination, {})
-        seed = hash(origin + destination)
 
         cache_key = f"{origin}:{destination}:{depart_date}:{travelers}"
-        cached = _AIRFARE_CACHE.get(cache_key)
-        if cached and (now_ts - cached[0]) < _AIRFARE_CACHE_TTL:
-            return cached[1]
+        cached = _AIRFARE_CACHE.get_stale(cache_key)
+        if cached:
+            value, stale = cached
+            if not stale:
+                return value
+            _revalidate_airfare(cache_key, origin, destination, travelers, depart_date, return_date)
+            return _stale_copy(value)
 
-        token = _amadeus_token()
-        if token:
-            try:
-                params = {
-                    "originLocationCode": origin,
-                    "destinationLocationCode": destination,
-                    "departureDate": depart_date,
-                    "adults": max(1, int(travelers)),
-                    "currencyCode": "USD",
-                    "max": 3,
-                }
-                if return_date and return_date != depart_date:
-                    params["returnDate"] = return_date
-
-                r = requests.get(
-                    AMADEUS_FLIGHT_URL,
-                    params=params,
-                    headers={"Authorization": f"Bearer {token}"},
-                    timeout=15,
-                )
-                r.raise_for_status()
-                data = r.json().get("data", [])
-                if data:
-                    best = None
-                    best_price = float("inf")
-                    for offer in data:
-                        price = float(offer.get("price", {}).get("grandTotal", 0) or 0)
-                        if 0 < price < best_price:
-                            best_price = price
-                            best = offer
-                    if best and best_price > 0:
-                        # Extract airline and duration from first itinerary
-                        itineraries = best.get("itineraries", [])
-                        airline = ""
-                        duration_str = ""
-                        if itineraries:
-                            segments = itineraries[0].get("segments", [])
-                            if segments:
-                                carrier = segments[0].get("carrierCode", "")
-                                airline = _IATA_TO_AIRLINE.get(carrier, carrier)
-                            raw_dur = itineraries[0].get("duration", "")
-                            if raw_dur.startswith("PT"):
-                                raw_dur = raw_dur[2:]
-                                h = raw_dur.split("H")[0] if "H" in raw_dur else "0"
-                                m = raw_dur.split("H")[-1].replace("M", "") if "M" in raw_dur else "0"
-                                duration_str = f"{h}h {m}m"
-                        price_pp = round(best_price / max(travelers, 1), 2)
-                        result = {
-                            "cash_price_total": best_price,
-                            "cash_price_pp": price_pp,
-                            "airline": airline or route.get("airlines", [""])[0],
-                            "duration": duration_str or route.get("duration", ""),
-                            "city_name": route.get("city", destination),
-                            "country": route.get("country", ""),
-                            "as_of": now,
-                            "source": "amadeus_test",
-                        }
-                        _AIRFARE_CACHE[cache_key] = (now_ts, result)
-                        return result
-            except Exception:
-                pass
+        result = _AIRFARE_INFLIGHT.do(cache_key, lambda: _fetch_airfare_live(
+            cache_key, origin, destination, travelers, depart_date, return_date, now,
+        ))
+        if result:
+            return result
 
-        # Per-route mock with deterministic but realistic pricing
-        base = route.get("cash_pp_base", 400)
-        var = max(1, route.get("cash_pp_range", 150))
-        price_pp = base + (abs(seed) % var)
-        airline = _pick(route.get("airlines", ["United"]), seed)
+        return _airfare_estimate(origin, destination, travelers, now)
+
+    def estimate(
+        self,
+        origin: str,
+        destination: str,
+        travelers: int,
+        depart_date: str,
+        return_date: str,
+    ) -> dict[str, Any]:
+        return _airfare_estimate(origin, destination, travelers, _now())
 
-        return {
-            "cash_price_total": float(price_pp * max(travelers, 1)),
-            "cash_price_pp": float(price_pp),
-            "airline": airline,
-            "duration": route.get("duration", ""),
-            "city_name": route.get("city", destination),
-            "country": route.get("country", ""),
-            "as_of": now,
-            "source": "airfare_adapter_mock",
-        }
+    def peek(
+        self,
+        origin: str,
+        destination: str,
+        travelers: int,
+        depart_date: str,
+        return_date: str,
+    ) -> dict[str, Any] | None:
+        """The quote `search` would return without an upstream call, else None."""
+        cached = _AIRFARE_CACHE.peek(f"{origin}:{destination}:{depart_date}:{travelers}")
+        if cached is not None:
+            return cached
+        if _amadeus_credentials() is None:
+            return self.estimate(origin, destination, travelers, depart_date, return_date)
+        return None
 
 
 class HotelProvider:
+    """
+    Hotel quotes are cached per (cityCode, nights, travelers). The fetched offer
+    list is cached separately per (cityCode, travelers) — the Amadeus call does
+    not depend on nights — so other stay lengths reuse it without a refetch.
+    """
+
     def search(self, destination: str, nights: int, travelers: int) -> dict[str, Any]:
         now = _now()
+
+        quote_key = f"{destination}:{nights}:{travelers}"
+        cached = _HOTEL_CACHE.get(quote_key)
+        if cached:
+            return cached
+
+        offers_key = f"{destination}:{travelers}"
+        offers = _HOTEL_OFFERS_CACHE.get(offers_key)
+        if offers is None:
+            offers = _HOTEL_INFLIGHT.do(offers_key, lambda: self._fetch_offers(offers_key, destination, travelers, now))
+        if offers:
+            result = _hotel_quote(offers["prices"], nights, offers["as_of"])
+            _HOTEL_CACHE.set(quote_key, result)
+            return result
+
+        return _hotel_estimate(destination, nights, now)
+
+    def estimate(self, destination: str, nights: int, travelers: int) -> dict[str, Any]:
+        return _hotel_estimate(destination, nights, _now())
+
+    def peek(self, destination: str, nights: int, travelers: int) -> dict[str, Any] | None:
+        """The quote `search` would return without an upstream call, else None."""
+        cached = _HOTEL_CACHE.peek(f"{destination}:{nights}:{travelers}")
+        if cached is not None:
+            return cached
+        offers = _HOTEL_OFFERS_CACHE.peek(f"{destination}:{travelers}")
+        if offers:
+            return _hotel_quote(offers["prices"], nights, offers["as_of"])
+        if _amadeus_credentials() is None:
+            return self.estimate(destination, nights, travelers)
+        return None
+
+    def _fetch_offers(self, offers_key: str, destination: str, travelers: int, now: str) -> dict[str, Any] | None:
         token = _amadeus_token()
-        if token:
-            try:
-                r = requests.get(
-                    AMADEUS_HOTEL_URL,
-                    params={"cityCode": destination, "adults": max(1, int(travelers)), "roomQuantity": 1},
-                    headers={"Authorization": f"Bearer {token}"},
-                    timeout=15,
+        if not token:
+            return None
+        try:
+            payload = _get_json(
+                _AMADEUS_HOTELS_BREAKER,
+                AMADEUS_HOTEL_URL,
+                params=_hotel_params(destination, travelers),
+                headers={"Authorization": f"Bearer {token}"},
+                read_timeout=15,
+            )
+            prices = _hotel_prices(payload.get("data", []))
+            if not prices:
+                return None
+            offers = {"prices": prices, "as_of": now}
+            _HOTEL_OFFERS_CACHE.set(offers_key, offers)
+            return offers
+        except Exception:
+            return None
+
+
+# ── Async providers ───────────────────────────────────────────────────────────
+# Same contracts as the sync providers, for FastAPI async routes. They share the
+# module caches and the Amadeus token with the sync side and run their HTTP
+# calls on the pooled per-host clients from `adapters.http`.
+
+class AsyncAwardProvider:
+    async def search(
+        self,
+        origin: str,
+        destination: str,
+        travelers: int,
+        cabin: str = "economy",
+        depart_date: str = "",
+        return_date: str = "",
+        window_end: str = "",
+        duration_nights: int = 5,
+    ) -> dict[str, Any]:
+        now = _now()
+        now_ts = time.time()
+        cabin_prefix = _CABIN_PREFIX_MAP.get(cabin, "Y")
+
+        seats_key = os.getenv("SEATS_AERO_API_KEY")
+        if seats_key and depart_date:
+            cache_key = f"{origin}:{destination}:{cabin_prefix}:{depart_date}"
+            cached = _AWARD_CACHE.get_stale(cache_key)
+            if cached:
+                value, stale = cached
+                if not stale:
+                    return value
+                _revalidate_award(
+                    seats_key, cache_key, origin, destination, cabin_prefix,
+                    depart_date, return_date, window_end, duration_nights,
                 )
-                r.raise_for_status()
-                data = r.json().get("data", [])
-                prices: list[float] = []
-                for h in data:
-                    offers = h.get("offers", [])
-                    for o in offers:
-                        total = o.get("price", {}).get("total")
-                        if total is not None:
-                            try:
-                                prices.append(float(total))
-                            except Exception:
-                                continue
-                if prices:
-                    cash_rate = min(prices)
-                    points_rate = int((cash_rate * max(1, nights) / 0.012))
-                    fees = max(20.0, cash_rate * 0.08)
-                    return {
-                        "cash_rate_all_in": float(cash_rate),
-                        "points_rate": points_rate,
-                        "fees_on_points": float(fees),
-                        "as_of": now,
-                        "source": "amadeus_test",
-                    }
-            except Exception:
-                pass
+                return _stale_copy(value)
+
+            result = await _AWARD_INFLIGHT_ASYNC.do(cache_key, lambda: self._fetch_live(
+                seats_key, cache_key, origin, destination, cabin_prefix,
+                depart_date, return_date, window_end, duration_nights, now, now_ts,
+            ))
+            if result:
+                return result
+
+        return _award_estimate(origin, destination, cabin, depart_date, window_end, duration_nights, now, now_ts)
+
+    async def _fetch_live(
+        self,
+        seats_key: str,
+        cache_key: str,
+        origin: str,
+        destination: str,
+        cabin_prefix: str,
+        depart_date: str,
+        return_date: str,
+        window_end: str,
+        duration_nights: int,
+        now: str,
+        now_ts: float,
+    ) -> dict[str, Any] | None:
+        try:
+            payload = await _aget_json(
+                _SEATS_SEARCH_BREAKER,
+                SEATS_AERO_SEARCH_URL,
+                params=_seats_search_params(origin, destination, depart_date, return_date),
+                headers={"Partner-Authorization": seats_key},
+                read_timeout=15,
+            )
+            picked = _select_award(payload.get("data", []), cabin_prefix, depart_date, window_end, duration_nights)
+            if not picked:
+                return None
+            best, cost_field, tax_field = picked
+
+            segments: list[dict] = []
+            avail_id = best.get("ID") or ""
+            if avail_id:
+                try:
+                    trips = await _aget_json(
+                        _SEATS_TRIPS_BREAKER,
+                        SEATS_AERO_TRIPS_URL,
+                        params={"id": avail_id},
+                        headers={"Partner-Authorization": seats_key},
+                        read_timeout=10,
+                    )
+                    segments = _trip_segments(trips)
+                except Exception:
+                    pass
+
+            result = _award_result(best, cost_field, tax_field, segments, destination, depart_date, now, now_ts)
+            if result:
+                _AWARD_CACHE.set(cache_key, result)
+            return result
+        except Exception:
+            return None
+
+
+class AsyncAirfareProvider:
+    async def search(
+        self,
+        origin: str,
+        destination: str,
+        travelers: int,
+        depart_date: str,
+        return_date: str,
+    ) -> dict[str, Any]:
+        now = _now()
+
+        cache_key = f"{origin}:{destination}:{depart_date}:{travelers}"
+        cached = _AIRFARE_CACHE.get_stale(cache_key)
+        if cached:
+            value, stale = cached
+            if not stale:
+                return value
+            _revalidate_airfare(cache_key, origin, destination, travelers, depart_date, return_date)
+            return _stale_copy(value)
+
+        result = await _AIRFARE_INFLIGHT_ASYNC.do(cache_key, lambda: self._fetch_live(
+            cache_key, origin, destination, travelers, depart_date, return_date, now,
+        ))
+        if result:
+            return result
+
+        return _airfare_estimate(origin, destination, travelers, now)
+
+    async def _fetch_live(
+        self,
+        cache_key: str,
+        origin: str,
+        destination: str,
+        travelers: int,
+        depart_date: str,
+        return_date: str,
+        now: str,
+    ) -> dict[str, Any] | None:
+        token = await _amadeus_token_async()
+        if not token:
+            return None
+        try:
+            payload = await _aget_json(
+                _AMADEUS_FLIGHTS_BREAKER,
+                AMADEUS_FLIGHT_URL,
+                params=_airfare_params(origin, destination, travelers, depart_date, return_date),
+                headers={"Authorization": f"Bearer {token}"},
+                read_timeout=15,
+            )
+            result = _airfare_result(payload.get("data", []), destination, travelers, now)
+            if result:
+                _AIRFARE_CACHE.set(cache_key, result)
+            return result
+        except Exception:
+            return None
+
+
+class AsyncHotelProvider:
+    async def search(self, destination: str, nights: int, travelers: int) -> dict[str, Any]:
+        now = _now()
+
+        quote_key = f"{destination}:{nights}:{travelers}"
+        cached = _HOTEL_CACHE.get(quote_key)
+        if cached:
+            return cached
+
+        offers_key = f"{destination}:{travelers}"
+        offers = _HOTEL_OFFERS_CACHE.get(offers_key)
+        if offers is None:
+            offers = await _HOTEL_INFLIGHT_ASYNC.do(offers_key, lambda: self._fetch_offers(offers_key, destination, travelers, now))
+        if offers:
+            result = _hotel_quote(offers["prices"], nights, offers["as_of"])
+            _HOTEL_CACHE.set(quote_key, result)
+            return result
+
+        return _hotel_estimate(destination, nights, now)
 
-        cash_rate = float((140 + (hash(destination) % 120)) * max(nights, 1))
-        points_rate = int((32000 + (hash(destination + "hotel") % 30000)) * max(nights / 5, 0.6))
-        fees = float(35 + (hash(destination) % 40))
-        return {
-            "cash_rate_all_in": cash_rate,
-            "points_rate": points_rate,
-            "fees_on_points": fees,
-            "as_of": now,
-            "source": "hotel_adapter_mock",
-        }
+    async def _fetch_offers(self, offers_key: str, destination: str, travelers: int, now: str) -> dict[str, Any] | None:
+        token = await _amadeus_token_async()
+        if not token:
+            return None
+        try:
+            payload = await _aget_json(
+                _AMADEUS_HOTELS_BREAKER,
+                AMADEUS_HOTEL_URL,
+                params=_hotel_params(destination, travelers),
+                headers={"Authorization": f"Bearer {token}"},
+                read_timeout=15,
+            )
+            prices = _hotel_prices(payload.get("data", []))
+            if not prices:
+                return None
+            offers = {"prices": prices, "as_of": now}
+            _HOTEL_OFFERS_CACHE.set(offers_key, offers)
+            return offers
+        except Exception:
+            return None
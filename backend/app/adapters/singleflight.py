@@ -0,0 +1,85 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers asking for the same key share one in-flight upstream fetch:
+the first caller (the leader) runs the function, everyone else waits for it
+and receives the same result — or the same exception. Nothing is remembered
+once the call finishes; caching stays the provider cache's job.
+
+`SingleFlight` is for threads (sync routes, the fan-out pool);
+`AsyncSingleFlight` is its counterpart for coroutines on one event loop, where
+the fetch runs as a task of its own: a cancelled caller stops waiting, but the
+fetch carries on for everyone else.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0  # callers that piggy-backed on another caller's fetch
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    def __init__(self) -> None:
+        self._calls: dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            # The fetch runs as its own task, so it belongs to no single caller.
+            task = self._calls[key] = asyncio.ensure_future(self._run(key, fn))
+            # Mark an exception retrieved even if every caller was cancelled.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        else:
+            self.coalesced += 1
+        # shield: cancelling any caller, the first one included, leaves the
+        # shared fetch running for the others
+        return await asyncio.shield(task)
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            return await fn()
+        finally:
+            self._calls.pop(key, None)
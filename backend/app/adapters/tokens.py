@@ -0,0 +1,200 @@
+"""
+OAuth token manager — keeps an access token fresh ahead of expiry.
+
+A background thread refreshes the token `refresh_ahead_seconds` before it
+expires, so requests normally just read the current token. If a request does
+find no usable token (cold start, refresh failures), only one refresh runs at a
+time and every other caller waits for it rather than posting to the auth
+endpoint too. The refresher is started once, from the app lifespan.
+
+Given a TokenFile, the token is shared with the other workers on the node: a
+worker about to refresh takes the file's lock and first adopts a newer token
+another worker already wrote, so one refresh serves them all. The token is a
+credential, so it goes to its own owner-only (0600) file and never to the
+plaintext provider cache.
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: the lock is process-local only
+    fcntl = None
+
+# fetch() → (access_token, expires_in_seconds), or None on failure
+TokenFetcher = Callable[[], "tuple[str, float] | None"]
+
+
+class TokenFile:
+    """One token on disk: `{"token", "expires_at"}` JSON, mode 0600, replaced atomically."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.Lock()
+
+    def load(self) -> tuple[str, float] | None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return str(data["token"]), float(data["expires_at"])
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+
+    def save(self, token: str, expires_at: float) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # mkstemp creates the file 0600; the rename keeps that mode.
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"token": token, "expires_at": expires_at}, f)
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Exclusive across the node's workers (flock on `<file>.lock`) and this process's threads."""
+        with self._local:
+            if fcntl is None:
+                yield
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path.with_name(self.path.name + ".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)  # releases the flock
+
+
+class TokenManager:
+    def __init__(
+        self,
+        name: str,
+        fetch: TokenFetcher,
+        refresh_ahead_seconds: float = 300.0,
+        min_valid_seconds: float = 60.0,
+        retry_seconds: float = 30.0,
+        shared: TokenFile | None = None,
+    ):
+        self.name = name
+        self._fetch = fetch
+        self.refresh_ahead_seconds = refresh_ahead_seconds
+        self.min_valid_seconds = min_valid_seconds
+        self.retry_seconds = retry_seconds
+        self._shared = shared
+
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+        self.refreshes = 0
+
+    # ── public ────────────────────────────────────────────────────────────────
+
+    def get(self) -> str | None:
+        """Current token; blocks on a (single, shared) refresh only if none is usable."""
+        token = self._usable_token()
+        if token is None:
+            with self._refresh_lock, self._shared_lock():
+                self._adopt_shared()
+                token = self._usable_token() or self._refresh()
+        return token
+
+    def current(self) -> str | None:
+        """Usable token without ever blocking on a refresh."""
+        return self._usable_token()
+
+    def start(self) -> None:
+        """Start the background refresher (idempotent)."""
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name=f"{self.name}-token-refresh", daemon=True,
+                )
+                self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    # ── internals ─────────────────────────────────────────────────────────────
+
+    @contextmanager
+    def _shared_lock(self) -> Iterator[None]:
+        if self._shared is None:
+            yield
+        else:
+            with self._shared.lock():
+                yield
+
+    def _adopt_shared(self) -> None:
+        """Take the shared token if another worker stored a newer one."""
+        if self._shared is None:
+            return
+        shared = self._shared.load()
+        if shared and shared[1] > self._expires_at:
+            self._token, self._expires_at = shared
+            self._wake.set()
+
+    def _usable_token(self) -> str | None:
+        now = time.time()
+        if self._token and now < self._expires_at - self.min_valid_seconds:
+            return self._token
+        return None
+
+    def _refresh(self) -> str | None:
+        """Fetch a new token. Caller holds _refresh_lock."""
+        fetched = self._fetch()
+        if not fetched:
+            return None
+        token, expires_in = fetched
+        self._token = token
+        self._expires_at = time.time() + expires_in
+        self.refreshes += 1
+        if self._shared is not None:
+            try:
+                self._shared.save(token, self._expires_at)
+            except OSError:
+                pass  # still usable here; the other workers fetch their own
+        self._wake.set()
+        return token
+
+    def _seconds_until_refresh(self) -> float:
+        if not self._token:
+            return 0.0
+        return max(0.0, self._expires_at - self.refresh_ahead_seconds - time.time())
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            wait_for = self._seconds_until_refresh()
+            if wait_for > 0:
+                self._wake.wait(wait_for)
+                if self._stop.is_set():
+                    return
+                if self._seconds_until_refresh() > 0:
+                    continue  # woken early by a refresh elsewhere; reschedule
+            with self._refresh_lock, self._shared_lock():
+                self._adopt_shared()
+                if self._seconds_until_refresh() > 0:
+                    continue
+                ok = self._refresh() is not None
+            if not ok:
+                self._stop.wait(self.retry_seconds)
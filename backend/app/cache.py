@@ -0,0 +1,349 @@
+"""
+Bounded in-process cache — LRU eviction, TTL expiry and per-cache counters.
+
+Every named cache is registered in CACHES so its counters can be reported
+(see /health/caches). Limits are per cache and can be overridden from env:
+
+    <NAME>_CACHE_MAX_ENTRIES    e.g. AWARD_CACHE_MAX_ENTRIES=5000
+    <NAME>_CACHE_MAX_BYTES      approximate, from the JSON size of each value
+
+Expired entries are dropped on read, swept before evicting live entries when a
+limit is hit, and actively purged by a background janitor every
+CACHE_SWEEP_INTERVAL_SECONDS (default 60).
+
+A cache built with `grace_seconds` keeps entries that long past their TTL so
+`get_stale` can serve them while the caller refreshes in the background
+(stale-while-revalidate). `get` never returns a stale entry.
+
+Caches built with `persistent=True` can also write through to a shared
+backend, selected by PROVIDER_CACHE_BACKEND:
+
+    memory  (default) — process-local only
+    sqlite  — SQLite in WAL mode at PROVIDER_CACHE_PATH
+              (default DATA_DIR/provider_cache.sqlite3), shared by every
+              worker on the node and kept across restarts
+
+The persistent layer keeps each entry's own expiry; a local miss is filled
+from it with the remaining TTL, not a fresh one.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from app.serialization import dumps_compact, loads
+from app.store import DATA_DIR
+
+CACHE_SWEEP_INTERVAL_SECONDS = float(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS", "60"))
+PROVIDER_CACHE_BACKEND = os.getenv("PROVIDER_CACHE_BACKEND", "memory").lower()
+PROVIDER_CACHE_PATH = Path(os.getenv("PROVIDER_CACHE_PATH", str(DATA_DIR / "provider_cache.sqlite3")))
+
+CACHES: dict[str, "TTLCache"] = {}
+_registry_lock = threading.Lock()
+_janitor: threading.Thread | None = None
+
+
+def _approx_size(value: Any) -> int:
+    try:
+        return len(dumps_compact(value))
+    except Exception:
+        return 1024
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class SQLiteCacheBackend:
+    """Shared cache table in one SQLite file (WAL: readers never block the writer)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                cache      TEXT NOT NULL,
+                key        TEXT NOT NULL,
+                value      TEXT NOT NULL,
+                stored_at  REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (cache, key)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_expiry ON cache_entries (cache, expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, cache: str, key: str) -> tuple[float, float, Any] | None:
+        row = self._conn().execute(
+            "SELECT stored_at, expires_at, value FROM cache_entries WHERE cache = ? AND key = ?",
+            (cache, key),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], loads(row[2])
+
+    def set(self, cache: str, key: str, value: Any, stored_at: float, expires_at: float) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache_entries (cache, key, value, stored_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (cache, key, dumps_compact(value).decode(), stored_at, expires_at),
+        )
+
+    def delete(self, cache: str, key: str | None = None) -> None:
+        if key is None:
+            self._conn().execute("DELETE FROM cache_entries WHERE cache = ?", (cache,))
+        else:
+            self._conn().execute("DELETE FROM cache_entries WHERE cache = ? AND key = ?", (cache, key))
+
+    def purge(self, cache: str, older_than: float) -> int:
+        cur = self._conn().execute(
+            "DELETE FROM cache_entries WHERE cache = ? AND expires_at <= ?", (cache, older_than),
+        )
+        return cur.rowcount
+
+
+_backend: SQLiteCacheBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def _persistent_backend() -> SQLiteCacheBackend | None:
+    global _backend
+    if PROVIDER_CACHE_BACKEND != "sqlite":
+        return None
+    with _backend_lock:
+        if _backend is None:
+            _backend = SQLiteCacheBackend(PROVIDER_CACHE_PATH)
+    return _backend
+
+
+class TTLCache:
+    """Thread-safe LRU + TTL map. `get` returns None on miss or expiry."""
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        grace_seconds: float = 0.0,
+        persistent: bool = False,
+    ):
+        env_prefix = name.upper()
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.grace_seconds = grace_seconds
+        self.max_entries = _env_int(f"{env_prefix}_CACHE_MAX_ENTRIES", max_entries)
+        self.max_bytes = _env_int(f"{env_prefix}_CACHE_MAX_BYTES", max_bytes)
+        # key → (stored_at, expires_at, size, value), least recently used first
+        self._data: OrderedDict[str, tuple[float, float, int, Any]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._backend = _persistent_backend() if persistent else None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        _register(self)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any | None:
+        found = self.get_stale(key, allow_stale=False)
+        return found[0] if found else None
+
+    def get_stale(self, key: str, allow_stale: bool = True) -> tuple[Any, bool] | None:
+        """(value, is_stale) — stale means past TTL but still inside the grace window."""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] + self.grace_seconds <= now:
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+
+        if entry is None and self._backend is not None:
+            entry = self._load_persistent(key, now)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            stale = entry[1] <= now
+            if stale and not allow_stale:
+                self.misses += 1
+                return None
+            if key in self._data:  # may have been evicted/replaced since the lookup
+                self._data.move_to_end(key)
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            return entry[3], stale
+
+    def peek(self, key: str) -> Any | None:
+        """Cached value (stale included) without counting a lookup or touching LRU order."""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None and self._backend is not None:
+            try:
+                loaded = self._backend.get(self.name, key)
+            except sqlite3.Error:
+                loaded = None
+            if loaded is not None:
+                entry = (loaded[0], loaded[1], 0, loaded[2])
+        if entry is None or entry[1] + self.grace_seconds <= now:
+            return None
+        return entry[3]
+
+    def set(self, key: str, value: Any, ttl_seconds: float | None = None) -> None:
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        size = _approx_size(value)
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (now, now + ttl, size, value)
+            self._bytes += size
+            self._enforce_limits(now)
+        if self._backend is not None:
+            try:
+                self._backend.set(self.name, key, value, now, now + ttl)
+            except sqlite3.Error:
+                pass
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+        if self._backend is not None:
+            try:
+                self._backend.delete(self.name, key)
+            except sqlite3.Error:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+        if self._backend is not None:
+            try:
+                self._backend.delete(self.name)
+            except sqlite3.Error:
+                pass
+
+    def purge_expired(self, now: float | None = None) -> int:
+        """Drop expired in-process entries (the janitor also purges the persistent layer)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [k for k, e in self._data.items() if e[1] + self.grace_seconds <= now]
+            for k in expired:
+                self._drop(k)
+            self.expirations += len(expired)
+            return len(expired)
+
+    def purge_persistent(self, now: float | None = None) -> int:
+        if self._backend is None:
+            return 0
+        now = time.time() if now is None else now
+        try:
+            return self._backend.purge(self.name, now - self.grace_seconds)
+        except sqlite3.Error:
+            return 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "backend": PROVIDER_CACHE_BACKEND if self._backend is not None else "memory",
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "grace_seconds": self.grace_seconds,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _load_persistent(self, key: str, now: float) -> tuple[float, float, int, Any] | None:
+        """Fill a local miss from the shared layer, keeping the entry's own expiry."""
+        try:
+            loaded = self._backend.get(self.name, key)
+        except sqlite3.Error:
+            return None
+        if loaded is None or loaded[1] + self.grace_seconds <= now:
+            return None
+        stored_at, expires_at, value = loaded
+        entry = (stored_at, expires_at, _approx_size(value), value)
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = entry
+            self._bytes += entry[2]
+            self._enforce_limits(now)
+        return entry
+
+    # ── internals (caller holds the lock) ─────────────────────────────────────
+
+    def _drop(self, key: str) -> None:
+        entry = self._data.pop(key)
+        self._bytes -= entry[2]
+
+    def _over_limit(self) -> bool:
+        return len(self._data) > self.max_entries or self._bytes > self.max_bytes
+
+    def _enforce_limits(self, now: float) -> None:
+        if not self._over_limit():
+            return
+        # Reclaim expired entries before evicting anything still live.
+        self.purge_expired(now)
+        while self._over_limit() and self._data:
+            oldest = next(iter(self._data))
+            self._drop(oldest)
+            self.evictions += 1
+
+
+def _register(cache: TTLCache) -> None:
+    global _janitor
+    with _registry_lock:
+        CACHES[cache.name] = cache
+        if _janitor is None and CACHE_SWEEP_INTERVAL_SECONDS > 0:
+            _janitor = threading.Thread(target=_sweep_forever, name="cache-janitor", daemon=True)
+            _janitor.start()
+
+
+def _sweep_forever() -> None:
+    while True:
+        time.sleep(CACHE_SWEEP_INTERVAL_SECONDS)
+        for cache in list(CACHES.values()):
+            cache.purge_expired()
+            cache.purge_persistent()
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    return {name: cache.stats() for name, cache in CACHES.items()}
@@ -30,6 +30,23 @@ class TransferPath(BaseModel):
     promo_bonus_percent: float = 0.0
     effective_points: int            # balance * ratio * (1 + promo/100)
     transfer_time_minutes: int       # 0 = instant
+    hops: List[str] = Field(default_factory=list)  # e.g. ["MR", "Flying Blue", "Delta"]
+    partner_booking: bool = False    # program books an alliance partner, not its own airline
+
+
+class PointsTransfer(BaseModel):
+    purpose: Literal["flight", "hotel"]
+    currency: str                    # e.g. "MR"
+    program: str                     # e.g. "Flying Blue", "Marriott Bonvoy"
+    points: int                      # points moved out of the currency
+    miles: int                       # miles/points landing in the program
+
+
+class ScoreWeights(BaseModel):
+    # score = w1·(−OOP/5000) + w2·(capped CPP/5) + w3·(−friction/10)
+    w1: float = 0.5                  # out-of-pocket
+    w2: float = 0.35                 # points value (CPP)
+    w3: float = 0.15                 # friction (stops, travel time)
 
 
 class Constraints(BaseModel):
@@ -39,7 +56,7 @@ class Constraints(BaseModel):
 
 
 class PointsBalance(BaseModel):
-    program: Literal["MR", "CAP1", "MARRIOTT"]
+    program: Literal["MR", "CAP1", "BILT", "CITI", "MARRIOTT"]
     balance: int
 
 
@@ -54,6 +71,8 @@ class TripSearchCreate(BaseModel):
     cabin_preference: Cabin = "economy"
     constraints: Constraints = Field(default_factory=Constraints)
     balances: List[PointsBalance] = Field(default_factory=list)
+    # Price every valid departure date in the window instead of the midpoint only
+    flexible_dates: bool = False
 
 
 class TripSearch(BaseModel):
@@ -61,6 +80,21 @@ class TripSearch(BaseModel):
     payload: TripSearchCreate
 
 
+class PriceCalendarEntry(BaseModel):
+    depart_date: str
+    return_date: str
+    cash_flight_total: float
+    cash_trip_total: float           # flight + hotel, all cash
+    source: str = "unknown"
+
+
+class OriginQuote(BaseModel):
+    origin: str
+    oop_total: float
+    score_final: float
+    degraded: bool = False
+
+
 class RecommendationOption(BaseModel):
     id: str
     destination: str
@@ -87,7 +121,7 @@ class RecommendationOption(BaseModel):
     score_components: dict = Field(default_factory=dict)
     marriott_points_eligible: bool = False
     hotel_booking_mode: str = "cash"
-    points_strategy: str = "none"
+    points_strategy: str = "none"     # "flight" | "hotel" | "both" | "none"
     cpp_threshold: float = 1.0
     cash_flights_mode: str = "ESTIMATED"
     cash_hotels_mode: str = "ESTIMATED"
@@ -101,13 +135,28 @@ class RecommendationOption(BaseModel):
     cpp_range: Optional[CPPRange] = None
     valuation: Optional[Valuation] = None
     transfer_paths: List[TransferPath] = Field(default_factory=list)
+    # Balance allocation funding the chosen redemption (currencies may be pooled)
+    points_allocation: List[PointsTransfer] = Field(default_factory=list)
     no_award_seats: bool = False
+    # Latency budget: live data missed the request deadline → estimator used
+    degraded: bool = False
+    degraded_sources: List[str] = Field(default_factory=list)  # "airfare" | "hotel" | "award"
+    # flexible_dates: cash prices for each departure date priced, and the cheapest
+    price_calendar: List[PriceCalendarEntry] = Field(default_factory=list)
+    best_depart_date: Optional[str] = None
+    # Multi-origin searches: every listed origin's result for this destination
+    # (`origin` is the best-scoring one)
+    origin_comparison: List[OriginQuote] = Field(default_factory=list)
 
 
 class RecommendationBundle(BaseModel):
     trip_search_id: str
     winner_tiles: dict
     options: List[RecommendationOption]
+    degraded_options: List[str] = Field(default_factory=list)  # option ids
+    # top_k searches: candidates dropped unquoted because their best possible
+    # score could not reach the top k (destination codes)
+    pruned_destinations: List[str] = Field(default_factory=list)
 
 
 class PlaybookResponse(BaseModel):
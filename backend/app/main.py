@@ -1,11 +1,39 @@
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+
+# Before any app module: their settings are read from the environment at import.
+load_dotenv()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
+from fastapi.responses import ORJSONResponse
 from app.routers import health, trip_searches, recommendations, playbook, alerts
+from app.adapters.fanout import FANOUT
+from app.adapters import http
+from app import store
+from app.adapters.providers import AMADEUS_TOKENS, start_token_refresh
 
-load_dotenv()
 
-app = FastAPI(title="PointPilot API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    start_token_refresh()
+    store.start_compactor()
+    yield
+    store.stop_compactor()
+    AMADEUS_TOKENS.stop()
+    FANOUT.shutdown()
+    http.close_sessions()
+    await http.aclose_async_clients()
+    store.flush_all()
+
+
+app = FastAPI(
+    title="PointPilot API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1,4 +1,6 @@
 from fastapi import APIRouter
+from app.cache import cache_stats
+from app.adapters.circuit import breaker_states
 
 router = APIRouter()
 
@@ -6,3 +8,13 @@ router = APIRouter()
 @router.get('/health')
 def health():
     return {'status': 'ok'}
+
+
+@router.get('/health/caches')
+def caches():
+    return cache_stats()
+
+
+@router.get('/health/circuits')
+def circuits():
+    return breaker_states()
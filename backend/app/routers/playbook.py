@@ -2,7 +2,7 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from app.domain.models import PlaybookResponse
-from app.store import load_recommendations, load_trip_searches
+from app import store
 from app.data.transfer_partners import (
     get_transferable_programs_for_backend,
     get_programs_for_airline,
@@ -183,23 +183,26 @@ class PlaybookRequest(BaseModel):
 
 @router.post('/generate', response_model=PlaybookResponse)
 def generate_playbook(req: PlaybookRequest):
-    recs = load_recommendations()
-    rec = recs.get(req.option_id)
+    rec = store.recommendations.get(req.option_id)
     if not rec:
         raise HTTPException(404, "Option not found. Generate recommendations first.")
 
-    trip = load_trip_searches().get(rec["trip_search_id"])
+    trip = store.trip_searches.get(rec["trip_search_id"])
     if not trip:
         raise HTTPException(404, "Trip search context not found")
 
-    balances = {b.get("program"): int(b.get("balance", 0)) for b in trip["payload"].get("balances", [])}
+    if "balances" in rec:  # re-ranked option: the what-if balances it was allocated from
+        balances = rec["balances"]
+    else:
+        balances = {b.get("program"): int(b.get("balance", 0)) for b in trip["payload"].get("balances", [])}
     search_mode = rec.get("search_mode", "points")
     destination = rec.get("destination", "")
     origin = rec.get("origin", trip["payload"].get("origins", [""])[0])
     airline = rec.get("airline", "")
     city_name = rec.get("city_name", destination)
-    depart_date = trip["payload"].get("date_window_start", "")
-    return_date = trip["payload"].get("date_window_end", "")
+    # Flexible-date options carry their own dates; otherwise use the search window.
+    depart_date = rec.get("depart_date") or trip["payload"].get("date_window_start", "")
+    return_date = rec.get("return_date") or trip["payload"].get("date_window_end", "")
     cabin = trip["payload"].get("cabin_preference", "economy")
 
     portals = BOOKING_PORTALS.get(destination, [])
@@ -243,10 +246,15 @@ def generate_playbook(req: PlaybookRequest):
     taxes_fees = float(rec.get("taxes_fees", 0.0))
     cpp_threshold = float(rec.get("cpp_threshold", 1.0))
     cpp_flight = float(rec.get("cpp_flight", 0.0))
+    points_allocation = rec.get("points_allocation", [])
 
     if req.points_strategy_override in ("flight", "hotel", "none"):
         if not alternates or req.points_strategy_override in alternates or req.points_strategy_override == "none":
             points_strategy = req.points_strategy_override
+    # The optimizer's transfers only hold for the strategy it chose
+    allocated = points_allocation if points_strategy == rec.get("points_strategy") else []
+    flight_transfers = [t for t in allocated if t["purpose"] == "flight"]
+    hotel_transfers = [t for t in allocated if t["purpose"] == "hotel" and t["currency"] != "MARRIOTT"]
 
     program_meta = TRANSFER_PARTNERS.get(flight_program, {})
     program_label = program_meta.get("label", flight_program)
@@ -291,8 +299,19 @@ def generate_playbook(req: PlaybookRequest):
         "Award availability can vanish between search and checkout.",
     ]
 
-    if points_strategy == "flight":
-        if best_partner_name and best_partner:
+    if points_strategy in ("flight", "both"):
+        if len(flight_transfers) > 1 or (flight_transfers and not (best_partner_name and best_partner)):
+            # Pooled (or unmapped-currency) funding from the balance optimizer
+            if len(flight_transfers) > 1:
+                transfer_steps.append(f"Pool your points into {flight_transfers[0]['program']}:")
+            transfer_steps.extend(
+                f"Transfer {t['points']:,} {t['currency']} pts → {t['program']} ({t['miles']:,} miles)."
+                for t in flight_transfers
+            )
+            booking_steps.append(f"Once all transfers land, log in to {flight_transfers[0]['program']}.")
+            booking_steps.append(f"Search award: {origin} → {destination}, {cabin} cabin, {depart_date}" +
+                                 (f" return {return_date}" if return_date else "") + ".")
+        elif best_partner_name and best_partner:
             transfer_steps.extend([
                 f"Log in to your {program_label} account.",
                 f"Transfer {flight_points_required:,} pts → {best_partner_name} ({best_partner['ratio']}, {best_partner['speed']}).",
@@ -317,11 +336,11 @@ def generate_playbook(req: PlaybookRequest):
 
         booking_steps.extend([
             f"Expect ~${taxes_fees:.0f} in taxes/fees at checkout (cash charge on the award booking).",
-            "Book hotel separately in cash for this itinerary.",
+            *(["Book hotel separately in cash for this itinerary."] if points_strategy == "flight" else []),
             "Screenshot the confirmation page showing points used + taxes paid.",
         ])
 
-        available = balances.get(flight_program, 0)
+        available = sum(t["miles"] for t in flight_transfers) or balances.get(flight_program, 0)
         if available < flight_points_required:
             warnings.append(
                 f"Balance check: you have {available:,} {flight_program} pts — "
@@ -334,30 +353,42 @@ def generate_playbook(req: PlaybookRequest):
                 "don't transfer until you've confirmed award space is available."
             )
 
-    elif points_strategy == "hotel":
+    if points_strategy in ("hotel", "both"):
         marriott_meta = TRANSFER_PARTNERS.get("MARRIOTT", {})
-        transfer_steps.extend([
-            "Hotel CPP is stronger than flight CPP for this option — use Marriott Bonvoy points on the hotel.",
-            "No transfer needed for Marriott — book directly through the Bonvoy portal.",
-        ])
+        if points_strategy == "hotel":
+            transfer_steps.append(
+                "Hotel CPP is stronger than flight CPP for this option — use Marriott Bonvoy points on the hotel."
+            )
+        if hotel_transfers:
+            transfer_steps.extend(
+                f"Transfer {t['points']:,} {t['currency']} pts → Marriott Bonvoy to top up the hotel redemption."
+                for t in hotel_transfers
+            )
+        else:
+            transfer_steps.append("No transfer needed for Marriott — book directly through the Bonvoy portal.")
         booking_steps.extend([
-            "Book the flight in cash (see comparison sites below).",
+            *(["Book the flight in cash (see comparison sites below)."] if points_strategy == "hotel" else []),
             f"Book hotel via Marriott Bonvoy: {marriott_meta.get('book_url', 'https://www.marriott.com/rewards/')}",
             f"Search for properties in {city_name} for your dates.",
             "Filter by 'Use Points' — confirm the property participates in Bonvoy.",
         ])
 
-        marriott_balance = balances.get("MARRIOTT", 0)
+        marriott_balance = balances.get("MARRIOTT", 0) + sum(t["miles"] for t in hotel_transfers)
         if marriott_balance < hotel_points_required:
             warnings.append(
                 f"Balance check: you have {marriott_balance:,} Marriott pts — "
                 f"need ~{hotel_points_required:,}."
             )
 
-    else:
-        transfer_steps.append(
-            f"Neither flight nor hotel clears the {cpp_threshold:.1f}¢ CPP threshold — use cash for both."
-        )
+    if points_strategy == "none":
+        if cpp_flight > cpp_threshold or rec.get("marriott_cpp_eligible"):
+            transfer_steps.append(
+                "Your balances can't cover a redemption on this option, even pooled — use cash for both."
+            )
+        else:
+            transfer_steps.append(
+                f"Neither flight nor hotel clears the {cpp_threshold:.1f}¢ CPP threshold — use cash for both."
+            )
         booking_steps.extend([
             "Book flight in cash.",
             "Book hotel in cash.",
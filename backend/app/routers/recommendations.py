@@ -1,19 +1,47 @@
+from concurrent.futures import Future
 from datetime import date, datetime, timedelta, timezone
+from functools import partial
+import hashlib
+import os
 import time
+from typing import Any, Callable, List, Optional
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from app.domain.models import RecommendationBundle, RecommendationOption, TransferPath
-from app.services.scoring import blended_score
-from app.services.recommender import generate_destination_candidates
-from app.services.valuation import compute_cpp_range, compute_confidence, build_valuation
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
+from app.domain.models import (
+    CPPRange, OriginQuote, PointsBalance, PointsTransfer, PriceCalendarEntry, RecommendationBundle,
+    RecommendationOption, ScoreWeights, TransferPath,
+)
+from app.services import pruning, scoring
+from app.services.allocation import allocate_batch, funding_capacity
+from app.services.batch_scoring import score_allocated_batch, score_cash_batch, score_points_batch
+from app.services.recommender import MAX_CANDIDATES, generate_destination_candidates
+from app.services.valuation import build_valuation
 from app.services.transfer_graph import build_transfer_paths
-from app.store import load_trip_searches, load_recommendations, save_recommendations
+from app.cache import TTLCache
+from app.serialization import dumps_compact
+from app import store
 from app.adapters.providers import AwardProvider, AirfareProvider, HotelProvider
+from app.adapters.fanout import FANOUT
 
 router = APIRouter()
 
-_RECO_CACHE: dict[str, tuple[float, dict]] = {}
 _CACHE_TTL_SECONDS = 300
+_RECO_CACHE = TTLCache("reco", _CACHE_TTL_SECONDS, max_entries=1000)
+
+# Request-level latency budget shared by all provider calls (0 disables it).
+_DEADLINE_SECONDS = float(os.getenv("RECOMMENDATION_DEADLINE_SECONDS", "3.0"))
+
+# Quote sets kept per trip search for re-rank (what-if balances / weights).
+_QUOTE_SETS = TTLCache(
+    "quote_sets", int(os.getenv("RERANK_QUOTES_TTL_SECONDS", "3600")), max_entries=1000, persistent=True,
+)
+
+# top_k searches: how many filtered candidates are bounded before pruning.
+_PRUNE_CANDIDATE_POOL = int(os.getenv("PRUNE_CANDIDATE_POOL", "200"))
+
+# flexible_dates: most departure dates priced per destination (longer windows are thinned evenly).
+_FLEXIBLE_DATES_MAX_DAYS = int(os.getenv("FLEXIBLE_DATES_MAX_DAYS", "21"))
 
 # All supported US departure airports (synced with frontend AIRPORTS list)
 US_ORIGIN_ALLOWLIST = {
@@ -28,51 +56,80 @@ US_ORIGIN_ALLOWLIST = {
 
 class GenerateRequest(BaseModel):
     trip_search_id: str
+    # Return the k best options, live-quoting only candidates that can still make
+    # them (score-bound pruning over up to PRUNE_CANDIDATE_POOL candidates).
+    # Unset: the first 8 candidates, all quoted.
+    top_k: Optional[int] = Field(None, ge=1)
 
 
-@router.post('/generate', response_model=RecommendationBundle)
-def generate_recommendations(req: GenerateRequest):
-    trip_searches = load_trip_searches()
-    trip = trip_searches.get(req.trip_search_id)
-    if not trip:
-        raise HTTPException(404, "TripSearch not found")
-
-    payload = trip["payload"]
-
-    origins = [str(x).upper() for x in payload.get("origins", [])]
-    if not origins or any(o not in US_ORIGIN_ALLOWLIST for o in origins):
-        raise HTTPException(422, "MVP currently supports US departure airports only")
-
-    cache_key = str({
-        "trip_search_id": req.trip_search_id,
-        "origins": payload.get("origins"),
-        "start": payload.get("date_window_start"),
-        "end": payload.get("date_window_end"),
-        "nights": payload.get("duration_nights"),
-        "travelers": payload.get("travelers"),
-        "preferred": payload.get("preferred_destinations"),
-        "constraints": payload.get("constraints"),
-    })
-    now_ts = time.time()
-    cached = _RECO_CACHE.get(cache_key)
-    if cached and (now_ts - cached[0] <= _CACHE_TTL_SECONDS):
-        cached_bundle = dict(cached[1])
-        cached_bundle["winner_tiles"] = dict(cached_bundle.get("winner_tiles", {}))
-        cached_bundle["winner_tiles"]["_meta_cache"] = "HIT"
-        return RecommendationBundle.model_validate(cached_bundle)
-
-    candidates = generate_destination_candidates(payload)
-    if not candidates:
-        raise HTTPException(422, "No destinations meet constraints")
+class RerankRequest(BaseModel):
+    trip_search_id: str
+    balances: Optional[List[PointsBalance]] = None   # default: the trip search's balances
+    weights: Optional[ScoreWeights] = None           # default: scoring.WEIGHTS
 
-    balances = {b.get("program"): int(b.get("balance", 0)) for b in payload.get("balances", [])}
-    has_points = any(v > 0 for v in balances.values())
-    search_mode = "points" if has_points else "cash"
 
-    travelers = int(payload.get("travelers", 2))
+def _flexible_depart_dates(first: str, last: str, default: str) -> list[str]:
+    """Every valid departure date from *first* to *last*, always including *default*."""
+    try:
+        start, end = date.fromisoformat(first), date.fromisoformat(last)
+    except ValueError:
+        return [default]
+    span = (end - start).days
+    if span < 0:
+        return [default]
+    step = max(1, -(-(span + 1) // max(_FLEXIBLE_DATES_MAX_DAYS, 1)))
+    dates = [(start + timedelta(days=d)).isoformat() for d in range(0, span + 1, step)]
+    if default not in dates:
+        dates = sorted(dates + [default])
+    return dates
+
+
+def _price_calendars(
+    routes: list[tuple[str, str]],
+    quotes: dict,
+    depart_dates: list[str],
+    nights: int,
+    default_depart: str,
+) -> tuple[dict[tuple[str, str], dict[str, dict]], dict[tuple[str, str], list[PriceCalendarEntry]], dict[tuple[str, str], str]]:
+    """
+    Pop the per-date airfare quotes out of *quotes* and return, per
+    (destination, origin) route: the quotes by departure date, a price calendar,
+    and the cheapest all-cash date (ties go to the default midpoint date, then
+    the earliest). Dates whose quote missed the deadline are left out of the
+    calendar.
+    """
+    rows = []  # (route, depart_date, airfare quote, hotel cash total)
+    for destination, origin in routes:
+        hotel_cash = float(quotes[(destination, "hotel")]["cash_rate_all_in"])
+        for d in depart_dates:
+            quote = quotes.pop((destination, "airfare", origin, d), None)
+            if quote is not None:
+                rows.append(((destination, origin), d, quote, hotel_cash))
+    totals = score_cash_batch(
+        [float(q["cash_price_total"]) for _, _, q, _ in rows], [h for *_, h in rows], 0.0,
+    )["oop_total"]
+
+    by_date: dict[tuple[str, str], dict[str, dict]] = {}
+    calendars: dict[tuple[str, str], list[PriceCalendarEntry]] = {}
+    best: dict[tuple[str, str], tuple[float, bool, str]] = {}
+    for (route, d, quote, _), total in zip(rows, totals):
+        by_date.setdefault(route, {})[d] = quote
+        calendars.setdefault(route, []).append(PriceCalendarEntry(
+            depart_date=d,
+            return_date=(date.fromisoformat(d) + timedelta(days=nights)).isoformat(),
+            cash_flight_total=float(quote["cash_price_total"]),
+            cash_trip_total=total,
+            source=str(quote.get("source", "unknown")),
+        ))
+        rank = (total, d != default_depart, d)
+        if route not in best or rank < best[route]:
+            best[route] = rank
+    return by_date, calendars, {route: rank[2] for route, rank in best.items()}
+
+
+def _search_window(payload: dict[str, Any]) -> dict[str, Any]:
+    """Party, cabin and dates of a trip search (shared by generate and re-rank)."""
     nights = int(payload.get("duration_nights", 5))
-    cabin = str(payload.get("cabin_preference", "economy"))
-    origin = origins[0]
     depart_date = str(payload.get("date_window_start"))
     return_date = str(payload.get("date_window_end"))
 
@@ -93,49 +150,456 @@ def generate_recommendations(req: GenerateRequest):
         default_depart = depart_date
         default_return = return_date
 
+    flexible = bool(payload.get("flexible_dates"))
+    return {
+        "travelers": int(payload.get("travelers", 2)),
+        "nights": nights,
+        "cabin": str(payload.get("cabin_preference", "economy")),
+        "depart_date": depart_date,
+        "return_date": return_date,
+        "window_end_depart": window_end_depart,
+        "default_depart": default_depart,
+        "default_return": default_return,
+        "flexible": flexible,
+        "depart_dates": (
+            _flexible_depart_dates(depart_date, window_end_depart, default_depart) if flexible else []
+        ),
+    }
+
+
+def _award_kwargs(window: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "cabin": window["cabin"], "depart_date": window["depart_date"], "return_date": window["return_date"],
+        "window_end": window["window_end_depart"], "duration_nights": window["nights"],
+    }
+
+
+def _prune_candidates(
+    candidates: list[dict],
+    origins: list[str],
+    window: dict[str, Any],
+    balances: dict[str, int],
+    top_k: int,
+    weights: dict[str, float] | None = None,
+    known_quotes: dict[tuple[str, ...], dict] | None = None,
+) -> tuple[list[dict], list[dict]]:
+    """
+    (kept, pruned): branch-and-bound over score intervals (services/pruning.py)
+    built from quotes known without an upstream call (*known_quotes*, e.g. a
+    stored quote set, then the provider caches), else the routes' estimates.
+    """
+    known = known_quotes or {}
+
+    def known_or_peek(key: tuple[str, ...], peek: Callable[[], dict | None]) -> dict | None:
+        return known[key] if key in known else peek()
+
+    travelers, nights = window["travelers"], window["nights"]
     award_provider = AwardProvider()
     airfare_provider = AirfareProvider()
     hotel_provider = HotelProvider()
+    has_points = any(v > 0 for v in balances.values())
+    search_mode = "points" if has_points else "cash"
+    capacity = funding_capacity(balances)
+    if window["flexible"]:
+        dates = [
+            (d, (date.fromisoformat(d) + timedelta(days=nights)).isoformat()) for d in window["depart_dates"]
+        ]
+    else:
+        dates = [(window["default_depart"], window["default_return"])]
+
+    bounds = []
+    for c in candidates:
+        destination = c["code"]
+        fc = scoring.friction_components(c["stops"], c["travel_hours"])
+        friction = fc["stops_penalty"] + fc["travel_time_penalty"]
+        hotel = pruning.quote_intervals(
+            known_or_peek((destination, "hotel"), partial(hotel_provider.peek, destination, nights, travelers)),
+            hotel_provider.estimate(destination, nights, travelers),
+            pruning.HOTEL_FIELDS,
+        )
+        route_bounds = []
+        for origin in origins:
+            fares = [
+                known_or_peek(
+                    (destination, "airfare", origin, d) if window["flexible"] else (destination, "airfare", origin),
+                    partial(airfare_provider.peek, origin, destination, travelers, d, r),
+                )
+                for d, r in dates
+            ]
+            airline = None
+            if all(f is not None for f in fares):
+                prices = [float(f["cash_price_total"]) for f in fares]
+                airfare = {"cash_price_total": (min(prices), max(prices))}
+                airlines = {str(f.get("airline", "")) for f in fares}
+                airline = airlines.pop() if len(airlines) == 1 else None
+            else:
+                airfare = pruning.quote_intervals(
+                    None, airfare_provider.estimate(origin, destination, travelers, *dates[0]), pruning.AIRFARE_FIELDS,
+                )
+            award, award_live, award_program = None, None, None
+            if has_points:
+                award_args = (origin, destination, travelers)
+                quote = known_or_peek(
+                    (destination, "award", origin), partial(award_provider.peek, *award_args, **_award_kwargs(window)),
+                )
+                award = pruning.quote_intervals(
+                    quote, award_provider.estimate(*award_args, **_award_kwargs(window)), pruning.AWARD_FIELDS,
+                )
+                if quote is not None:
+                    award_live = quote.get("source") == "seats_aero_live"
+                    award_program = quote.get("program")
+                else:
+                    airline = None  # the award's program decides who can book it
+            route_bounds.append(pruning.route_score_bounds(
+                search_mode, airfare, hotel, award, award_live, friction,
+                balances=balances, capacity=capacity, airline=airline, award_program=award_program,
+                weights=weights,
+            ))
+        # A destination scores as its best origin.
+        bounds.append((max(b[0] for b in route_bounds), max(b[1] for b in route_bounds)))
+
+    kept = set(pruning.survivors(bounds, top_k))
+    return (
+        [c for i, c in enumerate(candidates) if i in kept],
+        [c for i, c in enumerate(candidates) if i not in kept],
+    )
+
+
+def _fetch_quotes(
+    window: dict[str, Any],
+    origins: list[str],
+    top_candidates: list[dict],
+    with_awards: bool,
+    started: float,
+) -> dict[str, Any]:
+    """
+    Fan out every candidate × origin × provider call at once, then join.
+
+    Cold-search latency is bounded by the slowest single call instead of their
+    sum, and never exceeds the request deadline: calls still running at the
+    deadline are replaced by the per-route estimator and the option is marked
+    degraded. Airfare and award quotes depend on the origin; the hotel quote
+    does not, so it is fetched once per destination and shared by all origins.
+
+    Returns the quote set: quotes by key, degraded sources per route and, with
+    flexible_dates, each route's quotes by date, price calendar and best date.
+    """
+    travelers, nights = window["travelers"], window["nights"]
+    default_depart, default_return = window["default_depart"], window["default_return"]
+    flexible, depart_dates = window["flexible"], window["depart_dates"]
 
-    rec_store = load_recommendations()
-    options = []
-    now = datetime.now(timezone.utc).isoformat()
+    award_provider = AwardProvider()
+    airfare_provider = AirfareProvider()
+    hotel_provider = HotelProvider()
 
-    for i, c in enumerate(candidates[:8], start=1):
+    routes = [(c["code"], origin) for c in top_candidates for origin in origins]
+    pending: dict[tuple[str, ...], Future] = {}
+    fallbacks: dict[tuple[str, ...], partial] = {}
+    for c in top_candidates:
         destination = c["code"]
-        airfare = airfare_provider.search(origin, destination, travelers, depart_date=default_depart, return_date=default_return)
-        hotel = hotel_provider.search(destination, nights, travelers)
+        hotel_args = (destination, nights, travelers)
+        pending[(destination, "hotel")] = FANOUT.submit("hotel", hotel_provider.search, *hotel_args)
+        fallbacks[(destination, "hotel")] = partial(hotel_provider.estimate, *hotel_args)
+
+    for destination, origin in routes:
+        airfare_args = (origin, destination, travelers)
+        airfare_kwargs = {"depart_date": default_depart, "return_date": default_return}
+        airfare_key = (destination, "airfare", origin)
+        fallbacks[airfare_key] = partial(airfare_provider.estimate, *airfare_args, **airfare_kwargs)
+        if flexible:
+            # One quote per departure date; each is its own provider cache entry,
+            # so dates already priced (by any search) are served from cache.
+            for d in depart_dates:
+                ret = (date.fromisoformat(d) + timedelta(days=nights)).isoformat()
+                pending[(*airfare_key, d)] = FANOUT.submit(
+                    "airfare", airfare_provider.search, *airfare_args, depart_date=d, return_date=ret,
+                )
+        else:
+            pending[airfare_key] = FANOUT.submit("airfare", airfare_provider.search, *airfare_args, **airfare_kwargs)
+
+        if with_awards:
+            award_args = (origin, destination, travelers)
+            award_kwargs = _award_kwargs(window)
+            award_key = (destination, "award", origin)
+            pending[award_key] = FANOUT.submit("award", award_provider.search, *award_args, **award_kwargs)
+            fallbacks[award_key] = partial(award_provider.estimate, *award_args, **award_kwargs)
+
+    remaining = None
+    if _DEADLINE_SECONDS > 0:
+        remaining = max(0.0, _DEADLINE_SECONDS - (time.monotonic() - started))
+    quotes, missed = FANOUT.join(pending, timeout=remaining)
+    # Degraded sources per route; a late hotel quote degrades every origin.
+    degraded: dict[tuple[str, str], list[str]] = {}
+    for key in sorted(missed):
+        if key in fallbacks:  # per-date flexible quotes have none: the date is just skipped
+            quotes[key] = fallbacks[key]()
+            for origin in (key[2:] or origins):
+                degraded.setdefault((key[0], origin), []).append(key[1])
+
+    by_date: dict[tuple[str, str], dict[str, dict]] = {}
+    calendars: dict[tuple[str, str], list[PriceCalendarEntry]] = {}
+    best_depart: dict[tuple[str, str], str] = {}
+    if flexible:
+        by_date, calendars, best_depart = _price_calendars(
+            routes, quotes, depart_dates, nights, default_depart,
+        )
+        for route in routes:
+            if not by_date.get(route):
+                destination, origin = route
+                quotes[(destination, "airfare", origin)] = fallbacks[(destination, "airfare", origin)]()
+                degraded.setdefault(route, []).append("airfare")
+
+    return {
+        "quotes": quotes,
+        "degraded": degraded,
+        "by_date": by_date,
+        "calendars": calendars,
+        "best_depart": best_depart,
+    }
+
 
-        cash_flight = float(airfare["cash_price_total"])
-        cash_price_pp = float(airfare.get("cash_price_pp", cash_flight / max(travelers, 1)))
+# ── Stored quote sets (re-rank) ───────────────────────────────────────────────
+# Tuple keys are joined with "|" so a quote set can go through the cache's
+# JSON encoding (and its SQLite backend, shared by all workers).
+
+def _pack_quote_set(origins: list[str], top_candidates: list[dict], quote_set: dict[str, Any]) -> dict[str, Any]:
+    def join(mapping: dict) -> dict[str, Any]:
+        return {"|".join(k): v for k, v in mapping.items()}
+
+    return {
+        "origins": origins,
+        "candidates": top_candidates,
+        "top_k": quote_set.get("top_k"),
+        "pool": quote_set.get("pool", []),
+        "pruned": quote_set.get("pruned", []),
+        "quotes": join(quote_set["quotes"]),
+        "degraded": join(quote_set["degraded"]),
+        "by_date": join(quote_set["by_date"]),
+        "calendars": {
+            "|".join(k): [e.model_dump() for e in entries] for k, entries in quote_set["calendars"].items()
+        },
+        "best_depart": join(quote_set["best_depart"]),
+    }
+
+
+def _unpack_quote_set(data: dict[str, Any]) -> tuple[list[str], list[dict], dict[str, Any]]:
+    def split(mapping: dict[str, Any]) -> dict[tuple[str, ...], Any]:
+        return {tuple(k.split("|")): v for k, v in mapping.items()}
+
+    quote_set = {
+        "quotes": split(data["quotes"]),
+        "degraded": split(data["degraded"]),
+        "by_date": split(data["by_date"]),
+        "calendars": {
+            k: [PriceCalendarEntry(**e) for e in entries] for k, entries in split(data["calendars"]).items()
+        },
+        "best_depart": split(data["best_depart"]),
+        "top_k": data.get("top_k"),
+        "pool": data.get("pool", []),
+        "pruned": data.get("pruned", []),
+    }
+    return data["origins"], data["candidates"], quote_set
+
+
+def _reprune(
+    trip_search_id: str,
+    window: dict[str, Any],
+    origins: list[str],
+    quoted: list[dict],
+    quote_set: dict[str, Any],
+    balances: dict[str, int],
+    weights: dict[str, float],
+    started: float,
+) -> tuple[list[dict], dict[str, Any]]:
+    """
+    (top candidates, quote set) of a pruned quote set for new balances and
+    weights: the stored pool is pruned again, bounded by the stored quotes, and
+    survivors that were pruned at generate time are quoted and stored too.
+    """
+    kept, dropped = _prune_candidates(
+        quote_set["pool"], origins, window, balances, quote_set["top_k"],
+        weights=weights, known_quotes=quote_set["quotes"],
+    )
+    quoted_codes = {c["code"] for c in quoted}
+    missing = [c for c in kept if c["code"] not in quoted_codes]
+    pruned = [c["code"] for c in dropped]
+    if missing:
+        fetched = _fetch_quotes(
+            window, origins, missing, with_awards=any(v > 0 for v in balances.values()), started=started,
+        )
+        for part in ("quotes", "degraded", "by_date", "calendars", "best_depart"):
+            quote_set[part] = {**quote_set[part], **fetched[part]}
+        quoted_codes.update(c["code"] for c in missing)
+        _QUOTE_SETS.set(trip_search_id, _pack_quote_set(
+            origins, [c for c in quote_set["pool"] if c["code"] in quoted_codes], quote_set,
+        ))
+    return kept, {**quote_set, "pruned": pruned}
+
+
+def _rank(
+    trip_search_id: str,
+    window: dict[str, Any],
+    origins: list[str],
+    top_candidates: list[dict],
+    quote_set: dict[str, Any],
+    balances: dict[str, int],
+    weights: dict[str, float],
+    option_prefix: str,
+    record_extra: dict[str, Any] | None = None,
+    meta_cache: str = "MISS",
+) -> RecommendationBundle:
+    """
+    Everything after the provider calls: date choice, strategy, CPP, balance
+    allocation, transfer paths and score, for one set of balances and score
+    weights. Pure CPU plus the option upserts — no provider traffic.
+    """
+    travelers, nights, cabin = window["travelers"], window["nights"], window["cabin"]
+    default_depart, default_return = window["default_depart"], window["default_return"]
+    flexible = window["flexible"]
+
+    has_points = any(v > 0 for v in balances.values())
+    search_mode = "points" if has_points else "cash"
+
+    routes = [(c["code"], origin) for c in top_candidates for origin in origins]
+    quotes = dict(quote_set["quotes"])
+    degraded = {route: list(sources) for route, sources in quote_set["degraded"].items()}
+    by_date, calendars, best_depart = quote_set["by_date"], quote_set["calendars"], quote_set["best_depart"]
+
+    if search_mode == "points" and any((dest, "award", origin) not in quotes for dest, origin in routes):
+        # Quotes fetched for a cash search: price awards with the local
+        # estimator rather than calling the award provider.
+        award_provider = AwardProvider()
+        for destination, origin in routes:
+            if (destination, "award", origin) not in quotes:
+                quotes[(destination, "award", origin)] = award_provider.estimate(
+                    origin, destination, travelers, **_award_kwargs(window),
+                )
+                degraded.setdefault((destination, origin), []).append("award")
+
+    chosen_depart: dict[tuple[str, str], str] = {}
+    for route, priced in by_date.items():
+        if not priced:
+            continue
+        destination, origin = route
+        # Points mode compares a live award against cash on the award's own
+        # date; an estimated award can't be booked, so cash takes its best date.
+        award = quotes.get((destination, "award", origin), {})
+        award_date = award.get("depart_date") if award.get("source") == "seats_aero_live" else None
+        d = award_date if award_date in priced else best_depart[route]
+        quotes[(destination, "airfare", origin)] = priced[d]
+        chosen_depart[route] = d
+
+    rec_store: dict[str, Any] = {}
+    options = []
+    now = datetime.now(timezone.utc).isoformat()
+
+    # Score every route (candidate × origin) in one batch pass (same numbers as
+    # the scalar path), then keep each candidate's best-scoring origin.
+    frictions = []
+    for c in top_candidates:
+        fc = scoring.friction_components(c["stops"], c["travel_hours"])
+        frictions.extend([fc["stops_penalty"] + fc["travel_time_penalty"]] * len(origins))
+    airfares = [quotes[(dest, "airfare", origin)] for dest, origin in routes]
+    hotels = [quotes[(dest, "hotel")] for dest, _ in routes]
+    cash_flights = [float(a["cash_price_total"]) for a in airfares]
+    hotel_cash_totals = [float(h["cash_rate_all_in"]) for h in hotels]
+    if search_mode == "cash":
+        scored = score_cash_batch(cash_flights, hotel_cash_totals, frictions, weights=weights)
+    else:
+        awards = [quotes[(dest, "award", origin)] for dest, origin in routes]
+        award_live = [a.get("source") == "seats_aero_live" for a in awards]
+        scored = score_points_batch(
+            cash_flights,
+            hotel_cash_totals,
+            [float(h["fees_on_points"]) for h in hotels],
+            [int(h["points_rate"]) for h in hotels],
+            [int(a["points_cost"]) for a in awards],
+            [float(a["taxes_fees"]) for a in awards],
+            award_live,
+            frictions,
+            award_source=[a.get("source", "award_estimator_mvp") for a in awards],
+            age_seconds=[time.time() - float(a.get("retrieved_at_ts", time.time())) for a in awards],
+            exact_flight_match=[bool(a.get("exact_flight_match", False)) for a in awards],
+            weights=weights,
+        )
+        # Fund the redemptions from the actual balances: the cheapest plan the
+        # wallet can cover (pooling currencies) replaces the CPP-rule strategy.
+        # Only a live award seat can be booked on points; estimates stay cash.
+        allocations = allocate_batch(
+            cash_flights,
+            hotel_cash_totals,
+            [float(a["taxes_fees"]) for a in awards],
+            [float(h["fees_on_points"]) for h in hotels],
+            [int(a["points_cost"]) for a in awards],
+            [int(h["points_rate"]) for h in hotels],
+            [str(a.get("airline", "")) for a in airfares],
+            [a.get("program") for a in awards],
+            [live and cpp > scoring.CPP_THRESHOLD for live, cpp in zip(award_live, scored["cpp_flight"])],
+            scored["hotel_cpp_ok"],
+            balances,
+        )
+        scored["use_points_for"] = [plan["use_points_for"] for plan in allocations]
+        scored["oop_total"] = [plan["oop_total"] for plan in allocations]
+        scored.update(score_allocated_batch(
+            scored["cpp_flight"], scored["cpp_hotel"], award_live,
+            scored["use_points_for"], scored["oop_total"], frictions, weights=weights,
+        ))
+    n_origins = len(origins)
+    winners = [
+        max(range(k * n_origins, (k + 1) * n_origins), key=lambda r: (scored["score"][r], -r))
+        for k in range(len(top_candidates))
+    ]
+
+    for k, c in enumerate(top_candidates):
+        i = k + 1
+        r = winners[k]
+        destination, origin = route = routes[r]
+        airfare = quotes[(destination, "airfare", origin)]
+        hotel = quotes[(destination, "hotel")]
+        degraded_sources = degraded.get(route, [])
+        origin_comparison = [
+            OriginQuote(
+                origin=routes[j][1],
+                oop_total=scored["oop_total"][j],
+                score_final=scored["score"][j],
+                degraded=routes[j] in degraded,
+            )
+            for j in range(k * n_origins, (k + 1) * n_origins)
+        ] if n_origins > 1 else []
+        # Stale-while-revalidate hits are served as-is and flagged here.
+        source_timestamps = {"airfare": airfare["as_of"], "hotel": hotel["as_of"]}
+        if airfare.get("stale"):
+            source_timestamps["airfare_stale"] = True
+
+        cash_price_pp = float(airfare.get("cash_price_pp", cash_flights[r] / max(travelers, 1)))
         airline = str(airfare.get("airline", ""))
         duration = str(airfare.get("duration", c.get("travel_hours", "")))
         city_name = str(airfare.get("city_name", destination))
         country = str(airfare.get("country", ""))
 
-        hotel_cash = float(hotel["cash_rate_all_in"])
-        hotel_fees_on_points = float(hotel["fees_on_points"])
         hotel_points_required = int(hotel["points_rate"])
 
         cash_flights_mode = "LIVE" if airfare.get("source") == "amadeus_test" else "ESTIMATED"
         cash_hotels_mode = "LIVE" if hotel.get("source") == "amadeus_test" else "ESTIMATED"
 
-        friction_components = {
-            "stops_penalty": c["stops"] * 2.0,
-            "travel_time_penalty": max(0.0, c["travel_hours"] - 7.0) * 0.5,
-        }
-        friction = friction_components["stops_penalty"] + friction_components["travel_time_penalty"]
+        friction_components = scoring.friction_components(c["stops"], c["travel_hours"])
+        friction = frictions[r]
 
-        option_id = f"{req.trip_search_id[:8]}-opt-{i}"
+        option_id = f"{option_prefix}-opt-{i}"
 
         if search_mode == "cash":
             # Cash mode: rank purely by total trip cost
-            oop_total = round(cash_flight + hotel_cash, 2)
-            score = blended_score(oop_total, 0.0, friction)
+            oop_total = scored["oop_total"][r]
+            score = scored["score"][r]
+            cash_depart = chosen_depart.get(route, default_depart)
+            cash_return = (
+                (date.fromisoformat(cash_depart) + timedelta(days=nights)).isoformat()
+                if route in chosen_depart else default_return
+            )
 
             rec_store[option_id] = {
                 "option_id": option_id,
-                "trip_search_id": req.trip_search_id,
+                "trip_search_id": trip_search_id,
                 "destination": destination,
                 "origin": origin,
                 "city_name": city_name,
@@ -152,6 +616,8 @@ def generate_recommendations(req: GenerateRequest):
                 "cash_hotels_mode": cash_hotels_mode,
                 "award_mode": "N/A",
                 "as_of": now,
+                **(record_extra or {}),
+                **({"depart_date": cash_depart, "return_date": cash_return} if flexible else {}),
             }
 
             options.append(
@@ -173,25 +639,30 @@ def generate_recommendations(req: GenerateRequest):
                     country=country,
                     airline=airline,
                     duration=duration,
-                    depart_date=default_depart,
-                    return_date=default_return,
+                    depart_date=cash_depart,
+                    return_date=cash_return,
                     cash_price_pp=cash_price_pp,
                     friction_components=friction_components,
                     points_strategy="none",
                     cash_flights_mode=cash_flights_mode,
                     cash_hotels_mode=cash_hotels_mode,
                     award_mode="N/A",
+                    source_timestamps=source_timestamps,
                     api_mode="live" if cash_flights_mode == "LIVE" else "fallback",
+                    degraded=bool(degraded_sources),
+                    degraded_sources=degraded_sources,
+                    price_calendar=calendars.get(route, []),
+                    best_depart_date=best_depart.get(route),
+                    origin_comparison=origin_comparison,
                 )
             )
 
         else:
             # Points mode: optimize award redemption vs cash
-            award = award_provider.search(origin, destination, travelers, cabin=cabin,
-                                          depart_date=depart_date, return_date=return_date,
-                                          window_end=window_end_depart, duration_nights=nights)
-            # Use the award-optimized departure date (cheapest in window)
-            opt_depart = award.get("depart_date") or default_depart
+            award = quotes[(destination, "award", origin)]
+            # The date the option was priced on (flexible mode), else the
+            # award-optimized departure date (cheapest in window)
+            opt_depart = chosen_depart.get(route) or award.get("depart_date") or default_depart
             try:
                 opt_return = (date.fromisoformat(opt_depart) + timedelta(days=nights)).isoformat()
             except Exception:
@@ -199,52 +670,27 @@ def generate_recommendations(req: GenerateRequest):
             flight_points_required = int(award["points_cost"])
             taxes_fees = float(award["taxes_fees"])
             award_mode = "LIVE" if award.get("source") == "seats_aero_live" else "ESTIMATED"
-            award_live = award_mode == "LIVE"
-
-            cpp_flight = ((cash_flight - taxes_fees) / max(flight_points_required, 1)) * 100.0
-            cpp_hotel = ((hotel_cash - hotel_fees_on_points) / max(hotel_points_required, 1)) * 100.0
-
-            cpp_threshold = 1.0
-            flight_cpp_ok = cpp_flight > cpp_threshold
-            hotel_cpp_ok = cpp_hotel > cpp_threshold
-
-            # P0 rule: prefer flight redemption when live award exists + good CPP
-            if award_live and flight_cpp_ok:
-                use_points_for = "flight"
-            elif hotel_cpp_ok and ((not award_live) or (not flight_cpp_ok)):
-                use_points_for = "hotel"
-            elif flight_cpp_ok:
-                use_points_for = "flight"
-            else:
-                use_points_for = "none"
 
-            points_strategy_alternates = []
-            if award_live and flight_cpp_ok and hotel_cpp_ok:
-                points_strategy_alternates = ["flight", "hotel"]
+            cpp_flight = scored["cpp_flight"][r]
+            cpp_hotel = scored["cpp_hotel"][r]
+            cpp_threshold = scoring.CPP_THRESHOLD
+            use_points_for = scored["use_points_for"][r]
+            points_strategy_alternates = allocations[r]["alternates"]
+            oop_total = scored["oop_total"][r]
 
-            if use_points_for == "flight":
-                oop_total = round(taxes_fees + hotel_cash, 2)
-            elif use_points_for == "hotel":
-                oop_total = round(cash_flight + hotel_fees_on_points, 2)
-            else:
-                oop_total = round(cash_flight + hotel_cash, 2)
-
-            hotel_mode = "points" if use_points_for == "hotel" else "cash"
-            marriott_cpp_eligible = hotel_cpp_ok
+            hotel_mode = "points" if use_points_for in ("hotel", "both") else "cash"
+            marriott_cpp_eligible = scored["hotel_cpp_ok"][r]
 
-            cpp_blended = min(round((cpp_flight + max(cpp_hotel, 0.0)) / 2.0, 2), 5.0)
-            if award_live:
-                cpp_blended = min(5.0, round(cpp_blended + 0.15, 2))
-
-            score = blended_score(oop_total, cpp_blended, friction)
-            score_components = {
-                "oop_term": round(-oop_total / 5000.0, 4),
-                "cpp_term": round(min(cpp_blended, 5.0) / 5.0, 4),
-                "friction_term": round(-friction / 10.0, 4),
-                "weights": {"w1": 0.5, "w2": 0.35, "w3": 0.15},
-            }
+            cpp_blended = scored["cpp_blended"][r]
+            score = scored["score"][r]
+            score_components = scoring.score_components(oop_total, cpp_blended, friction, weights)
 
-            suggested_flight_program = "MR" if balances.get("MR", 0) >= balances.get("CAP1", 0) else "CAP1"
+            points_allocation = [PointsTransfer(**t) for t in allocations[r]["transfers"]]
+            flight_transfers = [t for t in points_allocation if t.purpose == "flight"]
+            if flight_transfers:
+                suggested_flight_program = max(flight_transfers, key=lambda t: t.points).currency
+            else:
+                suggested_flight_program = "MR" if balances.get("MR", 0) >= balances.get("CAP1", 0) else "CAP1"
 
             validation_steps = [
                 f"Open the award source/site for {award.get('program', 'program search')}.",
@@ -266,21 +712,14 @@ def generate_recommendations(req: GenerateRequest):
 
             # ── PRD v1: CPP range + Valuation + Confidence ───────────────────────
             award_source = award.get("source", "award_estimator_mvp")
-            age_seconds = time.time() - float(award.get("retrieved_at_ts", time.time()))
-            exact_match = bool(award.get("exact_flight_match", False))
-
-            cpp_range = compute_cpp_range(
-                cash_price=cash_flight,
-                points_cost=flight_points_required,
-                taxes_fees=taxes_fees,
-                source=award_source,
-            )
-            conf_score, conf_tier = compute_confidence(
-                last_seen_seconds_ago=age_seconds,
-                exact_flight_match=exact_match,
-                tax_confidence=cpp_range.tax_confidence,
-                award_source=award_source,
+            cpp_range = CPPRange(
+                cpp_mid=scored["cpp_mid"][r],
+                cpp_low=scored["cpp_low"][r],
+                cpp_high=scored["cpp_high"][r],
+                tax_confidence=scored["tax_confidence"][r],
             )
+            conf_score = scored["confidence_score"][r]
+            conf_tier = scored["confidence_tier"][r]
             valuation_obj = build_valuation(cpp_range, conf_score, conf_tier)
 
             # ── PRD v1: Transfer paths ────────────────────────────────────────
@@ -295,7 +734,7 @@ def generate_recommendations(req: GenerateRequest):
 
             rec_store[option_id] = {
                 "option_id": option_id,
-                "trip_search_id": req.trip_search_id,
+                "trip_search_id": trip_search_id,
                 "destination": destination,
                 "origin": origin,
                 "city_name": city_name,
@@ -315,6 +754,7 @@ def generate_recommendations(req: GenerateRequest):
                 "suggested_flight_program": suggested_flight_program,
                 "marriott_cpp_eligible": marriott_cpp_eligible,
                 "hotel_booking_mode": hotel_mode,
+                "points_allocation": [t.model_dump() for t in points_allocation],
                 "points_strategy": use_points_for,
                 "points_strategy_alternates": points_strategy_alternates,
                 "cpp_threshold": cpp_threshold,
@@ -324,6 +764,8 @@ def generate_recommendations(req: GenerateRequest):
                 "award_details": award_details,
                 "validation_steps": validation_steps,
                 "as_of": now,
+                **(record_extra or {}),
+                **({"depart_date": opt_depart, "return_date": opt_return} if flexible else {}),
             }
 
             options.append(
@@ -376,8 +818,8 @@ def generate_recommendations(req: GenerateRequest):
                     validation_steps=validation_steps,
                     source_timestamps={
                         "award": award["as_of"],
-                        "airfare": airfare["as_of"],
-                        "hotel": hotel["as_of"],
+                        **({"award_stale": True} if award.get("stale") else {}),
+                        **source_timestamps,
                     },
                     source_labels={
                         "award": award.get("source", "unknown"),
@@ -393,13 +835,22 @@ def generate_recommendations(req: GenerateRequest):
                     cpp_range=cpp_range,
                     valuation=valuation_obj,
                     transfer_paths=transfer_path_models,
+                    points_allocation=points_allocation,
                     no_award_seats=no_award_seats,
+                    degraded=bool(degraded_sources),
+                    degraded_sources=degraded_sources,
+                    price_calendar=calendars.get(route, []),
+                    best_depart_date=best_depart.get(route),
+                    origin_comparison=origin_comparison,
                 )
             )
 
-    save_recommendations(rec_store)
+    store.recommendations.upsert_many(rec_store)
 
     options_sorted = sorted(options, key=lambda x: x.score_final, reverse=True)
+    if quote_set.get("top_k"):
+        options_sorted = options_sorted[:quote_set["top_k"]]
+        options = options_sorted
     best_oop = min(options, key=lambda x: x.oop_total).id
     best_cpp = max(options, key=lambda x: x.cpp_blended_capped).id
     winner_tiles = {
@@ -407,8 +858,124 @@ def generate_recommendations(req: GenerateRequest):
         "best_cpp": best_cpp,
         "best_business": best_cpp,
         "best_balanced": options_sorted[0].id,
-        "_meta_cache": "MISS",
+        "_meta_cache": meta_cache,
     }
-    bundle = RecommendationBundle(trip_search_id=req.trip_search_id, winner_tiles=winner_tiles, options=options_sorted)
-    _RECO_CACHE[cache_key] = (time.time(), bundle.model_dump(mode="json"))
+    return RecommendationBundle(
+        trip_search_id=trip_search_id,
+        winner_tiles=winner_tiles,
+        options=options_sorted,
+        degraded_options=[o.id for o in options_sorted if o.degraded],
+        pruned_destinations=quote_set.get("pruned", []),
+    )
+
+
+def _payload_balances(balances: list[Any]) -> dict[str, int]:
+    return {b.get("program"): int(b.get("balance", 0)) for b in balances}
+
+
+@router.post('/generate', response_model=RecommendationBundle)
+def generate_recommendations(req: GenerateRequest):
+    started = time.monotonic()
+    trip = store.trip_searches.get(req.trip_search_id)
+    if not trip:
+        raise HTTPException(404, "TripSearch not found")
+
+    payload = trip["payload"]
+
+    origins = [str(x).upper() for x in payload.get("origins", [])]
+    if not origins or any(o not in US_ORIGIN_ALLOWLIST for o in origins):
+        raise HTTPException(422, "MVP currently supports US departure airports only")
+    origins = list(dict.fromkeys(origins))  # listed order breaks ties between origins
+
+    cache_key = str({
+        "trip_search_id": req.trip_search_id,
+        "origins": payload.get("origins"),
+        "start": payload.get("date_window_start"),
+        "end": payload.get("date_window_end"),
+        "nights": payload.get("duration_nights"),
+        "travelers": payload.get("travelers"),
+        "preferred": payload.get("preferred_destinations"),
+        "constraints": payload.get("constraints"),
+        "flexible_dates": bool(payload.get("flexible_dates")),
+        "top_k": req.top_k,
+    })
+    cached = _RECO_CACHE.get(cache_key)
+    if cached:
+        cached_bundle = dict(cached)
+        cached_bundle["winner_tiles"] = dict(cached_bundle.get("winner_tiles", {}))
+        cached_bundle["winner_tiles"]["_meta_cache"] = "HIT"
+        # Already validated and dumped when cached: skip re-validation/encoding.
+        return ORJSONResponse(cached_bundle)
+
+    candidates = generate_destination_candidates(
+        payload, limit=_PRUNE_CANDIDATE_POOL if req.top_k else MAX_CANDIDATES,
+    )
+    if not candidates:
+        raise HTTPException(422, "No destinations meet constraints")
+
+    balances = _payload_balances(payload.get("balances", []))
+    window = _search_window(payload)
+    pruned: list[str] = []
+    if req.top_k:
+        top_candidates, dropped = _prune_candidates(candidates, origins, window, balances, req.top_k)
+        pruned = [c["code"] for c in dropped]
+    else:
+        top_candidates = candidates[:8]
+    quote_set = _fetch_quotes(
+        window, origins, top_candidates, with_awards=any(v > 0 for v in balances.values()), started=started,
+    )
+    # The candidate pool is kept with a pruned set: other balances or weights
+    # can lift a pruned destination into the top k.
+    quote_set.update(top_k=req.top_k, pool=candidates if req.top_k else [], pruned=pruned)
+    # Kept for re-rank: what-if balances/weights reuse these quotes.
+    _QUOTE_SETS.set(req.trip_search_id, _pack_quote_set(origins, top_candidates, quote_set))
+
+    bundle = _rank(
+        req.trip_search_id, window, origins, top_candidates, quote_set, balances, dict(scoring.WEIGHTS),
+        option_prefix=req.trip_search_id[:8],
+    )
+    # Degraded bundles are not cached: the late provider calls are still
+    # filling the provider caches, so the next request can do better.
+    if not bundle.degraded_options:
+        _RECO_CACHE.set(cache_key, bundle.model_dump(mode="json"))
     return bundle
+
+
+@router.post('/rerank', response_model=RecommendationBundle)
+def rerank_recommendations(req: RerankRequest):
+    """
+    Re-score a generated search for different balances and/or score weights,
+    reusing its stored provider quotes. A pruned search (top_k) is pruned again
+    for the new inputs; destinations that only now make the cut are quoted
+    once and added to the stored set — otherwise no upstream calls.
+    """
+    started = time.monotonic()
+    trip = store.trip_searches.get(req.trip_search_id)
+    if not trip:
+        raise HTTPException(404, "TripSearch not found")
+    stored = _QUOTE_SETS.get(req.trip_search_id)
+    if not stored:
+        raise HTTPException(404, "No stored quotes for this trip search. Generate recommendations first.")
+
+    payload = trip["payload"]
+    origins, top_candidates, quote_set = _unpack_quote_set(stored)
+    if req.balances is not None:
+        balances = {b.program: b.balance for b in req.balances}
+    else:
+        balances = _payload_balances(payload.get("balances", []))
+    weights = req.weights.model_dump() if req.weights else dict(scoring.WEIGHTS)
+    window = _search_window(payload)
+    if quote_set["top_k"]:
+        top_candidates, quote_set = _reprune(
+            req.trip_search_id, window, origins, top_candidates, quote_set, balances, weights, started,
+        )
+
+    # Each what-if gets its own option ids (stable for the same inputs), so the
+    # generated options and their cached bundle stay valid for the playbook.
+    variant = hashlib.sha1(dumps_compact([sorted(balances.items()), sorted(weights.items())])).hexdigest()[:6]
+    return _rank(
+        req.trip_search_id, window, origins, top_candidates, quote_set, balances, weights,
+        option_prefix=f"{req.trip_search_id[:8]}-{variant}",
+        record_extra={"balances": balances},
+        meta_cache="RERANK",
+    )
@@ -0,0 +1,70 @@
+"""
+Serializers for stored records.
+
+STORE_SERIALIZER picks the on-disk record format:
+
+    compact (default) — minified JSON, via orjson when it is installed
+    pretty            — stdlib json with indent=2 and sorted keys; slow, but
+                        diff-friendly for debugging
+    msgpack           — binary records (needs `msgpack`); SQLite backend only,
+                        the JSON backend writes compact JSON instead
+
+Reads accept any of these formats, so the setting can change between runs
+without migrating existing data.
+"""
+from __future__ import annotations
+
+import json
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for STORE_SERIALIZER=msgpack
+    msgpack = None
+
+STORE_SERIALIZER = os.getenv("STORE_SERIALIZER", "compact").lower()
+
+
+def dumps_compact(obj: Any) -> bytes:
+    """Minified UTF-8 JSON; anything not natively encodable goes through str()."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+
+
+def dumps_pretty(obj: Any) -> str:
+    return json.dumps(obj, indent=2, sort_keys=True)
+
+
+def loads(data: str | bytes) -> Any:
+    """Decode a record written by any serializer (JSON text/bytes or msgpack)."""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data)
+        if data[:1] not in (b"{", b"[", b'"') and msgpack is not None:
+            return msgpack.unpackb(data, raw=False)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_record(obj: Any) -> str | bytes:
+    """Encode one record for a SQLite row in the configured format."""
+    if STORE_SERIALIZER == "pretty":
+        return dumps_pretty(obj)
+    if STORE_SERIALIZER == "msgpack" and msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True, default=str)
+    return dumps_compact(obj).decode()
+
+
+def dumps_document(obj: Any) -> str:
+    """Encode a whole-file JSON document (the JSON backend's files stay JSON)."""
+    if STORE_SERIALIZER == "pretty":
+        return dumps_pretty(obj)
+    return dumps_compact(obj).decode()
+
@@ -0,0 +1,310 @@
+"""
+Balance allocation — which of the traveler's points pay for what.
+
+For every option the optimizer tries the four redemptions (cash only, flight
+on points, hotel on points, both) and keeps the one with the lowest
+out-of-pocket cost that the balances can actually cover, ties going to the
+one that spends the least points value. Currencies are pooled: an award can
+be funded by transfers from several currencies into one program, and the
+hotel by Marriott points plus 1:1 transfers into Marriott Bonvoy.
+
+Funding one redemption is a fractional-knapsack LP (meet N miles at minimum
+points value), which a greedy fill by value per mile solves exactly; points
+move in whole transfer blocks, so the fill rounds up to a block per currency.
+For "both", the hotel draws on the currencies that are worth least as airline
+miles (Marriott converts at 3:1), so it is filled first and the flight gets
+the rest; the flight-first order is tried too and the cheaper plan kept.
+
+`allocate_batch` works column-wise like services/batch_scoring.py and plans
+each distinct points requirement once; cash prices only pick between the
+plans, so a whole bundle costs well under a millisecond per option.
+"""
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Any, Literal, Sequence
+
+from app.services.transfer_graph import GRAPH, find_routes
+
+Redemption = Literal["flight", "hotel", "both", "none"]
+
+HOTEL_PROGRAM = "Marriott Bonvoy"
+
+# Currencies that can pay for a Marriott stay, and at what ratio.
+_HOTEL_SOURCES: dict[str, float] = {
+    "MARRIOTT": 1.0,
+    "MR":       1.0,   # Amex → Bonvoy 1:1
+    "CHASE":    1.0,   # Chase → Bonvoy 1:1
+    "BILT":     1.0,   # Bilt → Bonvoy 1:1
+}
+
+# Rough per-point values (cents) — only used to decide which currency to spend first.
+POINT_VALUES_CPP: dict[str, float] = {
+    "MR":       2.0,
+    "CHASE":    2.0,
+    "BILT":     2.0,
+    "CAP1":     1.85,
+    "CITI":     1.8,
+    "WF":       1.5,
+    "MARRIOTT": 0.8,
+}
+_DEFAULT_POINT_VALUE = 1.0
+
+# Points move in whole blocks; Marriott → airline transfers go in 3,000s.
+_TRANSFER_BLOCK = 1000
+_MARRIOTT_AIRLINE_BLOCK = 3000
+
+# Generic program used when the airline is not in the transfer graph: the
+# award quote is then assumed bookable 1:1 from any card currency.
+_FALLBACK_PROGRAM = "airline partner"
+
+_Source = tuple[str, str, float, int]  # (currency, program, multiplier, transfer minutes)
+
+
+def _value(currency: str) -> float:
+    return POINT_VALUES_CPP.get(currency, _DEFAULT_POINT_VALUE)
+
+
+def _block(currency: str, purpose: str) -> int:
+    if currency == "MARRIOTT":
+        return 1 if purpose == "hotel" else _MARRIOTT_AIRLINE_BLOCK
+    return _TRANSFER_BLOCK
+
+
+def _fill(need: int, sources: list[_Source], remaining: dict[str, int], purpose: str) -> list[dict] | None:
+    """
+    Greedily cover *need* miles/points from *sources* (already sorted by value
+    per mile), drawing down *remaining*. None when the balances fall short.
+    """
+    transfers: list[dict] = []
+    for currency, program, multiplier, _ in sources:
+        if need <= 0:
+            break
+        block = _block(currency, purpose)
+        balance = remaining.get(currency, 0)
+        usable = balance - balance % block
+        if usable <= 0:
+            continue
+        points = min(usable, math.ceil(need / multiplier / block - 1e-9) * block)
+        miles = int(round(points * multiplier, 6))
+        remaining[currency] = balance - points
+        need -= miles
+        transfers.append({
+            "purpose": purpose,
+            "currency": currency,
+            "program": program,
+            "points": points,
+            "miles": miles,
+        })
+    return transfers if need <= 0 else None
+
+
+@lru_cache(maxsize=4096)
+def _flight_sources(airline: str, award_program: str | None, currencies: tuple[str, ...]) -> list[list[_Source]]:
+    """Candidate funding sources per program that can book *airline*, each sorted by value per mile."""
+    by_program: dict[str, list[_Source]] = {}
+    for route in find_routes(airline, list(currencies)):
+        edge = route.edge
+        by_program.setdefault(edge.program, []).append(
+            (edge.currency, edge.program, route.multiplier, route.transfer_time_minutes)
+        )
+    if award_program in by_program:
+        # The quote is for a specific program: only its price is known.
+        by_program = {award_program: by_program[award_program]}
+    if not by_program and GRAPH.resolve_airline(airline) is None:
+        by_program[_FALLBACK_PROGRAM] = [
+            (c, award_program or _FALLBACK_PROGRAM, 1.0, 0)
+            for c in currencies if c in GRAPH.by_currency and c != "MARRIOTT"
+        ]
+    return [
+        sorted(sources, key=lambda s: (_value(s[0]) / s[2], s[3], s[0]))
+        for sources in by_program.values()
+    ]
+
+
+def _hotel_sources(currencies: list[str]) -> list[_Source]:
+    sources = [(c, HOTEL_PROGRAM, _HOTEL_SOURCES[c], 0) for c in currencies if c in _HOTEL_SOURCES]
+    return sorted(sources, key=lambda s: (_value(s[0]) / s[2], s[0]))
+
+
+def _spent_value(transfers: list[dict]) -> float:
+    return sum(t["points"] * _value(t["currency"]) for t in transfers) / 100.0
+
+
+def _fund_flight(need: int, programs: list[list[_Source]], remaining: dict[str, int]) -> list[dict] | None:
+    """Cheapest program to fund *need* miles in; draws down *remaining* for the winner."""
+    best: tuple[float, list[dict], dict[str, int]] | None = None
+    for sources in programs:
+        trial = dict(remaining)
+        transfers = _fill(need, sources, trial, "flight")
+        if transfers is None:
+            continue
+        value = _spent_value(transfers)
+        if best is None or value < best[0]:
+            best = (value, transfers, trial)
+    if best is None:
+        return None
+    remaining.clear()
+    remaining.update(best[2])
+    return best[1]
+
+
+def _plan(
+    redemption: Redemption,
+    flight_points: int,
+    hotel_points: int,
+    programs: list[list[_Source]],
+    hotel_sources: list[_Source],
+    balances: dict[str, int],
+) -> list[dict] | None:
+    """Transfers funding *redemption*, or None when the balances can't cover it."""
+    if redemption == "none":
+        return []
+    if redemption == "flight":
+        return _fund_flight(flight_points, programs, dict(balances))
+    if redemption == "hotel":
+        return _fill(hotel_points, hotel_sources, dict(balances), "hotel")
+
+    plans = []
+    remaining = dict(balances)
+    hotel = _fill(hotel_points, hotel_sources, remaining, "hotel")
+    flight = _fund_flight(flight_points, programs, remaining) if hotel is not None else None
+    if flight is not None:
+        plans.append(flight + hotel)
+    remaining = dict(balances)
+    flight = _fund_flight(flight_points, programs, remaining)
+    hotel = _fill(hotel_points, hotel_sources, remaining, "hotel") if flight is not None else None
+    if hotel is not None:
+        plans.append(flight + hotel)
+    return min(plans, key=_spent_value) if plans else None
+
+
+def _funding_plans(
+    flight_points_required: int,
+    hotel_points_required: int,
+    airline: str,
+    award_program: str | None,
+    flight_allowed: bool,
+    hotel_allowed: bool,
+    balances: dict[str, int],
+) -> dict[Redemption, list[dict] | None]:
+    """Transfers for each allowed redemption (None = not fundable); independent of cash prices."""
+    currencies = tuple(c for c, b in balances.items() if b > 0)
+    programs = _flight_sources(airline, award_program, currencies) if flight_allowed else []
+    hotel_sources = _hotel_sources(currencies) if hotel_allowed else []
+    redemptions: list[Redemption] = ["none"]
+    if flight_allowed:
+        redemptions.append("flight")
+    if hotel_allowed:
+        redemptions.append("hotel")
+    if flight_allowed and hotel_allowed:
+        redemptions.append("both")
+    return {
+        r: _plan(r, flight_points_required, hotel_points_required, programs, hotel_sources, balances)
+        for r in redemptions
+    }
+
+
+def _choose(
+    plans: dict[Redemption, list[dict] | None],
+    cash_flight: float,
+    hotel_cash: float,
+    taxes_fees: float,
+    hotel_fees_on_points: float,
+) -> dict[str, Any]:
+    oop: dict[Redemption, float] = {
+        "none": cash_flight + hotel_cash,
+        "flight": taxes_fees + hotel_cash,
+        "hotel": cash_flight + hotel_fees_on_points,
+        "both": taxes_fees + hotel_fees_on_points,
+    }
+    best: tuple[float, float, Redemption, list[dict]] | None = None
+    for redemption, transfers in plans.items():
+        if transfers is None:
+            continue
+        key = (round(oop[redemption], 2), _spent_value(transfers))
+        if best is None or key < best[:2]:
+            best = (*key, redemption, transfers)
+    total, value, redemption, transfers = best  # "none" is always fundable
+    return {
+        "use_points_for": redemption,
+        "alternates": [r for r, t in plans.items() if t is not None and r not in ("none", redemption)],
+        "oop_total": total,
+        "transfers": transfers,
+        "points_value": round(value, 2),
+    }
+
+
+def funding_capacity(balances: dict[str, int]) -> tuple[float, float]:
+    """
+    Upper bounds on the award miles and hotel points *balances* could fund
+    (each currency at its best transfer ratio, no blocks); used for pruning.
+    """
+    miles = 0.0
+    for currency, balance in balances.items():
+        if balance <= 0 or currency not in GRAPH.by_currency:
+            continue
+        best = max((e.ratio * (1 + e.promo_bonus_percent / 100.0) for e in GRAPH.by_currency[currency]), default=0.0)
+        miles += balance * (best if currency == "MARRIOTT" else max(best, 1.0))  # 1.0: fallback program
+    hotel = sum(b * _HOTEL_SOURCES[c] for c, b in balances.items() if c in _HOTEL_SOURCES and b > 0)
+    return miles, hotel
+
+
+def allocate(
+    cash_flight: float,
+    hotel_cash: float,
+    taxes_fees: float,
+    hotel_fees_on_points: float,
+    flight_points_required: int,
+    hotel_points_required: int,
+    airline: str,
+    award_program: str | None,
+    flight_allowed: bool,
+    hotel_allowed: bool,
+    balances: dict[str, int],
+) -> dict[str, Any]:
+    """
+    Lowest out-of-pocket redemption for one option that *balances* can fund.
+
+    Returns {"use_points_for", "alternates", "oop_total", "transfers",
+    "points_value"}, alternates being the other point redemptions the balances
+    could fund; each transfer is {"purpose", "currency", "program", "points",
+    "miles"}.
+    """
+    plans = _funding_plans(
+        flight_points_required, hotel_points_required, airline, award_program,
+        flight_allowed, hotel_allowed, balances,
+    )
+    return _choose(plans, cash_flight, hotel_cash, taxes_fees, hotel_fees_on_points)
+
+
+def allocate_batch(
+    cash_flight: Sequence[float],
+    hotel_cash: Sequence[float],
+    taxes_fees: Sequence[float],
+    hotel_fees_on_points: Sequence[float],
+    flight_points_required: Sequence[int],
+    hotel_points_required: Sequence[int],
+    airline: Sequence[str],
+    award_program: Sequence[str | None],
+    flight_allowed: Sequence[bool],
+    hotel_allowed: Sequence[bool],
+    balances: dict[str, int],
+) -> list[dict[str, Any]]:
+    """
+    `allocate` for every option in a bundle. Funding plans depend only on the
+    points side of a row, so rows sharing it (the same award seen from several
+    origins or dates) are planned once.
+    """
+    plans_memo: dict[tuple, dict[Redemption, list[dict] | None]] = {}
+    out = []
+    for cf, hc, tf, hf, *points_side in zip(
+        cash_flight, hotel_cash, taxes_fees, hotel_fees_on_points, flight_points_required,
+        hotel_points_required, airline, award_program, flight_allowed, hotel_allowed,
+    ):
+        key = tuple(points_side)
+        if key not in plans_memo:
+            plans_memo[key] = _funding_plans(*points_side, balances=balances)
+        out.append(_choose(plans_memo[key], cf, hc, tf, hf))
+    return out
@@ -0,0 +1,291 @@
+"""
+Batch scoring engine — every option metric for many quotes in one pass.
+
+`score_points_batch` takes arrays of quotes with any (broadcastable) shape,
+e.g. candidates × dates × cabins, and returns each metric as a nested list of
+the same shape. The numbers are identical to the scalar reference path
+(services/scoring.py + services/valuation.py):
+
+- arithmetic is float64 in the same operation order as the scalar code;
+- min/max are written as the `b if b < a else a` selections Python uses, so
+  signed zeros and NaNs come out the same;
+- decimal rounding goes through Python's round() per element, because
+  numpy's round-half-even-after-scaling differs from it on some inputs.
+
+NumPy is optional: without it the engine loops the scalar functions, which
+gives the same results, just slower.
+"""
+from __future__ import annotations
+
+from functools import partial
+from typing import Any, Sequence
+
+from app.services.scoring import (
+    CPP_CAP,
+    CPP_THRESHOLD,
+    LIVE_AWARD_CPP_BONUS,
+    WEIGHTS,
+    score_allocated_option,
+    score_cash_option,
+    score_points_option,
+)
+from app.services.valuation import TAX_SPREAD, _infer_tax_confidence, compute_confidence
+
+try:
+    import numpy as np
+except ImportError:  # optional: scalar fallback below
+    np = None
+
+
+# ── NumPy helpers mirroring Python semantics ─────────────────────────────────
+
+def _pymax(a, b):
+    """Python max(a, b): b if b > a else a."""
+    return np.where(b > a, b, a)
+
+
+def _pymin(a, b):
+    """Python min(a, b): b if b < a else a."""
+    return np.where(b < a, b, a)
+
+
+def _pyround(values, ndigits: int):
+    """Python round() per element (exact parity with the scalar path)."""
+    flat = [round(v, ndigits) for v in values.ravel().tolist()]
+    return np.array(flat, dtype=np.float64).reshape(values.shape)
+
+
+def _blended_score(oop_total, cpp_blended, friction, weights):
+    oop_term = -oop_total / 5000.0
+    cpp_term = _pymax(0.0, _pymin(5.0, cpp_blended)) / 5.0
+    friction_term = -friction / 10.0
+    return weights["w1"] * oop_term + weights["w2"] * cpp_term + weights["w3"] * friction_term
+
+
+# ── Engine ────────────────────────────────────────────────────────────────────
+
+def score_cash_batch(cash_flight, hotel_cash, friction, weights: dict[str, float] | None = None) -> dict[str, list]:
+    """Cash-mode oop_total and score for every quote."""
+    weights = weights or WEIGHTS
+    if np is None:
+        return _loop(
+            partial(score_cash_option, weights=weights), ("oop_total", "score"), cash_flight, hotel_cash, friction,
+        )
+    cash_flight, hotel_cash, friction = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (cash_flight, hotel_cash, friction))
+    )
+    oop_total = _pyround(cash_flight + hotel_cash, 2)
+    score = _blended_score(oop_total, np.zeros_like(oop_total), friction, weights)
+    return {"oop_total": oop_total.tolist(), "score": score.tolist()}
+
+
+def score_points_batch(
+    cash_flight,
+    hotel_cash,
+    hotel_fees_on_points,
+    hotel_points_required,
+    flight_points_required,
+    taxes_fees,
+    award_live,
+    friction,
+    award_source=None,
+    age_seconds=None,
+    exact_flight_match=None,
+    cpp_threshold: float = CPP_THRESHOLD,
+    weights: dict[str, float] | None = None,
+) -> dict[str, list]:
+    """
+    Points-mode metrics for every quote: cpp_flight, cpp_hotel, hotel_cpp_ok,
+    use_points_for, has_alternates, oop_total, cpp_blended, score.
+
+    With `award_source`, also the CPP range (cpp_mid/low/high, tax_confidence);
+    with `age_seconds` and `exact_flight_match` as well, confidence_score and
+    confidence_tier. `weights` (default scoring.WEIGHTS) only affects score.
+    """
+    weights = weights or WEIGHTS
+    if np is None:
+        return _score_points_loop(
+            cash_flight, hotel_cash, hotel_fees_on_points, hotel_points_required,
+            flight_points_required, taxes_fees, award_live, friction,
+            award_source, age_seconds, exact_flight_match, cpp_threshold, weights,
+        )
+
+    floats = np.broadcast_arrays(*(
+        np.asarray(x, dtype=np.float64)
+        for x in (cash_flight, hotel_cash, hotel_fees_on_points, taxes_fees, friction)
+    ))
+    cash_flight, hotel_cash, hotel_fees_on_points, taxes_fees, friction = floats
+    shape = cash_flight.shape
+    hotel_pts = np.broadcast_to(np.asarray(hotel_points_required, dtype=np.int64), shape)
+    flight_pts = np.broadcast_to(np.asarray(flight_points_required, dtype=np.int64), shape)
+    live = np.broadcast_to(np.asarray(award_live, dtype=bool), shape)
+
+    cpp_flight = ((cash_flight - taxes_fees) / _pymax(flight_pts, 1)) * 100.0
+    cpp_hotel = ((hotel_cash - hotel_fees_on_points) / _pymax(hotel_pts, 1)) * 100.0
+    flight_ok = cpp_flight > cpp_threshold
+    hotel_ok = cpp_hotel > cpp_threshold
+
+    # Same precedence as scoring.choose_points_strategy
+    redeem_flight = (live & flight_ok) | (~(hotel_ok & (~live | ~flight_ok)) & flight_ok)
+    redeem_hotel = ~(live & flight_ok) & hotel_ok & (~live | ~flight_ok)
+    use_points_for = np.where(redeem_flight, "flight", np.where(redeem_hotel, "hotel", "none"))
+
+    oop_raw = np.where(
+        redeem_flight, taxes_fees + hotel_cash,
+        np.where(redeem_hotel, cash_flight + hotel_fees_on_points, cash_flight + hotel_cash),
+    )
+    oop_total = _pyround(oop_raw, 2)
+
+    cpp_blended = _pymin(_pyround((cpp_flight + _pymax(cpp_hotel, 0.0)) / 2.0, 2), CPP_CAP)
+    boosted = _pymin(CPP_CAP, _pyround(cpp_blended + LIVE_AWARD_CPP_BONUS, 2))
+    cpp_blended = np.where(live, boosted, cpp_blended)
+
+    out: dict[str, Any] = {
+        "cpp_flight": cpp_flight.tolist(),
+        "cpp_hotel": cpp_hotel.tolist(),
+        "hotel_cpp_ok": hotel_ok.tolist(),
+        "use_points_for": use_points_for.tolist(),
+        "has_alternates": (live & flight_ok & hotel_ok).tolist(),
+        "oop_total": oop_total.tolist(),
+        "cpp_blended": cpp_blended.tolist(),
+        "score": _blended_score(oop_total, cpp_blended, friction, weights).tolist(),
+    }
+    if award_source is None:
+        return out
+
+    source = np.broadcast_to(np.asarray(award_source, dtype=object), shape)
+    has_taxes = taxes_fees > 0
+    tax_conf = np.where(
+        (source == "seats_aero_live") & has_taxes, "HIGH",
+        np.where((source == "amadeus_test") & has_taxes, "MEDIUM", "LOW"),
+    )
+    spread = np.select(
+        [tax_conf == "HIGH", tax_conf == "MEDIUM"], [TAX_SPREAD["HIGH"], TAX_SPREAD["MEDIUM"]], TAX_SPREAD["LOW"],
+    )
+    pts = _pymax(flight_pts, 1)
+    cpp_mid = _pymax(0.0, (cash_flight - taxes_fees) / pts * 100)
+    cpp_low = _pymax(0.0, (cash_flight - taxes_fees * (1 + spread)) / pts * 100)
+    cpp_high = _pymax(0.0, (cash_flight - taxes_fees * (1 - spread)) / pts * 100)
+    out.update(
+        cpp_mid=_pyround(cpp_mid, 2).tolist(),
+        cpp_low=_pyround(cpp_low, 2).tolist(),
+        cpp_high=_pyround(cpp_high, 2).tolist(),
+        tax_confidence=tax_conf.tolist(),
+    )
+    if age_seconds is None or exact_flight_match is None:
+        return out
+
+    age = np.broadcast_to(np.asarray(age_seconds, dtype=np.float64), shape)
+    exact = np.broadcast_to(np.asarray(exact_flight_match, dtype=bool), shape)
+    conf = (
+        np.where(age < 7200, 30, 0)
+        + np.where(exact, 30, 0)
+        + np.select([tax_conf == "HIGH", tax_conf == "MEDIUM"], [20, 10], 0)
+        + np.where(source == "seats_aero_live", 20, 0)
+    )
+    conf = np.clip(conf, 0, 100)
+    out.update(
+        confidence_score=conf.tolist(),
+        confidence_tier=np.where(conf >= 80, "HIGH", np.where(conf >= 50, "MEDIUM", "LOW")).tolist(),
+    )
+    return out
+
+
+def score_allocated_batch(
+    cpp_flight,
+    cpp_hotel,
+    award_live,
+    use_points_for,
+    oop_total,
+    friction,
+    weights: dict[str, float] | None = None,
+) -> dict[str, list]:
+    """
+    cpp_blended and score for every option once the balance allocation has
+    picked its redemption (scoring.score_allocated_option per element).
+    """
+    weights = weights or WEIGHTS
+    if np is None:
+        return _loop(
+            partial(score_allocated_option, weights=weights), ("cpp_blended", "score"),
+            cpp_flight, cpp_hotel, award_live, use_points_for, oop_total, friction,
+        )
+    cpp_flight, cpp_hotel, oop_total, friction = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (cpp_flight, cpp_hotel, oop_total, friction))
+    )
+    shape = cpp_flight.shape
+    live = np.broadcast_to(np.asarray(award_live, dtype=bool), shape)
+    redeem = np.broadcast_to(np.asarray(use_points_for, dtype=object), shape)
+    hotel_side = _pymax(cpp_hotel, 0.0)
+    cpp_blended = np.select(
+        [redeem == "both", redeem == "flight", redeem == "hotel"],
+        [
+            _pymin(_pyround((cpp_flight + hotel_side) / 2.0, 2), CPP_CAP),
+            _pymin(_pyround(cpp_flight, 2), CPP_CAP),
+            _pymin(_pyround(hotel_side, 2), CPP_CAP),
+        ],
+        0.0,
+    )
+    boosted = _pymin(CPP_CAP, _pyround(cpp_blended + LIVE_AWARD_CPP_BONUS, 2))
+    cpp_blended = np.where(live & ((redeem == "flight") | (redeem == "both")), boosted, cpp_blended)
+    return {
+        "cpp_blended": cpp_blended.tolist(),
+        "score": _blended_score(oop_total, cpp_blended, friction, weights).tolist(),
+    }
+
+
+# ── Scalar fallback (no NumPy) ────────────────────────────────────────────────
+
+def _broadcast(*args) -> list[list]:
+    """1-D broadcast of scalars against equal-length sequences."""
+    lengths = {len(a) for a in args if isinstance(a, Sequence) and not isinstance(a, str)}
+    if len(lengths) > 1:
+        raise ValueError("batch inputs must have equal lengths without numpy")
+    n = lengths.pop() if lengths else 1
+    return [
+        list(a) if isinstance(a, Sequence) and not isinstance(a, str) else [a] * n
+        for a in args
+    ]
+
+
+def _loop(fn, keys: tuple[str, ...], *args) -> dict[str, list]:
+    rows = [fn(*row) for row in zip(*_broadcast(*args))]
+    return {k: [r[k] for r in rows] for k in keys}
+
+
+def _score_points_loop(
+    cash_flight, hotel_cash, hotel_fees_on_points, hotel_points_required,
+    flight_points_required, taxes_fees, award_live, friction,
+    award_source, age_seconds, exact_flight_match, cpp_threshold, weights,
+) -> dict[str, list]:
+    cols = _broadcast(
+        cash_flight, hotel_cash, hotel_fees_on_points, hotel_points_required,
+        flight_points_required, taxes_fees, award_live, friction,
+        award_source, age_seconds, exact_flight_match,
+    )
+    out: dict[str, list] = {}
+
+    def put(key: str, value: Any) -> None:
+        out.setdefault(key, []).append(value)
+
+    for cf, hc, hf, hp, fp, tf, live, fr, src, age, exact in zip(*cols):
+        s = score_points_option(cf, hc, hf, int(hp), int(fp), tf, bool(live), fr, cpp_threshold, weights)
+        for key in ("cpp_flight", "cpp_hotel", "hotel_cpp_ok", "use_points_for", "oop_total", "cpp_blended", "score"):
+            put(key, s[key])
+        put("has_alternates", bool(s["points_strategy_alternates"]))
+        if award_source is None:
+            continue
+        # Inline copy of valuation.compute_cpp_range without building the model
+        tax_conf = _infer_tax_confidence(src, tf)
+        spread = TAX_SPREAD[tax_conf]
+        pts = max(int(fp), 1)
+        put("cpp_mid", round(max(0.0, (cf - tf) / pts * 100), 2))
+        put("cpp_low", round(max(0.0, (cf - tf * (1 + spread)) / pts * 100), 2))
+        put("cpp_high", round(max(0.0, (cf - tf * (1 - spread)) / pts * 100), 2))
+        put("tax_confidence", tax_conf)
+        if age_seconds is None or exact_flight_match is None:
+            continue
+        score, tier = compute_confidence(age, bool(exact), tax_conf, src)
+        put("confidence_score", score)
+        put("confidence_tier", tier)
+    return out
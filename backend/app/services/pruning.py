@@ -0,0 +1,165 @@
+"""
+Score-bound candidate pruning — live quotes only for destinations that can
+still make the requested top k.
+
+Before any provider call, every quote input of a route (candidate × origin)
+gets an interval: a single point when the quote is known without an upstream
+call (provider cache, or no live source configured, so `search` would return
+the estimator anyway), otherwise the route's estimator quote ±
+`PRUNE_ESTIMATE_BAND`. Friction is exact. Pushing the intervals through the
+score formula (services/scoring.py) gives an optimistic and a pessimistic
+score; a destination takes the best of its origins for both. A route whose
+every input is known is scored exactly, allocation included.
+
+The k-th best pessimistic score is a floor that k destinations are sure to
+reach, so a destination whose optimistic score is below it cannot enter the
+top k and is dropped unquoted. Bounds over known quotes are exact; for the
+rest they are as good as the band — a live price further than the band from
+the estimate can drop a destination that would have ranked, never mis-score a
+kept one.
+"""
+from __future__ import annotations
+
+import os
+from typing import Any
+
+from app.services.allocation import allocate
+from app.services.scoring import (
+    CPP_CAP,
+    CPP_THRESHOLD,
+    LIVE_AWARD_CPP_BONUS,
+    WEIGHTS,
+    blended_score,
+    score_allocated_option,
+)
+
+Interval = tuple[float, float]
+
+PRUNE_ESTIMATE_BAND = float(os.getenv("PRUNE_ESTIMATE_BAND", "0.25"))
+
+AIRFARE_FIELDS = ("cash_price_total",)
+HOTEL_FIELDS = ("cash_rate_all_in", "points_rate", "fees_on_points")
+AWARD_FIELDS = ("points_cost", "taxes_fees")
+
+# Scored values are rounded to cents / 0.01 cpp; widen by that much.
+_OOP_ROUNDING = 0.01
+_CPP_ROUNDING = 0.01
+
+
+def quote_intervals(
+    quote: dict[str, Any] | None,
+    estimate: dict[str, Any],
+    fields: tuple[str, ...],
+    band: float = PRUNE_ESTIMATE_BAND,
+) -> dict[str, Interval]:
+    """Exact intervals for a known *quote*, else *estimate* ± *band* per field."""
+    if quote is not None:
+        return {k: (float(quote[k]), float(quote[k])) for k in fields}
+    return {k: (float(estimate[k]) * (1 - band), float(estimate[k]) * (1 + band)) for k in fields}
+
+
+def _cpp_interval(value: Interval, cost: Interval, points: Interval) -> Interval:
+    """Bounds of (value − cost) / points × 100 — scoring's CPP formula."""
+    num_lo, num_hi = value[0] - cost[1], value[1] - cost[0]
+    pts_lo, pts_hi = max(points[0], 1), max(points[1], 1)
+    lo = num_lo / (pts_hi if num_lo >= 0 else pts_lo)
+    hi = num_hi / (pts_lo if num_hi >= 0 else pts_hi)
+    return lo * 100.0, hi * 100.0
+
+
+def route_score_bounds(
+    search_mode: str,
+    airfare: dict[str, Interval],
+    hotel: dict[str, Interval],
+    award: dict[str, Interval] | None,
+    award_live: bool | None,
+    friction: float,
+    balances: dict[str, int] | None = None,
+    capacity: tuple[float, float] = (0.0, 0.0),
+    airline: str | None = None,
+    award_program: str | None = None,
+    weights: dict[str, float] | None = None,
+) -> Interval:
+    """
+    (pessimistic, optimistic) score of one route. *award_live* is None when it
+    is not known whether the award quote will be live; *capacity* is
+    `allocation.funding_capacity(balances)`; *airline* (None = unknown) decides
+    which programs are sure to book the flight.
+    """
+    weights = weights or WEIGHTS
+    flight = airfare["cash_price_total"]
+    hotel_cash = hotel["cash_rate_all_in"]
+    none_oop = (flight[0] + hotel_cash[0], flight[1] + hotel_cash[1])
+    if search_mode == "cash" or award is None:
+        return (
+            blended_score(none_oop[1] + _OOP_ROUNDING, 0.0, friction, **weights),
+            blended_score(none_oop[0] - _OOP_ROUNDING, 0.0, friction, **weights),
+        )
+
+    taxes, fees = award["taxes_fees"], hotel["fees_on_points"]
+    cpp_flight = _cpp_interval(flight, taxes, award["points_cost"])
+    cpp_hotel = _cpp_interval(hotel_cash, fees, hotel["points_rate"])
+    intervals = (flight, hotel_cash, taxes, fees, award["points_cost"], hotel["points_rate"])
+    if balances and award_live is not None and airline is not None and all(lo == hi for lo, hi in intervals):
+        # Every input is known: score the allocation the ranking will make.
+        plan = allocate(
+            flight[0], hotel_cash[0], taxes[0], fees[0],
+            int(award["points_cost"][0]), int(hotel["points_rate"][0]), airline, award_program,
+            flight_allowed=award_live and cpp_flight[0] > CPP_THRESHOLD,
+            hotel_allowed=cpp_hotel[0] > CPP_THRESHOLD,
+            balances=balances,
+        )
+        score = score_allocated_option(
+            cpp_flight[0], cpp_hotel[0], award_live, plan["use_points_for"], plan["oop_total"], friction, weights,
+        )["score"]
+        return score, score
+
+    # Optimistic: allocation can only redeem what clears the CPP threshold (a
+    # flight only on a live award) and the balances could possibly fund; the
+    # CPP is that of the best redemption among them.
+    miles, hotel_points = capacity
+    can_fly = (
+        award_live is not False and cpp_flight[1] > CPP_THRESHOLD and miles >= award["points_cost"][0]
+    )
+    can_stay = cpp_hotel[1] > CPP_THRESHOLD and hotel_points >= hotel["points_rate"][0]
+    bonus = LIVE_AWARD_CPP_BONUS if award_live is not False else 0.0
+    oop_lo, cpp_hi = none_oop[0], 0.0
+    if can_fly:
+        oop_lo = min(oop_lo, taxes[0] + hotel_cash[0])
+        cpp_hi = max(cpp_hi, min(CPP_CAP, min(cpp_flight[1], CPP_CAP) + bonus))
+    if can_stay:
+        oop_lo = min(oop_lo, flight[0] + fees[0])
+        cpp_hi = max(cpp_hi, min(max(cpp_hotel[1], 0.0), CPP_CAP))
+    if can_fly and can_stay:
+        oop_lo = min(oop_lo, taxes[0] + fees[0])
+        cpp_hi = max(cpp_hi, min(CPP_CAP, min((cpp_flight[1] + max(cpp_hotel[1], 0.0)) / 2.0, CPP_CAP) + bonus))
+
+    # Pessimistic: the allocation at the worst-case prices and points. Anything
+    # it can fund stays fundable (and no dearer) at the real quotes. Paying
+    # cash redeems nothing, so the CPP floor is 0.
+    oop_hi = none_oop[1]
+    if balances:
+        oop_hi = allocate(
+            flight[1], hotel_cash[1], taxes[1], fees[1],
+            int(award["points_cost"][1]), int(hotel["points_rate"][1]),
+            airline or "", award_program,
+            flight_allowed=award_live is True and airline is not None and cpp_flight[0] > CPP_THRESHOLD,
+            hotel_allowed=cpp_hotel[0] > CPP_THRESHOLD,
+            balances=balances,
+        )["oop_total"]
+
+    return (
+        blended_score(oop_hi + _OOP_ROUNDING, 0.0, friction, **weights),
+        blended_score(oop_lo - _OOP_ROUNDING, cpp_hi + _CPP_ROUNDING, friction, **weights),
+    )
+
+
+def survivors(bounds: list[Interval], top_k: int) -> list[int]:
+    """
+    Indices (in order) of the candidates whose optimistic score reaches the
+    k-th best pessimistic score; all of them when there are at most k.
+    """
+    if len(bounds) <= top_k:
+        return list(range(len(bounds)))
+    floor = sorted((pessimistic for pessimistic, _ in bounds), reverse=True)[top_k - 1]
+    return [i for i, (_, optimistic) in enumerate(bounds) if optimistic >= floor]
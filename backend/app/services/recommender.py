@@ -1,59 +1,148 @@
-from __future__ import annotations
+"""
+Destination recommender — candidate destinations for a trip search.
+
+The catalog is loaded once at import from backend/data/destinations.csv
+(`DESTINATIONS_FILE` overrides the path); file order is priority order, so the
+first matches are the ones kept. Every filter runs on an index instead of a
+scan of the catalog:
 
-from typing import Any
+    travel hours / stops   sorted arrays, cut with bisect
+    vibe tags              inverted index over region-descriptor tokens
+    preferred              code map + inverted index over city-name tokens
+
+A tag or city query still has the original substring semantics: it is
+narrowed to the destinations having, for each of its words, a token that
+contains that word (a scan of the token vocabulary, not of the catalog), and
+only those are checked against the full string. Filtering therefore costs
+O(matches), not O(catalog) — and when matches are dense, walking the catalog
+in order stops as soon as the limit is reached.
+"""
+from __future__ import annotations
 
+import csv
+import os
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable
 
 # MVP rollout scope requested by user:
 # North America, Argentina, Peru, France, Italy, UK, Iceland, Greece, Japan, Thailand
-DESTINATION_POOL = [
-    # North America / Caribbean
-    {"code": "CUN", "city": "Cancun", "region": "north america warm beach", "travel_hours": 4.3, "stops": 0},
-    {"code": "PUJ", "city": "Punta Cana", "region": "north america warm beach", "travel_hours": 4.8, "stops": 0},
-    {"code": "NAS", "city": "Nassau", "region": "north america warm beach", "travel_hours": 3.1, "stops": 0},
-    {"code": "SJD", "city": "Los Cabos", "region": "north america warm beach", "travel_hours": 6.1, "stops": 1},
-    {"code": "YVR", "city": "Vancouver", "region": "north america", "travel_hours": 6.0, "stops": 0},
-    # South America
-    {"code": "EZE", "city": "Buenos Aires", "region": "argentina south america", "travel_hours": 10.0, "stops": 1},
-    {"code": "LIM", "city": "Lima", "region": "peru south america warm beach", "travel_hours": 7.8, "stops": 1},
-    # Europe
-    {"code": "CDG", "city": "Paris", "region": "france europe", "travel_hours": 7.8, "stops": 0},
-    {"code": "FCO", "city": "Rome", "region": "italy europe", "travel_hours": 8.7, "stops": 0},
-    {"code": "LHR", "city": "London", "region": "uk europe", "travel_hours": 7.2, "stops": 0},
-    {"code": "KEF", "city": "Reykjavik", "region": "iceland europe", "travel_hours": 5.9, "stops": 0},
-    {"code": "ATH", "city": "Athens", "region": "greece europe warm beach", "travel_hours": 9.8, "stops": 1},
-    # Asia
-    {"code": "HND", "city": "Tokyo", "region": "japan asia", "travel_hours": 13.5, "stops": 1},
-    {"code": "BKK", "city": "Bangkok", "region": "thailand asia warm beach", "travel_hours": 18.0, "stops": 1},
-]
-
-
-def generate_destination_candidates(payload: dict[str, Any]) -> list[dict[str, Any]]:
-    constraints = payload.get("constraints", {})
-    max_hours = float(constraints.get("max_travel_hours", 10.0))
-    max_stops = int(constraints.get("max_stops", 1))
-    vibe_tags = [v.lower().strip() for v in payload.get("vibe_tags", []) if str(v).strip()]
-    preferred = [d.lower().strip() for d in payload.get("preferred_destinations", []) if str(d).strip()]
+DESTINATIONS_FILE = Path(
+    os.getenv("DESTINATIONS_FILE", Path(__file__).resolve().parents[2] / "data" / "destinations.csv")
+)
+
+MAX_CANDIDATES = 10
+
+_BEACH_WARM_TAGS = {"beach", "warm", "warm beach"}
+
+
+class _TokenIndex:
+    """Inverted index token → destination ids, answering `query in text` lookups."""
 
-    wants_beach_warm = any(v in {"beach", "warm", "warm beach"} for v in vibe_tags)
+    def __init__(self, texts: list[str]):
+        self._texts = texts
+        self._postings: dict[str, set[int]] = {}
+        for i, text in enumerate(texts):
+            for token in text.split():
+                self._postings.setdefault(token, set()).add(i)
+        self._containing = lru_cache(maxsize=1024)(self._scan_vocabulary)
 
-    out: list[dict[str, Any]] = []
-    for d in DESTINATION_POOL:
-        if d["travel_hours"] > max_hours or d["stops"] > max_stops:
-            continue
+    def _scan_vocabulary(self, word: str) -> frozenset[int]:
+        return frozenset().union(*(ids for token, ids in self._postings.items() if word in token))
 
-        # Beach/warm should not drift to off-vibe defaults.
-        if wants_beach_warm and not ("beach" in d["region"] or "warm" in d["region"]):
-            continue
+    def matching(self, query: str) -> frozenset[int]:
+        """Ids whose text contains *query* (a non-empty, stripped string)."""
+        words = query.split()
+        if len(words) == 1:
+            return self._containing(query)  # a token containing it is proof enough
+        ids = self._containing(words[0])
+        for word in words[1:]:
+            ids &= self._containing(word)
+        return frozenset(i for i in ids if query in self._texts[i])
 
-        if vibe_tags and not wants_beach_warm and not any(v in d["region"] for v in vibe_tags):
-            continue
 
+class DestinationCatalog:
+    def __init__(self, destinations: Iterable[dict[str, Any]]):
+        self.destinations = list(destinations)
+        n = len(self.destinations)
+        self._hours = [d["travel_hours"] for d in self.destinations]
+        self._stops = [d["stops"] for d in self.destinations]
+        self._by_hours = sorted(range(n), key=lambda i: self._hours[i])
+        self._hours_keys = [self._hours[i] for i in self._by_hours]
+        self._by_stops = sorted(range(n), key=lambda i: self._stops[i])
+        self._stops_keys = [self._stops[i] for i in self._by_stops]
+        self._by_code = {d["code"].lower(): i for i, d in enumerate(self.destinations)}
+        self._regions = _TokenIndex([d["region"] for d in self.destinations])
+        self._cities = _TokenIndex([d["city"].lower() for d in self.destinations])
+
+    def search(
+        self,
+        max_hours: float,
+        max_stops: int,
+        vibe_tags: list[str],
+        preferred: list[str],
+        limit: int = MAX_CANDIDATES,
+    ) -> list[dict[str, Any]]:
+        """Destinations passing every filter, in catalog order, at most *limit*."""
+        filters: list[frozenset[int]] = []
+        if any(v in _BEACH_WARM_TAGS for v in vibe_tags):
+            # Beach/warm should not drift to off-vibe defaults.
+            filters.append(self._regions.matching("beach") | self._regions.matching("warm"))
+        elif vibe_tags:
+            filters.append(frozenset().union(*(self._regions.matching(v) for v in vibe_tags)))
         if preferred:
-            code = d["code"].lower()
-            city = d["city"].lower()
-            if not any((p == code) or (p in city) for p in preferred):
-                continue
+            filters.append(frozenset().union(*(
+                self._cities.matching(p) | ({self._by_code[p]} if p in self._by_code else set())
+                for p in preferred
+            )))
+
+        def keep(i: int) -> bool:
+            return self._hours[i] <= max_hours and self._stops[i] <= max_stops and all(i in f for f in filters)
+
+        # The smallest index result bounds the work; the other filters are O(1) checks.
+        n_hours = bisect_right(self._hours_keys, max_hours)
+        n_stops = bisect_right(self._stops_keys, max_stops)
+        filters.sort(key=len)
+        base_size = min(n_hours, n_stops, *(len(f) for f in filters))
+        n = len(self.destinations)
+        if base_size * base_size > limit * n:
+            # Dense matches: walking the catalog in order reaches *limit* hits early.
+            ids = (i for i in range(n) if keep(i))
+        else:
+            if filters and len(filters[0]) == base_size:
+                base: Iterable[int] = filters[0]
+            elif n_hours <= n_stops:
+                base = self._by_hours[:n_hours]
+            else:
+                base = self._by_stops[:n_stops]
+            ids = iter(sorted(i for i in base if keep(i)))
+        return [self.destinations[i] for i in islice(ids, limit)]
+
+
+def load_catalog(path: Path = DESTINATIONS_FILE) -> DestinationCatalog:
+    with open(path, newline="", encoding="utf-8") as f:
+        return DestinationCatalog(
+            {
+                "code": row["code"].strip().upper(),
+                "city": row["city"].strip(),
+                "region": row["region"].strip().lower(),
+                "travel_hours": float(row["travel_hours"]),
+                "stops": int(row["stops"]),
+            }
+            for row in csv.DictReader(f)
+        )
+
 
-        out.append(d)
+CATALOG = load_catalog()
+DESTINATION_POOL = CATALOG.destinations
 
-    return out[:10]
+
+def generate_destination_candidates(payload: dict[str, Any], limit: int = MAX_CANDIDATES) -> list[dict[str, Any]]:
+    constraints = payload.get("constraints", {})
+    max_hours = float(constraints.get("max_travel_hours", 10.0))
+    max_stops = int(constraints.get("max_stops", 1))
+    vibe_tags = [v.lower().strip() for v in payload.get("vibe_tags", []) if str(v).strip()]
+    preferred = [d.lower().strip() for d in payload.get("preferred_destinations", []) if str(d).strip()]
+    return CATALOG.search(max_hours, max_stops, vibe_tags, preferred, limit)
@@ -1,3 +1,22 @@
+"""
+Option scoring — pure functions, no I/O.
+
+The scalar functions here are the reference implementation; the batch engine
+in services/batch_scoring.py must reproduce their numbers exactly.
+"""
+from __future__ import annotations
+
+from typing import Any, Literal
+
+PointsStrategy = Literal["flight", "hotel", "none"]
+Redemption = Literal["flight", "hotel", "both", "none"]
+
+WEIGHTS = {"w1": 0.5, "w2": 0.35, "w3": 0.15}
+CPP_THRESHOLD = 1.0
+CPP_CAP = 5.0
+LIVE_AWARD_CPP_BONUS = 0.15
+
+
 def clamp(val: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, val))
 
@@ -8,3 +27,120 @@ def blended_score(oop_total: float, cpp_blended: float, friction: float, w1=0.5,
     cpp_term = clamp(cpp_blended, 0.0, 5.0) / 5.0
     friction_term = -friction / 10.0
     return w1 * oop_term + w2 * cpp_term + w3 * friction_term
+
+
+def friction_components(stops: int, travel_hours: float) -> dict[str, float]:
+    return {
+        "stops_penalty": stops * 2.0,
+        "travel_time_penalty": max(0.0, travel_hours - 7.0) * 0.5,
+    }
+
+
+def score_components(
+    oop_total: float, cpp_blended: float, friction: float, weights: dict[str, float] | None = None,
+) -> dict[str, Any]:
+    return {
+        "oop_term": round(-oop_total / 5000.0, 4),
+        "cpp_term": round(min(cpp_blended, CPP_CAP) / CPP_CAP, 4),
+        "friction_term": round(-friction / 10.0, 4),
+        "weights": dict(weights or WEIGHTS),
+    }
+
+
+def choose_points_strategy(
+    award_live: bool, flight_cpp_ok: bool, hotel_cpp_ok: bool,
+) -> tuple[PointsStrategy, list[str]]:
+    """(what to redeem points for, alternates the user may switch to)."""
+    # P0 rule: prefer flight redemption when live award exists + good CPP
+    if award_live and flight_cpp_ok:
+        use_points_for: PointsStrategy = "flight"
+    elif hotel_cpp_ok and ((not award_live) or (not flight_cpp_ok)):
+        use_points_for = "hotel"
+    elif flight_cpp_ok:
+        use_points_for = "flight"
+    else:
+        use_points_for = "none"
+    alternates = ["flight", "hotel"] if award_live and flight_cpp_ok and hotel_cpp_ok else []
+    return use_points_for, alternates
+
+
+def score_cash_option(
+    cash_flight: float, hotel_cash: float, friction: float, weights: dict[str, float] | None = None,
+) -> dict[str, Any]:
+    """Cash mode: rank purely by total trip cost."""
+    oop_total = round(cash_flight + hotel_cash, 2)
+    return {"oop_total": oop_total, "score": blended_score(oop_total, 0.0, friction, **(weights or WEIGHTS))}
+
+
+def score_points_option(
+    cash_flight: float,
+    hotel_cash: float,
+    hotel_fees_on_points: float,
+    hotel_points_required: int,
+    flight_points_required: int,
+    taxes_fees: float,
+    award_live: bool,
+    friction: float,
+    cpp_threshold: float = CPP_THRESHOLD,
+    weights: dict[str, float] | None = None,
+) -> dict[str, Any]:
+    """Points mode: CPPs, the redeem-flight/hotel/none decision, out-of-pocket and score."""
+    cpp_flight = ((cash_flight - taxes_fees) / max(flight_points_required, 1)) * 100.0
+    cpp_hotel = ((hotel_cash - hotel_fees_on_points) / max(hotel_points_required, 1)) * 100.0
+    flight_cpp_ok = cpp_flight > cpp_threshold
+    hotel_cpp_ok = cpp_hotel > cpp_threshold
+
+    use_points_for, alternates = choose_points_strategy(award_live, flight_cpp_ok, hotel_cpp_ok)
+    if use_points_for == "flight":
+        oop_total = round(taxes_fees + hotel_cash, 2)
+    elif use_points_for == "hotel":
+        oop_total = round(cash_flight + hotel_fees_on_points, 2)
+    else:
+        oop_total = round(cash_flight + hotel_cash, 2)
+
+    cpp_blended = min(round((cpp_flight + max(cpp_hotel, 0.0)) / 2.0, 2), CPP_CAP)
+    if award_live:
+        cpp_blended = min(CPP_CAP, round(cpp_blended + LIVE_AWARD_CPP_BONUS, 2))
+
+    return {
+        "cpp_flight": cpp_flight,
+        "cpp_hotel": cpp_hotel,
+        "hotel_cpp_ok": hotel_cpp_ok,
+        "use_points_for": use_points_for,
+        "points_strategy_alternates": alternates,
+        "oop_total": oop_total,
+        "cpp_blended": cpp_blended,
+        "score": blended_score(oop_total, cpp_blended, friction, **(weights or WEIGHTS)),
+    }
+
+
+def redeemed_cpp(cpp_flight: float, cpp_hotel: float, award_live: bool, use_points_for: Redemption) -> float:
+    """Blended CPP of what the allocation actually redeems; 0.0 when it pays cash."""
+    if use_points_for == "both":
+        cpp = min(round((cpp_flight + max(cpp_hotel, 0.0)) / 2.0, 2), CPP_CAP)
+    elif use_points_for == "flight":
+        cpp = min(round(cpp_flight, 2), CPP_CAP)
+    elif use_points_for == "hotel":
+        cpp = min(round(max(cpp_hotel, 0.0), 2), CPP_CAP)
+    else:
+        return 0.0
+    if award_live and use_points_for in ("flight", "both"):
+        cpp = min(CPP_CAP, round(cpp + LIVE_AWARD_CPP_BONUS, 2))
+    return cpp
+
+
+def score_allocated_option(
+    cpp_flight: float,
+    cpp_hotel: float,
+    award_live: bool,
+    use_points_for: Redemption,
+    oop_total: float,
+    friction: float,
+    weights: dict[str, float] | None = None,
+) -> dict[str, Any]:
+    """Re-score a points option once the balance allocation has picked its redemption."""
+    cpp_blended = redeemed_cpp(cpp_flight, cpp_hotel, award_live, use_points_for)
+    return {
+        "cpp_blended": cpp_blended,
+        "score": blended_score(oop_total, cpp_blended, friction, **(weights or WEIGHTS)),
+    }
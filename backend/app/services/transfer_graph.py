@@ -1,10 +1,24 @@
 """
 Transfer graph — in-memory, built once at import from transfer_partners.py CSV data.
 Models the PRD §8 transfer_edges table without a database.
+
+The graph has three kinds of node — currencies (MR, CAP1, ...), loyalty
+programs and operating airlines — and two kinds of edge:
+
+    currency → program   a points transfer (ratio, promo bonus, transfer time)
+    program  → airline   an award booking: the program's own airline, or any
+                         airline in the same alliance (a partner booking)
+
+Adjacency maps by currency, program, airline and alliance are built once at
+import, and the best route from every currency to every program and airline
+(most award miles per point, ratio × promo bonus) is precomputed, so a query
+is a few dict lookups.
 """
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from typing import NamedTuple
+
 from app.data.transfer_partners import PROGRAMS
 
 # ── Card column → backend currency key ───────────────────────────────────────
@@ -46,6 +60,108 @@ _TRANSFER_TIME_OVERRIDES: dict[tuple[str, str], int] = {
 
 _DEFAULT_TRANSFER_TIME = 1440  # 1 day if unknown
 
+# ── Hotel currency → airline transfers (not in the card CSV) ─────────────────
+# Marriott Bonvoy converts to most airline programs at 3:1 (United at 3:1.1),
+# typically taking a couple of days.
+_MARRIOTT_RATIO = 1 / 3
+_MARRIOTT_TRANSFER_TIME = 2880
+_MARRIOTT_PROGRAMS: dict[str, float] = {
+    "Aeromexico Rewards":          _MARRIOTT_RATIO,
+    "Air Canada Aeroplan":         _MARRIOTT_RATIO,
+    "Flying Blue":                 _MARRIOTT_RATIO,
+    "Alaska Mileage Plan":         _MARRIOTT_RATIO,
+    "American AAdvantage":         _MARRIOTT_RATIO,
+    "Avianca LifeMiles":           _MARRIOTT_RATIO,
+    "British Airways Avios":       _MARRIOTT_RATIO,
+    "Cathay Pacific Asia Miles":   _MARRIOTT_RATIO,
+    "Copa ConnectMiles":           _MARRIOTT_RATIO,
+    "Delta SkyMiles":              _MARRIOTT_RATIO,
+    "Emirates Skywards":           _MARRIOTT_RATIO,
+    "Etihad Guest":                _MARRIOTT_RATIO,
+    "Iberia Avios":                _MARRIOTT_RATIO,
+    "Qantas Frequent Flyer":       _MARRIOTT_RATIO,
+    "Qatar Airways Avios":         _MARRIOTT_RATIO,
+    "Singapore KrisFlyer":         _MARRIOTT_RATIO,
+    "Turkish Miles&Smiles":        _MARRIOTT_RATIO,
+    "United MileagePlus":          1.1 / 3,
+    "Virgin Atlantic Flying Club": _MARRIOTT_RATIO,
+    "Virgin Australia Velocity":   _MARRIOTT_RATIO,
+}
+
+# ── Operating airlines without a transferable program of their own ───────────
+# Their alliance decides which programs can book them as a partner.
+_OPERATOR_ALLIANCES: dict[str, str] = {
+    "ITA Airways":         "SkyTeam",
+    "China Eastern":       "SkyTeam",
+    "Korean Air":          "SkyTeam",
+    "JAL":                 "Oneworld",
+    "Malaysia Airlines":   "Oneworld",
+    "ANA":                 "Star Alliance",
+    "EVA Air":             "Star Alliance",
+    "Thai Airways":        "Star Alliance",
+    "Air New Zealand":     "Star Alliance",
+    "Austrian":            "Star Alliance",
+    "Asiana":              "Star Alliance",
+    "TAP Air Portugal":    "Star Alliance",
+    "Aegean Airlines":     "Star Alliance",
+    "Icelandair":          "None",
+    "LATAM":               "None",
+    "Southwest":           "None",
+}
+
+# Provider spellings (e.g. adapters' IATA → name map) of the table's airlines.
+_NAME_ALIASES: dict[str, str] = {
+    "american airlines":   "American",
+    "alaska airlines":     "Alaska",
+    "copa airlines":       "Copa",
+    "qatar airways":       "Qatar",
+}
+
+# IATA carrier code → the table's airline name.
+_IATA_CODES: dict[str, str] = {
+    "A3": "Aegean Airlines",
+    "AA": "American",
+    "AC": "Air Canada",
+    "AF": "Air France/KLM",
+    "AM": "Aeromexico",
+    "AS": "Alaska",
+    "AV": "Avianca",
+    "AY": "Finnair",
+    "AZ": "ITA Airways",
+    "B6": "JetBlue",
+    "BA": "British Airways",
+    "BR": "EVA Air",
+    "CM": "Copa",
+    "CX": "Cathay Pacific",
+    "DL": "Delta",
+    "EK": "Emirates",
+    "EY": "Etihad",
+    "FI": "Icelandair",
+    "IB": "Iberia",
+    "JL": "JAL",
+    "KE": "Korean Air",
+    "KL": "Air France/KLM",
+    "LA": "LATAM",
+    "LH": "Lufthansa",
+    "MH": "Malaysia Airlines",
+    "MU": "China Eastern",
+    "NH": "ANA",
+    "NZ": "Air New Zealand",
+    "OS": "Austrian",
+    "OZ": "Asiana",
+    "QF": "Qantas",
+    "QR": "Qatar",
+    "SK": "SAS",
+    "SQ": "Singapore Airlines",
+    "TG": "Thai Airways",
+    "TK": "Turkish Airlines",
+    "TP": "TAP Air Portugal",
+    "UA": "United",
+    "VA": "Virgin Australia",
+    "VS": "Virgin Atlantic",
+    "WN": "Southwest",
+}
+
 
 @dataclass(frozen=True)
 class TransferEdge:
@@ -73,20 +189,160 @@ for _prog in PROGRAMS:
                 promo_bonus_percent=0.0,
                 transfer_time_minutes=_TRANSFER_TIME_OVERRIDES.get(_key, _DEFAULT_TRANSFER_TIME),
             ))
+    if _prog["program"] in _MARRIOTT_PROGRAMS:
+        TRANSFER_EDGES.append(TransferEdge(
+            currency="MARRIOTT",
+            program=_prog["program"],
+            airline=_prog["airline"],
+            alliance=_prog["alliance"],
+            ratio=_MARRIOTT_PROGRAMS[_prog["program"]],
+            promo_bonus_percent=0.0,
+            transfer_time_minutes=_MARRIOTT_TRANSFER_TIME,
+        ))
+
+
+class Route(NamedTuple):
+    """Best route from a currency to a program or airline node."""
+    hops: tuple[str, ...]       # node names, e.g. ("MR", "Flying Blue", "Delta")
+    multiplier: float           # award miles per point of the source currency
+    transfer_time_minutes: int
+    edge: TransferEdge          # the currency → program transfer on the route
+    partner_booking: bool       # the last hop books a partner airline
+
+
+def _aliases(airline: str) -> list[str]:
+    """Lower-case names an airline is looked up by ("Air France/KLM" → air france, klm, ...)."""
+    name = airline.lower()
+    return [name, *(part.strip() for part in name.split("/") if "/" in name)]
+
+
+class TransferGraph:
+    """Adjacency maps over TRANSFER_EDGES plus precomputed best routes."""
+
+    def __init__(self, edges: list[TransferEdge], operator_alliances: dict[str, str]):
+        self.by_currency: dict[str, list[TransferEdge]] = {}
+        self.by_program: dict[str, list[TransferEdge]] = {}
+        self.by_airline: dict[str, list[TransferEdge]] = {}
+        self.by_alliance: dict[str, list[str]] = {}            # alliance → programs
+        self.airline_alliance: dict[str, str] = dict(operator_alliances)
+        self.program_airline: dict[str, str] = {}
+        for e in edges:
+            self.by_currency.setdefault(e.currency, []).append(e)
+            self.by_program.setdefault(e.program, []).append(e)
+            self.by_airline.setdefault(e.airline, []).append(e)
+            if e.program not in self.program_airline:
+                self.program_airline[e.program] = e.airline
+                self.airline_alliance.setdefault(e.airline, e.alliance)
+                if e.alliance != "None":
+                    self.by_alliance.setdefault(e.alliance, []).append(e.program)
+        self._alias_index: dict[str, str] = {}
+        for airline in self.airline_alliance:
+            for alias in _aliases(airline):
+                self._alias_index.setdefault(alias, airline)
+        for alias, airline in _NAME_ALIASES.items():
+            if airline in self.airline_alliance:
+                self._alias_index.setdefault(alias, airline)
+        self._code_index = {
+            code: airline for code, airline in _IATA_CODES.items() if airline in self.airline_alliance
+        }
+        # currency → {program or airline: best route}
+        self.routes: dict[str, dict[str, Route]] = {
+            currency: self._best_routes(currency) for currency in self.by_currency
+        }
+
+    def bookable_programs(self, airline: str) -> list[tuple[str, bool]]:
+        """(program, partner_booking) for every program that can book *airline*."""
+        own = list(dict.fromkeys(e.program for e in self.by_airline.get(airline, [])))
+        alliance = self.airline_alliance.get(airline, "None")
+        partners = [
+            p for p in self.by_alliance.get(alliance, []) if p not in own
+        ] if alliance != "None" else []
+        return [(p, False) for p in own] + [(p, True) for p in partners]
+
+    def _best_routes(self, source: str) -> dict[str, Route]:
+        """
+        Best route from *source* to every program and airline. Every path is
+        currency → program (→ airline), so they are simply enumerated and
+        compared: most award miles per source point (ratio × promo bonus)
+        first, then fastest, then fewest hops (a partner booking counts as an
+        extra hop, so own-airline programs win ties), then program name.
+        """
+        best: dict[str, tuple[tuple, Route]] = {}
+
+        def offer(node: str, route: Route, n_hops: int) -> None:
+            key = (-route.multiplier, route.transfer_time_minutes, n_hops, route.hops)
+            if node not in best or key < best[node][0]:
+                best[node] = (key, route)
+
+        for edge in self.by_currency.get(source, []):
+            multiplier = edge.ratio * (1 + edge.promo_bonus_percent / 100)
+            minutes = edge.transfer_time_minutes
+            offer(edge.program, Route((source, edge.program), multiplier, minutes, edge, False), 1)
+            for airline, partner in self._booking_edges(edge.program):
+                route = Route((source, edge.program, airline), multiplier, minutes, edge, partner)
+                offer(airline, route, 2 + partner)
+        return {node: route for node, (_, route) in best.items()}
+
+    def _booking_edges(self, program: str) -> list[tuple[str, bool]]:
+        own = self.program_airline[program]
+        alliance = self.airline_alliance.get(own, "None")
+        out = [(own, False)]
+        if alliance != "None":
+            out += [(a, True) for a, al in self.airline_alliance.items() if al == alliance and a != own]
+        return out
+
+    def resolve_airline(self, airline_name: str) -> str | None:
+        """
+        Canonical airline node for a provider's airline name or IATA code
+        (case-insensitive, exact: "Air France" / "AF" → "Air France/KLM",
+        "American Airlines" → "American"); None for anything else.
+        """
+        key = " ".join(airline_name.lower().split())
+        if key in self._alias_index:
+            return self._alias_index[key]
+        return self._code_index.get(key.upper())
+
+
+GRAPH = TransferGraph(TRANSFER_EDGES, _OPERATOR_ALLIANCES)
 
 
 def get_edges_for_currency(currency: str) -> list[TransferEdge]:
     """All programs reachable from a given currency key (e.g. 'MR')."""
-    return [e for e in TRANSFER_EDGES if e.currency == currency]
+    return GRAPH.by_currency.get(currency, [])
 
 
 def get_edges_for_airline(airline_name: str) -> list[TransferEdge]:
     """
-    All edges whose program flies the given airline (case-insensitive partial match
-    on the airline field from the PROGRAMS table).
+    All edges whose program flies the given airline (case-insensitive; known
+    spellings and IATA codes like "Air France" or "QR" resolve to the table's
+    airline).
+    """
+    airline = GRAPH.resolve_airline(airline_name)
+    return GRAPH.by_airline.get(airline, []) if airline else []
+
+
+def find_routes(airline_name: str, currencies: list[str] | None = None) -> list[Route]:
+    """
+    Every currency → program → airline route that can book *airline_name*:
+    own-airline programs and alliance partners, one route per (currency, program).
     """
-    key = airline_name.lower()
-    return [e for e in TRANSFER_EDGES if key in e.airline.lower()]
+    airline = GRAPH.resolve_airline(airline_name)
+    if airline is None:
+        return []
+    out: list[Route] = []
+    for currency in (currencies if currencies is not None else GRAPH.routes):
+        reachable = GRAPH.routes.get(currency, {})
+        for program, partner in GRAPH.bookable_programs(airline):
+            to_program = reachable.get(program)
+            if to_program is not None:
+                out.append(to_program._replace(hops=(*to_program.hops, airline), partner_booking=partner))
+    return out
+
+
+def best_route(currency: str, airline_name: str) -> Route | None:
+    """Cheapest (then fastest) route from *currency* to a seat on *airline_name*."""
+    airline = GRAPH.resolve_airline(airline_name)
+    return GRAPH.routes.get(currency, {}).get(airline) if airline else None
 
 
 def build_transfer_paths(
@@ -98,39 +354,33 @@ def build_transfer_paths(
     Build structured transfer paths for the PRD §8/§9 output shape.
 
     Returns a list of dicts compatible with the TransferPath Pydantic model,
-    sorted: viable paths (effective_points >= needed) first, then by transfer speed.
+    sorted: viable paths (effective_points >= needed) first, then own-airline
+    programs before alliance partners, then by transfer speed.
 
     Args:
         airline: Operating airline name (e.g. "Air France")
         user_balances: {"MR": 80000, "CAP1": 50000, ...}
         points_needed: Award points required for this itinerary
     """
-    candidate_edges = get_edges_for_airline(airline)
+    currencies = [c for c, balance in user_balances.items() if balance > 0]
     paths: list[dict] = []
-    seen: set[tuple[str, str]] = set()  # (currency, program) dedup
-
-    for edge in candidate_edges:
-        balance = user_balances.get(edge.currency, 0)
-        if balance <= 0:
-            continue
-        key = (edge.currency, edge.program)
-        if key in seen:
-            continue
-        seen.add(key)
-
-        effective = int(balance * edge.ratio * (1 + edge.promo_bonus_percent / 100))
+    for route in find_routes(airline, currencies):
+        edge = route.edge
+        effective = int(user_balances[edge.currency] * route.multiplier)
         paths.append({
             "currency": edge.currency,
             "program": edge.program,
             "ratio": edge.ratio,
             "promo_bonus_percent": edge.promo_bonus_percent,
             "effective_points": effective,
-            "transfer_time_minutes": edge.transfer_time_minutes,
+            "transfer_time_minutes": route.transfer_time_minutes,
+            "hops": list(route.hops),
+            "partner_booking": route.partner_booking,
         })
 
-    # Sort: viable first, then fastest transfer
+    # Sort: viable first, then own-airline programs, then fastest transfer
     def _sort_key(p: dict) -> tuple:
         viable = p["effective_points"] >= points_needed
-        return (not viable, p["transfer_time_minutes"])
+        return (not viable, p["partner_booking"], p["transfer_time_minutes"])
 
     return sorted(paths, key=_sort_key)
@@ -1,8 +1,62 @@
+"""
+Record store for trip searches, alerts and recommendations.
+
+Each collection maps id → JSON-able record. Two backends, picked by
+STORE_BACKEND:
+
+    sqlite (default) — one SQLite file in WAL mode (STORE_DB_PATH, default
+                       DATA_DIR/pointpilot.sqlite3), one table per collection
+                       keyed by id, so point lookups and upserts touch one row.
+                       Existing data/*.json files are imported on first use.
+    json             — whole-file JSON documents in DATA_DIR, written
+                       atomically under a cross-process file lock.
+
+The `load_*` / `save_*` functions keep their whole-collection semantics on
+both backends. Request handlers should use the collection objects instead —
+`get`, `get_many`, `find`, `upsert`, `upsert_many`, `update` — so their I/O
+scales with the records they touch rather than with everything ever stored.
+`find(field=value)` is served from indexed columns for a collection's
+`index_fields` (alerts: trip_search_id, enabled).
+
+STORE_WRITE_MODE=write_behind puts an in-memory map in front of either backend:
+requests read and write memory, and a background thread persists changed
+records in batches every STORE_FLUSH_INTERVAL_SECONDS (default 1). Shutdown
+flushes whatever is pending.
+
+Record encoding follows STORE_SERIALIZER (see app/serialization.py): compact
+JSON by default, `pretty` for the indented, sorted debug format.
+
+Recommendation options are priced snapshots, so they are not kept forever:
+
+    RECO_TTL_SECONDS        age (from the record's `as_of`, or an explicit
+                            `expires_at` epoch) after which an option expires;
+                            default 86400, 0 keeps options forever
+    RECO_MAX_PER_TRIP       newest options kept per trip search; default 40, 0 = no cap
+    RECO_RETENTION_MODE     "drop" (default) or "archive" — archived options move
+                            to a `<name>_archive` table / `<name>.archive.jsonl`
+
+A compactor thread applies this every STORE_COMPACT_INTERVAL_SECONDS (default
+600). On SQLite, `trip_search_id` and `expires_at` are indexed columns, so a
+compaction pass reads only the rows it removes.
+"""
 from __future__ import annotations
 
-import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
+
+from app.serialization import dumps_compact, dumps_document, dumps_record, loads
+
+try:
+    import fcntl
+except ImportError:  # Windows: locking is process-local only
+    fcntl = None
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 DATA_DIR = BASE_DIR / "data"
@@ -12,39 +66,753 @@ TRIP_SEARCHES_FILE = DATA_DIR / "trip_searches.json"
 ALERTS_FILE = DATA_DIR / "alerts.json"
 RECOMMENDATIONS_FILE = DATA_DIR / "recommendations.json"
 
+STORE_BACKEND = os.getenv("STORE_BACKEND", "sqlite").lower()
+STORE_DB_PATH = Path(os.getenv("STORE_DB_PATH", str(DATA_DIR / "pointpilot.sqlite3")))
+STORE_WRITE_MODE = os.getenv("STORE_WRITE_MODE", "sync").lower()
+STORE_FLUSH_INTERVAL_SECONDS = float(os.getenv("STORE_FLUSH_INTERVAL_SECONDS", "1.0"))
+STORE_COMPACT_INTERVAL_SECONDS = float(os.getenv("STORE_COMPACT_INTERVAL_SECONDS", "600"))
+
+RECO_TTL_SECONDS = float(os.getenv("RECO_TTL_SECONDS", "86400"))
+RECO_MAX_PER_TRIP = int(os.getenv("RECO_MAX_PER_TRIP", "40"))
+RECO_RETENTION_MODE = os.getenv("RECO_RETENTION_MODE", "drop").lower()
+
 
 def _load(path: Path) -> dict[str, Any]:
     if not path.exists():
         return {}
     try:
-        return json.loads(path.read_text())
+        return loads(path.read_bytes())
     except Exception:
         return {}
 
 
 def _save(path: Path, payload: dict[str, Any]) -> None:
-    path.write_text(json.dumps(payload, indent=2, sort_keys=True))
+    """Write a temp file next to *path* and rename it over — readers never see a partial file."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(dumps_document(payload))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+_path_locks: dict[Path, threading.Lock] = {}
+_path_locks_guard = threading.Lock()
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """
+    Exclusive lock for a read-modify-write of *path*, held across processes
+    (flock on a sidecar .lock file) as well as across threads of this one.
+    """
+    with _path_locks_guard:
+        local = _path_locks.setdefault(path, threading.Lock())
+    with local:
+        if fcntl is None:
+            yield
+            return
+        with open(path.with_name(path.name + ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+# ── Retention helpers ─────────────────────────────────────────────────────────
+
+def _parse_ts(value: Any) -> float | None:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def _expiry(record: Any, ttl_seconds: float | None) -> float | None:
+    """Epoch at which *record* expires: its own `expires_at`, else `as_of` + TTL."""
+    if not isinstance(record, dict):
+        return None
+    explicit = _parse_ts(record.get("expires_at"))
+    if explicit is not None:
+        return explicit
+    if not ttl_seconds:
+        return None
+    as_of = _parse_ts(record.get("as_of"))
+    return None if as_of is None else as_of + ttl_seconds
+
+
+def _expired_in(data: dict[str, Any], ttl_seconds: float | None, now: float) -> list[str]:
+    expired = []
+    for rid, record in data.items():
+        expires_at = _expiry(record, ttl_seconds)
+        if expires_at is not None and expires_at <= now:
+            expired.append(rid)
+    return expired
+
+
+def _over_cap_in(data: dict[str, Any], field: str, cap: int, ttl_seconds: float | None) -> list[str]:
+    """Ids beyond the newest *cap* records of each *field* group (newest = latest expiry)."""
+    groups: dict[Any, list[tuple[float, str]]] = {}
+    for rid, record in data.items():
+        if isinstance(record, dict) and record.get(field) is not None:
+            groups.setdefault(record[field], []).append((_expiry(record, ttl_seconds) or 0.0, rid))
+    over = []
+    for members in groups.values():
+        if len(members) > cap:
+            members.sort(reverse=True)
+            over.extend(rid for _, rid in members[cap:])
+    return over
+
+
+def _matches(record: Any, criteria: dict[str, Any]) -> bool:
+    return isinstance(record, dict) and all(record.get(k) == v for k, v in criteria.items())
+
+
+def _append_archive(path: Path, records: dict[str, Any]) -> None:
+    archived_at = time.time()
+    with _file_lock(path), open(path, "a", encoding="utf-8") as f:
+        for rid, record in records.items():
+            f.write(dumps_compact({"id": rid, "archived_at": archived_at, "data": record}).decode() + "\n")
+
+
+# ── SQLite plumbing ───────────────────────────────────────────────────────────
+
+_local = threading.local()
+
+
+def sqlite_connection(path: Path) -> sqlite3.Connection:
+    """Per-thread autocommit connection in WAL mode (readers never block the writer)."""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=10.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conns[path] = conn
+    return conn
+
+
+class _Transaction:
+    """`with _Transaction(conn):` → BEGIN IMMEDIATE … COMMIT / ROLLBACK."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+# ── Collections ───────────────────────────────────────────────────────────────
+
+class JsonCollection:
+    """
+    Whole-file JSON document; every operation reads or rewrites the file.
+
+    Writes are atomic (temp file + rename) and each read-modify-write holds an
+    flock on `<file>.lock`, so several workers can share the file without
+    losing each other's records.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: Path,
+        index_fields: tuple[str, ...] = (),
+        ttl_seconds: float | None = None,
+    ):
+        self.name = name
+        self.path = path
+        self.index_fields = index_fields
+        self.ttl_seconds = ttl_seconds
+
+    def load_all(self) -> dict[str, Any]:
+        return _load(self.path)
+
+    def save_all(self, data: dict[str, Any]) -> None:
+        with _file_lock(self.path):
+            _save(self.path, data)
+
+    def get(self, record_id: str) -> dict[str, Any] | None:
+        return self.load_all().get(record_id)
+
+    def get_many(self, record_ids: Iterable[str]) -> dict[str, Any]:
+        data = self.load_all()
+        return {rid: data[rid] for rid in record_ids if rid in data}
+
+    def upsert(self, record_id: str, record: dict[str, Any]) -> None:
+        self.upsert_many({record_id: record})
+
+    def upsert_many(self, records: dict[str, Any]) -> None:
+        if not records:
+            return
+        with _file_lock(self.path):
+            data = self.load_all()
+            data.update(records)
+            _save(self.path, data)
+
+    def delete_many(self, record_ids: Iterable[str]) -> None:
+        with _file_lock(self.path):
+            data = self.load_all()
+            for rid in record_ids:
+                data.pop(rid, None)
+            _save(self.path, data)
+
+    def find(self, **criteria: Any) -> list[dict[str, Any]]:
+        return [r for r in self.load_all().values() if _matches(r, criteria)]
+
+    def update(self, record_id: str, changes: dict[str, Any]) -> dict[str, Any] | None:
+        with _file_lock(self.path):
+            data = self.load_all()
+            record = data.get(record_id)
+            if record is None:
+                return None
+            record.update(changes)
+            _save(self.path, data)
+            return record
+
+    def expired_ids(self, now: float) -> list[str]:
+        return _expired_in(self.load_all(), self.ttl_seconds, now)
+
+    def over_cap_ids(self, field: str, cap: int) -> list[str]:
+        return _over_cap_in(self.load_all(), field, cap, self.ttl_seconds)
+
+    def archive(self, records: dict[str, Any]) -> None:
+        if records:
+            _append_archive(self.path.with_name(f"{self.name}.archive.jsonl"), records)
+
+
+class SQLiteCollection:
+    """
+    One table per collection: (id PRIMARY KEY, data JSON, updated_at,
+    expires_at, *index_fields). `index_fields` are record keys mirrored into
+    indexed columns so lookups and retention queries don't parse every row.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        db_path: Path,
+        legacy_json: Path | None = None,
+        index_fields: tuple[str, ...] = (),
+        ttl_seconds: float | None = None,
+    ):
+        self.name = name
+        self.db_path = db_path
+        self.legacy_json = legacy_json
+        self.index_fields = index_fields
+        self.ttl_seconds = ttl_seconds
+        self._columns = ("id", "data", "updated_at", "expires_at", *index_fields)
+        self._upsert_sql = (
+            f"INSERT OR REPLACE INTO {name} ({', '.join(self._columns)}) "
+            f"VALUES ({', '.join('?' * len(self._columns))})"
+        )
+        self._ready = False
+        self._init_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = sqlite_connection(self.db_path)
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready:
+                    self._init_schema(conn)
+                    self._ready = True
+        return conn
+
+    def _row(self, record_id: str, record: Any, now: float) -> tuple:
+        values = []
+        for field in self.index_fields:
+            value = record.get(field) if isinstance(record, dict) else None
+            values.append(int(value) if isinstance(value, bool) else value)
+        return (record_id, dumps_record(record), now, _expiry(record, self.ttl_seconds), *values)
+
+    def _init_schema(self, conn: sqlite3.Connection) -> None:
+        with _Transaction(conn):
+            extra = "".join(f", {field}" for field in self.index_fields)
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.name} ("
+                f"id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL, expires_at REAL{extra})"
+            )
+            # Tables created before a column existed get it added and backfilled.
+            present = {row[1] for row in conn.execute(f"PRAGMA table_info({self.name})")}
+            missing = [c for c in self._columns if c not in present]
+            for column in missing:
+                conn.execute(f"ALTER TABLE {self.name} ADD COLUMN {column}")
+            if missing:
+                rows = conn.execute(f"SELECT id, data, updated_at FROM {self.name}").fetchall()
+                conn.executemany(
+                    self._upsert_sql, [self._row(rid, loads(data), ts) for rid, data, ts in rows],
+                )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.name}_expires_at ON {self.name} (expires_at)")
+            for field in self.index_fields:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {self.name}_{field} ON {self.name} ({field})")
+
+            conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT)")
+            marker = f"imported:{self.name}"
+            done = conn.execute("SELECT 1 FROM store_meta WHERE key = ?", (marker,)).fetchone()
+            if not done:
+                # One-time import of the legacy JSON document, if any.
+                legacy = _load(self.legacy_json) if self.legacy_json else {}
+                now = time.time()
+                conn.executemany(
+                    self._upsert_sql.replace("OR REPLACE", "OR IGNORE"),
+                    [self._row(k, v, now) for k, v in legacy.items()],
+                )
+                conn.execute("INSERT INTO store_meta (key, value) VALUES (?, ?)", (marker, str(now)))
+
+    def load_all(self) -> dict[str, Any]:
+        rows = self._conn().execute(f"SELECT id, data FROM {self.name}").fetchall()
+        return {rid: loads(data) for rid, data in rows}
+
+    def save_all(self, data: dict[str, Any]) -> None:
+        """Make the table equal *data*, writing only rows that changed."""
+        conn = self._conn()
+        now = time.time()
+        with _Transaction(conn):
+            existing = dict(conn.execute(f"SELECT id, data FROM {self.name}").fetchall())
+            changed = [
+                self._row(rid, record, now)
+                for rid, record in data.items()
+                if existing.get(rid) != dumps_record(record)
+            ]
+            removed = [(rid,) for rid in existing.keys() - data.keys()]
+            if changed:
+                conn.executemany(self._upsert_sql, changed)
+            if removed:
+                conn.executemany(f"DELETE FROM {self.name} WHERE id = ?", removed)
+
+    def get(self, record_id: str) -> dict[str, Any] | None:
+        row = self._conn().execute(f"SELECT data FROM {self.name} WHERE id = ?", (record_id,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def get_many(self, record_ids: Iterable[str]) -> dict[str, Any]:
+        ids = list(dict.fromkeys(record_ids))
+        conn = self._conn()
+        found: dict[str, Any] = {}
+        # Stay under SQLite's bound-parameter limit.
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = conn.execute(f"SELECT id, data FROM {self.name} WHERE id IN ({marks})", chunk).fetchall()
+            found.update((rid, loads(data)) for rid, data in rows)
+        return found
+
+    def upsert(self, record_id: str, record: dict[str, Any]) -> None:
+        self.upsert_many({record_id: record})
+
+    def upsert_many(self, records: dict[str, Any]) -> None:
+        if not records:
+            return
+        conn = self._conn()
+        now = time.time()
+        with _Transaction(conn):
+            conn.executemany(self._upsert_sql, [self._row(rid, r, now) for rid, r in records.items()])
+
+    def delete_many(self, record_ids: Iterable[str]) -> None:
+        conn = self._conn()
+        with _Transaction(conn):
+            conn.executemany(f"DELETE FROM {self.name} WHERE id = ?", [(rid,) for rid in record_ids])
+
+    def find(self, **criteria: Any) -> list[dict[str, Any]]:
+        """Records whose fields equal *criteria*, in insertion order; indexed fields filter in SQL."""
+        indexed = {k: v for k, v in criteria.items() if k in self.index_fields}
+        rest = {k: v for k, v in criteria.items() if k not in indexed}
+        where = " AND ".join(f"{k} IS ?" for k in indexed) or "1"
+        params = [int(v) if isinstance(v, bool) else v for v in indexed.values()]
+        rows = self._conn().execute(
+            f"SELECT data FROM {self.name} WHERE {where} ORDER BY rowid", params,
+        ).fetchall()
+        records = [loads(row[0]) for row in rows]
+        return [r for r in records if _matches(r, rest)] if rest else records
+
+    def update(self, record_id: str, changes: dict[str, Any]) -> dict[str, Any] | None:
+        """Merge *changes* into one record in place; None if it doesn't exist."""
+        conn = self._conn()
+        with _Transaction(conn):
+            row = conn.execute(f"SELECT data FROM {self.name} WHERE id = ?", (record_id,)).fetchone()
+            if row is None:
+                return None
+            record = loads(row[0])
+            record.update(changes)
+            values = self._row(record_id, record, time.time())
+            columns = self._columns[1:]
+            conn.execute(
+                f"UPDATE {self.name} SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?",
+                (*values[1:], record_id),
+            )
+            return record
+
+    def expired_ids(self, now: float) -> list[str]:
+        rows = self._conn().execute(
+            f"SELECT id FROM {self.name} WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def over_cap_ids(self, field: str, cap: int) -> list[str]:
+        if field not in self.index_fields:
+            return _over_cap_in(self.load_all(), field, cap, self.ttl_seconds)
+        rows = self._conn().execute(
+            f"""
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY {field} ORDER BY expires_at DESC, id DESC
+                ) AS rank
+                FROM {self.name} WHERE {field} IS NOT NULL
+            ) WHERE rank > ?
+            """,
+            (cap,),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def archive(self, records: dict[str, Any]) -> None:
+        if not records:
+            return
+        conn = self._conn()
+        now = time.time()
+        with _Transaction(conn):
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.name}_archive "
+                "(id TEXT PRIMARY KEY, data TEXT NOT NULL, archived_at REAL NOT NULL)"
+            )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.name}_archive (id, data, archived_at) VALUES (?, ?, ?)",
+                [(rid, dumps_record(record), now) for rid, record in records.items()],
+            )
+
+
+class WriteBehindCollection:
+    """
+    In-memory authoritative map in front of a durable collection.
+
+    Reads and writes hit memory only; a background thread persists dirty ids
+    in one batch at most every STORE_FLUSH_INTERVAL_SECONDS, and `flush()`
+    (called on shutdown) writes out whatever is left. Writes not yet flushed are
+    lost if the process dies, and other processes don't see them until the
+    flush — run one worker per store in this mode.
+    """
+
+    def __init__(self, backing: JsonCollection | SQLiteCollection, flush_interval: float):
+        self.name = backing.name
+        self.backing = backing
+        self.flush_interval = flush_interval
+        self._data: dict[str, Any] | None = None
+        # field → value → ids (a dict used as an insertion-ordered set),
+        # for the backing collection's index_fields
+        self._index: dict[str, dict[Any, dict[str, None]]] = {}
+        self._dirty: set[str] = set()
+        self._deleted: set[str] = set()
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.flushes = 0
+
+    def _map(self) -> dict[str, Any]:
+        """Caller holds the lock."""
+        if self._data is None:
+            self._data = self.backing.load_all()
+            self._rebuild_index()
+        return self._data
+
+    def _rebuild_index(self) -> None:
+        """Caller holds the lock."""
+        self._index = {field: {} for field in self.backing.index_fields}
+        for rid, record in self._data.items():
+            self._index_add(rid, record)
+
+    def _index_add(self, record_id: str, record: Any, fields: Iterable[str] | None = None) -> None:
+        if not isinstance(record, dict):
+            return
+        for field in self._index if fields is None else fields:
+            self._index[field].setdefault(record.get(field), {})[record_id] = None
+
+    def _index_remove(self, record_id: str, record: Any, fields: Iterable[str] | None = None) -> None:
+        if not isinstance(record, dict):
+            return
+        for field in self._index if fields is None else fields:
+            by_value = self._index[field]
+            ids = by_value.get(record.get(field))
+            if ids is not None:
+                ids.pop(record_id, None)
+                if not ids:
+                    del by_value[record.get(field)]
+
+    def _mark(self, ids: Iterable[str], deleted: bool = False) -> None:
+        """Caller holds the lock."""
+        for rid in ids:
+            if deleted:
+                self._dirty.discard(rid)
+                self._deleted.add(rid)
+            else:
+                self._deleted.discard(rid)
+                self._dirty.add(rid)
+        self._start()
+
+    def load_all(self) -> dict[str, Any]:
+        with self._lock:
+            return dict(self._map())
+
+    def save_all(self, data: dict[str, Any]) -> None:
+        with self._lock:
+            current = self._map()
+            removed = current.keys() - data.keys()
+            changed = [rid for rid, record in data.items() if current.get(rid) != record]
+            self._data = dict(data)
+            self._rebuild_index()
+            self._mark(removed, deleted=True)
+            self._mark(changed)
+
+    def get(self, record_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            return self._map().get(record_id)
+
+    def get_many(self, record_ids: Iterable[str]) -> dict[str, Any]:
+        with self._lock:
+            data = self._map()
+            return {rid: data[rid] for rid in record_ids if rid in data}
+
+    def upsert(self, record_id: str, record: dict[str, Any]) -> None:
+        self.upsert_many({record_id: record})
+
+    def upsert_many(self, records: dict[str, Any]) -> None:
+        if not records:
+            return
+        with self._lock:
+            data = self._map()
+            for rid, record in records.items():
+                if rid in data:
+                    self._index_remove(rid, data[rid])
+                data[rid] = record
+                self._index_add(rid, record)
+            self._mark(records.keys())
+
+    def delete_many(self, record_ids: Iterable[str]) -> None:
+        with self._lock:
+            data = self._map()
+            ids = []
+            for rid in record_ids:
+                record = data.pop(rid, None)
+                if record is not None:
+                    self._index_remove(rid, record)
+                    ids.append(rid)
+            self._mark(ids, deleted=True)
+
+    def find(self, **criteria: Any) -> list[dict[str, Any]]:
+        with self._lock:
+            data = self._map()
+            indexed = [k for k in criteria if k in self._index]
+            if not indexed:
+                return [r for r in data.values() if _matches(r, criteria)]
+            # Check the smallest candidate set against the full criteria.
+            candidates = min((self._index[k].get(criteria[k], {}) for k in indexed), key=len)
+            return [data[rid] for rid in candidates if _matches(data[rid], criteria)]
+
+    def update(self, record_id: str, changes: dict[str, Any]) -> dict[str, Any] | None:
+        with self._lock:
+            data = self._map()
+            record = data.get(record_id)
+            if record is None:
+                return None
+            moved = [f for f in self._index if f in changes and changes[f] != record.get(f)]
+            self._index_remove(record_id, record, moved)
+            record.update(changes)
+            self._index_add(record_id, record, moved)
+            self._mark([record_id])
+            return record
+
+    def expired_ids(self, now: float) -> list[str]:
+        with self._lock:
+            return _expired_in(self._map(), self.backing.ttl_seconds, now)
+
+    def over_cap_ids(self, field: str, cap: int) -> list[str]:
+        with self._lock:
+            return _over_cap_in(self._map(), field, cap, self.backing.ttl_seconds)
+
+    def archive(self, records: dict[str, Any]) -> None:
+        self.backing.archive(records)
+
+    def flush(self) -> int:
+        """Persist pending writes now; returns how many ids were written or deleted."""
+        with self._flush_lock:
+            with self._lock:
+                if not (self._dirty or self._deleted):
+                    return 0
+                data = self._map()
+                upserts = {rid: data[rid] for rid in self._dirty}
+                deletes = list(self._deleted)
+                self._dirty.clear()
+                self._deleted.clear()
+            try:
+                if upserts:
+                    self.backing.upsert_many(upserts)
+                if deletes:
+                    self.backing.delete_many(deletes)
+            except Exception:
+                # Put them back (unless rewritten meanwhile) so the next flush retries.
+                with self._lock:
+                    self._dirty.update(rid for rid in upserts if rid not in self._deleted)
+                    self._deleted.update(rid for rid in deletes if rid not in self._dirty)
+                raise
+            self.flushes += 1
+            return len(upserts) + len(deletes)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._dirty) + len(self._deleted)
+
+    def _start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f"store-flush-{self.name}", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                pass  # retried on the next tick; flush() kept the ids dirty
+
+
+Collection = JsonCollection | SQLiteCollection | WriteBehindCollection
+
+
+def _collection(
+    name: str,
+    legacy_json: Path,
+    index_fields: tuple[str, ...] = (),
+    ttl_seconds: float | None = None,
+) -> Collection:
+    backing: JsonCollection | SQLiteCollection
+    if STORE_BACKEND == "json":
+        backing = JsonCollection(name, legacy_json, index_fields=index_fields, ttl_seconds=ttl_seconds)
+    else:
+        backing = SQLiteCollection(
+            name, STORE_DB_PATH, legacy_json=legacy_json, index_fields=index_fields, ttl_seconds=ttl_seconds,
+        )
+    if STORE_WRITE_MODE == "write_behind":
+        return WriteBehindCollection(backing, STORE_FLUSH_INTERVAL_SECONDS)
+    return backing
+
+
+trip_searches = _collection("trip_searches", TRIP_SEARCHES_FILE)
+alerts = _collection("alerts", ALERTS_FILE, index_fields=("trip_search_id", "enabled"))
+recommendations = _collection(
+    "recommendations", RECOMMENDATIONS_FILE,
+    index_fields=("trip_search_id",), ttl_seconds=RECO_TTL_SECONDS or None,
+)
+COLLECTIONS: dict[str, Collection] = {
+    c.name: c for c in (trip_searches, alerts, recommendations)
+}
+
+
+def enabled_alerts(trip_search_id: str | None = None) -> list[dict[str, Any]]:
+    """Enabled alerts (optionally for one trip search) — what an alert evaluator polls."""
+    if trip_search_id is None:
+        return alerts.find(enabled=True)
+    return alerts.find(trip_search_id=trip_search_id, enabled=True)
+
+
+def flush_all() -> None:
+    """Persist pending write-behind writes (no-op in sync mode)."""
+    for collection in COLLECTIONS.values():
+        if isinstance(collection, WriteBehindCollection):
+            collection.flush()
+
+
+# ── Retention ─────────────────────────────────────────────────────────────────
+
+_compactor: threading.Thread | None = None
+_compactor_stop = threading.Event()
+
+
+def compact(
+    collection: Collection,
+    group_field: str | None = None,
+    max_per_group: int = 0,
+    mode: str = "drop",
+    now: float | None = None,
+) -> dict[str, int]:
+    """Remove expired records and records beyond the per-group cap; archive them first if asked."""
+    now = time.time() if now is None else now
+    expired = set(collection.expired_ids(now))
+    over_cap = set()
+    if group_field and max_per_group > 0:
+        over_cap = set(collection.over_cap_ids(group_field, max_per_group)) - expired
+    doomed = expired | over_cap
+    if doomed:
+        if mode == "archive":
+            collection.archive(collection.get_many(doomed))
+        collection.delete_many(doomed)
+    return {"expired": len(expired), "over_cap": len(over_cap)}
+
+
+def compact_all(now: float | None = None) -> dict[str, dict[str, int]]:
+    return {
+        recommendations.name: compact(
+            recommendations, "trip_search_id", RECO_MAX_PER_TRIP, RECO_RETENTION_MODE, now,
+        ),
+    }
+
+
+def start_compactor() -> None:
+    """Compact now and then every STORE_COMPACT_INTERVAL_SECONDS (idempotent)."""
+    global _compactor
+    if STORE_COMPACT_INTERVAL_SECONDS <= 0 or (_compactor is not None and _compactor.is_alive()):
+        return
+    _compactor_stop.clear()
+    _compactor = threading.Thread(target=_compact_forever, name="store-compactor", daemon=True)
+    _compactor.start()
+
+
+def stop_compactor() -> None:
+    _compactor_stop.set()
+
+
+def _compact_forever() -> None:
+    while not _compactor_stop.is_set():
+        try:
+            compact_all()
+        except Exception:
+            pass  # e.g. database busy; try again next interval
+        _compactor_stop.wait(STORE_COMPACT_INTERVAL_SECONDS)
 
 
 def load_trip_searches() -> dict[str, Any]:
-    return _load(TRIP_SEARCHES_FILE)
+    return trip_searches.load_all()
 
 
 def save_trip_searches(data: dict[str, Any]) -> None:
-    _save(TRIP_SEARCHES_FILE, data)
+    trip_searches.save_all(data)
 
 
 def load_alerts() -> dict[str, Any]:
-    return _load(ALERTS_FILE)
+    return alerts.load_all()
 
 
 def save_alerts(data: dict[str, Any]) -> None:
-    _save(ALERTS_FILE, data)
+    alerts.save_all(data)
 
 
 def load_recommendations() -> dict[str, Any]:
-    return _load(RECOMMENDATIONS_FILE)
+    return recommendations.load_all()
 
 
 def save_recommendations(data: dict[str, Any]) -> None:
-    _save(RECOMMENDATIONS_FILE, data)
+    recommendations.save_all(data)
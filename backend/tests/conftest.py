@@ -0,0 +1,128 @@
+"""
+Shared test setup: the backend package on sys.path, stores and caches in a
+throwaway directory, no background sweepers, and a local fake upstream for
+the provider adapters.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="pointpilot-tests-")
+os.environ.setdefault("STORE_DB_PATH", str(Path(_TMP) / "store.sqlite3"))
+os.environ.setdefault("PROVIDER_CACHE_PATH", str(Path(_TMP) / "provider_cache.sqlite3"))
+os.environ.setdefault("AMADEUS_TOKEN_PATH", str(Path(_TMP) / "amadeus_token.json"))
+os.environ.setdefault("CACHE_SWEEP_INTERVAL_SECONDS", "0")
+os.environ.setdefault("STORE_COMPACT_INTERVAL_SECONDS", "0")
+for _name in ("SEATS_AERO_API_KEY", "AMADEUS_CLIENT_ID", "AMADEUS_CLIENT_SECRET"):
+    os.environ.pop(_name, None)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class FakeUpstream:
+    """Seats.aero + Amadeus stand-in: canned payloads, per-path hit counts."""
+
+    def __init__(self) -> None:
+        self.hits: dict[str, int] = {}
+        self.delay = 0.0
+        self._lock = threading.Lock()
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send(self, obj: dict) -> None:
+                body = json.dumps(obj).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                upstream.hit("/auth")
+                self._send({"access_token": "test-token", "expires_in": 1799})
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                upstream.hit(url.path)
+                time.sleep(upstream.delay)
+                self._send(upstream.payload(url.path, parse_qs(url.query)))
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self._server.server_port}"
+
+    def hit(self, path: str) -> None:
+        with self._lock:
+            self.hits[path] = self.hits.get(path, 0) + 1
+
+    @staticmethod
+    def payload(path: str, query: dict[str, list[str]]) -> dict:
+        if path == "/search":
+            return {"data": [{
+                "ID": "avail-1", "Date": "2026-07-05", "YAvailable": True, "YMileageCostRaw": 25000,
+                "YTotalTaxesRaw": 8600, "Source": "aeroplan", "YAirlines": "AC",
+                "UpdatedAt": "2026-07-01T00:00:00Z",
+            }]}
+        if path == "/trips":
+            return {"data": [{"FlightNumber": "AC123", "OperatingCarrier": "AC"}]}
+        if path == "/flights":
+            return {"data": [{
+                "price": {"grandTotal": "1000.50"},
+                "itineraries": [{"duration": "PT7H50M", "segments": [{"carrierCode": "AC"}]}],
+            }]}
+        if path == "/hotels":
+            return {"data": [{"offers": [{"price": {"total": "900"}}, {"price": {"total": "750.5"}}]}]}
+        return {}
+
+    def close(self) -> None:
+        self._server.shutdown()
+
+
+@pytest.fixture(scope="session")
+def _upstream_server():
+    server = FakeUpstream()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def upstream(_upstream_server, monkeypatch):
+    """Providers pointed at the fake upstream with live credentials and cold caches."""
+    from app.adapters import providers
+
+    base = _upstream_server.base
+    monkeypatch.setattr(providers, "AMADEUS_AUTH_URL", base + "/auth")
+    monkeypatch.setattr(providers, "AMADEUS_FLIGHT_URL", base + "/flights")
+    monkeypatch.setattr(providers, "AMADEUS_HOTEL_URL", base + "/hotels")
+    monkeypatch.setattr(providers, "SEATS_AERO_SEARCH_URL", base + "/search")
+    monkeypatch.setattr(providers, "SEATS_AERO_TRIPS_URL", base + "/trips")
+    monkeypatch.setenv("SEATS_AERO_API_KEY", "test-key")
+    monkeypatch.setenv("AMADEUS_CLIENT_ID", "test-id")
+    monkeypatch.setenv("AMADEUS_CLIENT_SECRET", "test-secret")
+    for cache in (
+        providers._AWARD_CACHE, providers._AIRFARE_CACHE, providers._HOTEL_CACHE, providers._HOTEL_OFFERS_CACHE,
+    ):
+        cache.clear()
+    _upstream_server.hits.clear()
+    _upstream_server.delay = 0.0
+    yield _upstream_server
+    for cache in (
+        providers._AWARD_CACHE, providers._AIRFARE_CACHE, providers._HOTEL_CACHE, providers._HOTEL_OFFERS_CACHE,
+    ):
+        cache.clear()
@@ -0,0 +1,103 @@
+import random
+from collections import Counter
+
+from app import store
+from app.routers import recommendations as reco
+from app.services.allocation import allocate, allocate_batch
+
+CURRENCIES = ["MR", "CHASE", "CAP1", "BILT", "CITI", "MARRIOTT"]
+AIRLINES = ["Delta", "United", "Air France", "ANA", "JetBlue", "Unknown Air"]
+
+
+def _options(seed: int, n: int = 400) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "cash_flight": round(rng.uniform(150, 3000), 2),
+            "hotel_cash": round(rng.uniform(200, 2500), 2),
+            "taxes_fees": round(rng.uniform(5, 400), 2),
+            "hotel_fees_on_points": round(rng.uniform(0, 120), 2),
+            "flight_points_required": rng.choice([12000, 25000, 60000, 110000]),
+            "hotel_points_required": rng.choice([20000, 50000, 90000]),
+            "airline": rng.choice(AIRLINES),
+            "award_program": None,
+            "flight_allowed": rng.random() < 0.7,
+            "hotel_allowed": rng.random() < 0.7,
+            "balances": {c: rng.choice([0, 0, 3000, 25000, 80000, 200000]) for c in CURRENCIES},
+        }
+        for _ in range(n)
+    ]
+
+
+def test_allocations_are_fundable_and_cheapest():
+    for option in _options(1):
+        plan = allocate(**option)
+        redemption = plan["use_points_for"]
+        balances = option["balances"]
+
+        spent = Counter()
+        for t in plan["transfers"]:
+            spent[t["currency"]] += t["points"]
+        assert all(points <= balances.get(currency, 0) for currency, points in spent.items())
+
+        flight_miles = sum(t["miles"] for t in plan["transfers"] if t["purpose"] == "flight")
+        hotel_points = sum(t["miles"] for t in plan["transfers"] if t["purpose"] == "hotel")
+        if redemption in ("flight", "both"):
+            assert option["flight_allowed"]
+            assert flight_miles >= option["flight_points_required"]
+        else:
+            assert flight_miles == 0
+        if redemption in ("hotel", "both"):
+            assert option["hotel_allowed"]
+            assert hotel_points >= option["hotel_points_required"]
+        else:
+            assert hotel_points == 0
+
+        oop = {
+            "none": option["cash_flight"] + option["hotel_cash"],
+            "flight": option["taxes_fees"] + option["hotel_cash"],
+            "hotel": option["cash_flight"] + option["hotel_fees_on_points"],
+            "both": option["taxes_fees"] + option["hotel_fees_on_points"],
+        }
+        assert plan["oop_total"] == round(oop[redemption], 2)
+        # No fundable alternative is cheaper.
+        for alternate in plan["alternates"]:
+            assert alternate not in ("none", redemption)
+            assert round(oop[alternate], 2) >= plan["oop_total"]
+
+
+def test_empty_balances_pay_cash():
+    option = _options(2, n=1)[0]
+    option.update(balances={}, flight_allowed=True, hotel_allowed=True)
+    plan = allocate(**option)
+    assert plan["use_points_for"] == "none"
+    assert plan["transfers"] == [] and plan["alternates"] == []
+
+
+def test_batch_matches_per_option_allocation():
+    options = _options(3, n=200)
+    balances = options[0]["balances"]
+    columns = {k: [o[k] for o in options] for k in options[0] if k != "balances"}
+    batch = allocate_batch(**columns, balances=balances)
+    assert batch == [allocate(**{**o, "balances": balances}) for o in options]
+
+
+def test_estimated_awards_are_never_booked_on_points():
+    # No live award source configured: every award is an estimate, so only the
+    # hotel may be paid with points.
+    trip_search_id = "alloc-estimated"
+    store.trip_searches.upsert(trip_search_id, {"id": trip_search_id, "payload": {
+        "origins": ["JFK"],
+        "date_window_start": "2026-10-01",
+        "date_window_end": "2026-10-10",
+        "duration_nights": 4,
+        "travelers": 1,
+        "balances": [{"program": "MR", "balance": 400000}, {"program": "MARRIOTT", "balance": 200000}],
+        "constraints": {"max_travel_hours": 14, "max_stops": 1},
+    }})
+    reco._RECO_CACHE.clear()
+    bundle = reco.generate_recommendations(reco.GenerateRequest(trip_search_id=trip_search_id))
+    assert bundle.options
+    for option in bundle.options:
+        assert option.points_strategy in ("hotel", "none")
+        assert all(t.purpose == "hotel" for t in option.points_allocation)
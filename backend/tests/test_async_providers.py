@@ -0,0 +1,80 @@
+import asyncio
+
+from app.adapters import http, providers
+from app.adapters.providers import (
+    AirfareProvider,
+    AsyncAirfareProvider,
+    AsyncAwardProvider,
+    AsyncHotelProvider,
+    AwardProvider,
+    HotelProvider,
+)
+
+AWARD_ARGS = ("IAD", "YYZ", 2)
+AWARD_KWARGS = {"depart_date": "2026-07-05", "return_date": "2026-07-10"}
+AIRFARE_ARGS = ("IAD", "YYZ", 2, "2026-07-05", "2026-07-10")
+HOTEL_ARGS = ("YYZ", 5, 2)
+
+
+def _without_timestamps(quote: dict) -> dict:
+    return {k: v for k, v in quote.items() if k not in ("retrieved_at", "retrieved_at_ts", "as_of", "age_seconds")}
+
+
+def _clear_provider_caches() -> None:
+    for cache in (
+        providers._AWARD_CACHE, providers._AIRFARE_CACHE, providers._HOTEL_CACHE, providers._HOTEL_OFFERS_CACHE,
+    ):
+        cache.clear()
+
+
+async def _search_all() -> tuple[dict, dict, dict]:
+    return await asyncio.gather(
+        AsyncAwardProvider().search(*AWARD_ARGS, **AWARD_KWARGS),
+        AsyncAirfareProvider().search(*AIRFARE_ARGS),
+        AsyncHotelProvider().search(*HOTEL_ARGS),
+    )
+
+
+def test_async_providers_match_sync_providers(upstream):
+    sync_quotes = (
+        AwardProvider().search(*AWARD_ARGS, **AWARD_KWARGS),
+        AirfareProvider().search(*AIRFARE_ARGS),
+        HotelProvider().search(*HOTEL_ARGS),
+    )
+    _clear_provider_caches()
+    async_quotes = asyncio.run(_search_all())
+
+    assert async_quotes[0]["source"] == "seats_aero_live"
+    assert async_quotes[2]["source"] == "amadeus_test"
+    assert [_without_timestamps(q) for q in async_quotes] == [_without_timestamps(q) for q in sync_quotes]
+
+
+def test_async_concurrent_searches_share_one_upstream_call(upstream):
+    upstream.delay = 0.2
+
+    async def burst() -> list[dict]:
+        return await asyncio.gather(*(AsyncAwardProvider().search(*AWARD_ARGS, **AWARD_KWARGS) for _ in range(5)))
+
+    quotes = asyncio.run(burst())
+    assert upstream.hits["/search"] == 1
+    assert all(q == quotes[0] for q in quotes)
+
+
+def test_async_clients_are_per_event_loop(upstream):
+    first = asyncio.run(_search_all())
+    _clear_provider_caches()
+    # A client bound to the first (now closed) loop must not be reused here.
+    second = asyncio.run(_search_all())
+
+    assert first[0]["source"] == second[0]["source"] == "seats_aero_live"
+    assert upstream.hits["/search"] == 2
+
+
+def test_aclose_async_clients_closes_the_running_loops_clients(upstream):
+    async def open_and_close() -> bool:
+        client = http.get_async_client(upstream.base + "/search")
+        assert http.get_async_client(upstream.base + "/trips") is client
+        await http.aclose_async_clients()
+        return client.is_closed
+
+    assert asyncio.run(open_and_close())
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from app.services import batch_scoring, scoring
+from app.services.batch_scoring import score_allocated_batch, score_cash_batch, score_points_batch
+from app.services.valuation import compute_confidence
+
+N = 2000
+WEIGHTS = [None, {"w1": 0.05, "w2": 0.9, "w3": 0.05}]
+
+
+@pytest.fixture(params=["numpy", "loop"])
+def engine(request, monkeypatch):
+    """Run each parity test on the NumPy path and on the scalar fallback."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(batch_scoring, "np", None)
+    return request.param
+
+
+def _quotes(seed: int) -> dict[str, list]:
+    rng = random.Random(seed)
+    return {
+        "cash_flight": [round(rng.uniform(80, 4000), 2) for _ in range(N)],
+        "hotel_cash": [round(rng.uniform(0, 3000), 2) for _ in range(N)],
+        "hotel_fees": [round(rng.uniform(0, 150), 2) for _ in range(N)],
+        "hotel_points": [rng.choice([0, 1, 15000, 40000, 120000]) for _ in range(N)],
+        "flight_points": [rng.choice([0, 1, 10000, 30000, 90000]) for _ in range(N)],
+        "taxes": [round(rng.uniform(0, 900), 2) for _ in range(N)],
+        "live": [rng.random() < 0.5 for _ in range(N)],
+        "friction": [rng.uniform(0, 12) for _ in range(N)],
+        "source": [rng.choice(["seats_aero_live", "amadeus_test", "award_estimator_mvp"]) for _ in range(N)],
+        "age": [rng.choice([60.0, 3600.0, 9000.0]) for _ in range(N)],
+        "exact": [rng.random() < 0.3 for _ in range(N)],
+    }
+
+
+@pytest.mark.parametrize("weights", WEIGHTS)
+def test_cash_batch_matches_scalar(engine, weights):
+    q = _quotes(1)
+    batch = score_cash_batch(q["cash_flight"], q["hotel_cash"], q["friction"], weights=weights)
+    scalar = [
+        scoring.score_cash_option(cf, hc, fr, weights)
+        for cf, hc, fr in zip(q["cash_flight"], q["hotel_cash"], q["friction"])
+    ]
+    assert batch["oop_total"] == [s["oop_total"] for s in scalar]
+    assert batch["score"] == [s["score"] for s in scalar]
+
+
+@pytest.mark.parametrize("weights", WEIGHTS)
+def test_points_batch_matches_scalar(engine, weights):
+    q = _quotes(2)
+    batch = score_points_batch(
+        q["cash_flight"], q["hotel_cash"], q["hotel_fees"], q["hotel_points"], q["flight_points"], q["taxes"],
+        q["live"], q["friction"], award_source=q["source"], age_seconds=q["age"], exact_flight_match=q["exact"],
+        weights=weights,
+    )
+    for r in range(N):
+        s = scoring.score_points_option(
+            q["cash_flight"][r], q["hotel_cash"][r], q["hotel_fees"][r], q["hotel_points"][r],
+            q["flight_points"][r], q["taxes"][r], q["live"][r], q["friction"][r], weights=weights,
+        )
+        for key in ("cpp_flight", "cpp_hotel", "hotel_cpp_ok", "use_points_for", "oop_total", "cpp_blended", "score"):
+            assert batch[key][r] == s[key], (key, r)
+        assert batch["has_alternates"][r] == bool(s["points_strategy_alternates"])
+        tier_score, tier = compute_confidence(q["age"][r], q["exact"][r], batch["tax_confidence"][r], q["source"][r])
+        assert (batch["confidence_score"][r], batch["confidence_tier"][r]) == (tier_score, tier)
+
+
+@pytest.mark.parametrize("weights", WEIGHTS)
+def test_allocated_batch_matches_scalar(engine, weights):
+    rng = random.Random(3)
+    cpp_flight = [rng.uniform(-2, 8) for _ in range(N)]
+    cpp_hotel = [rng.uniform(-2, 8) for _ in range(N)]
+    live = [rng.random() < 0.5 for _ in range(N)]
+    redeem = [rng.choice(["flight", "hotel", "both", "none"]) for _ in range(N)]
+    oop = [round(rng.uniform(0, 5000), 2) for _ in range(N)]
+    friction = [rng.uniform(0, 12) for _ in range(N)]
+
+    batch = score_allocated_batch(cpp_flight, cpp_hotel, live, redeem, oop, friction, weights=weights)
+    scalar = [
+        scoring.score_allocated_option(*row, weights)
+        for row in zip(cpp_flight, cpp_hotel, live, redeem, oop, friction)
+    ]
+    assert batch["cpp_blended"] == [s["cpp_blended"] for s in scalar]
+    assert batch["score"] == [s["score"] for s in scalar]
+
+
+def test_redeemed_cpp_follows_the_redemption():
+    assert scoring.redeemed_cpp(3.0, 1.5, False, "none") == 0.0
+    assert scoring.redeemed_cpp(3.0, 1.5, False, "hotel") == 1.5
+    assert scoring.redeemed_cpp(3.0, 1.5, False, "flight") == 3.0
+    assert scoring.redeemed_cpp(3.0, 1.5, True, "flight") == 3.15
+    assert scoring.redeemed_cpp(3.0, 1.5, True, "both") == 2.4
+    assert scoring.redeemed_cpp(9.0, 9.0, True, "both") == scoring.CPP_CAP
@@ -0,0 +1,166 @@
+import random
+import threading
+import time
+
+import pytest
+
+from app import cache as cache_module
+from app.cache import CACHES, TTLCache
+
+
+@pytest.fixture
+def make_cache():
+    """TTLCache factory; test caches are unregistered afterwards."""
+    made: list[str] = []
+
+    def make(name: str, ttl_seconds: float = 60.0, **kwargs) -> TTLCache:
+        made.append(f"test_{name}")
+        return TTLCache(f"test_{name}", ttl_seconds, **kwargs)
+
+    yield make
+    for name in made:
+        CACHES.pop(name, None)
+
+
+def test_lru_eviction_keeps_recently_used_entries(make_cache):
+    c = make_cache("lru", max_entries=3)
+    for key in "abc":
+        c.set(key, key)
+    assert c.get("a") == "a"  # a is now most recently used
+    c.set("d", "d")
+    assert c.get("b") is None
+    assert [c.get(k) for k in "acd"] == ["a", "c", "d"]
+    assert c.stats()["evictions"] == 1
+
+
+def test_byte_limit_evicts_oldest(make_cache):
+    c = make_cache("bytes", max_bytes=250)
+    for i in range(10):
+        c.set(str(i), "x" * 50)
+    assert c.stats()["bytes"] <= 250
+    assert c.get("9") is not None and c.get("0") is None
+
+
+def test_ttl_expiry(make_cache):
+    c = make_cache("ttl", ttl_seconds=0.05)
+    c.set("k", 1)
+    assert c.get("k") == 1
+    time.sleep(0.08)
+    assert c.get("k") is None
+    assert c.stats()["expirations"] == 1
+
+
+def test_expired_entries_are_reclaimed_before_live_ones(make_cache):
+    c = make_cache("reclaim", max_entries=2)
+    c.set("old", 1, ttl_seconds=0.01)
+    c.set("live", 2)
+    time.sleep(0.03)
+    c.set("new", 3)
+    assert c.get("live") == 2 and c.get("new") == 3
+    assert c.stats()["evictions"] == 0
+
+
+class _EvictBetweenSections:
+    """RLock stand-in that removes *key* right before the second acquisition."""
+
+    def __init__(self, target: TTLCache, key: str):
+        self._lock = threading.RLock()
+        self._target, self._key, self._entries = target, key, 0
+
+    def __enter__(self):
+        self._entries += 1
+        if self._entries == 2:
+            with self._lock:
+                self._target._drop(self._key)
+        return self._lock.__enter__()
+
+    def __exit__(self, *exc):
+        return self._lock.__exit__(*exc)
+
+
+def test_get_stale_survives_removal_between_lookup_and_touch(make_cache):
+    c = make_cache("race")
+    c.set("k", "v")
+    c._lock = _EvictBetweenSections(c, "k")
+    assert c.get_stale("k") == ("v", False)
+
+
+def test_eviction_under_concurrency(make_cache):
+    c = make_cache("concurrent", ttl_seconds=0.02, max_entries=50, grace_seconds=0.02)
+    errors: list[BaseException] = []
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        try:
+            for _ in range(3000):
+                key = str(rng.randrange(200))
+                op = rng.random()
+                if op < 0.4:
+                    c.set(key, {"v": key * rng.randrange(1, 5)})
+                elif op < 0.6:
+                    c.delete(key)
+                elif op < 0.7:
+                    c.purge_expired()
+                else:
+                    c.get_stale(key)
+        except BaseException as exc:  # surfaced below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len(c) <= c.max_entries
+    assert c.stats()["bytes"] == sum(entry[2] for entry in c._data.values())
+
+
+def test_grace_window_serves_stale_entries(make_cache):
+    c = make_cache("grace", ttl_seconds=0.05, grace_seconds=0.2)
+    c.set("k", "v")
+    assert c.get_stale("k") == ("v", False)
+    time.sleep(0.08)
+    assert c.get("k") is None  # get never returns a stale entry
+    assert c.get_stale("k") == ("v", True)
+    assert c.peek("k") == "v"
+    time.sleep(0.2)
+    assert c.get_stale("k") is None
+    stats = c.stats()
+    assert (stats["hits"], stats["stale_hits"]) == (1, 1)
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path, monkeypatch):
+    """Persistent caches write through to a fresh SQLite file."""
+    monkeypatch.setattr(cache_module, "PROVIDER_CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(cache_module, "PROVIDER_CACHE_PATH", tmp_path / "provider_cache.sqlite3")
+    monkeypatch.setattr(cache_module, "_backend", None)
+    yield tmp_path / "provider_cache.sqlite3"
+
+
+def test_persistent_entries_are_shared_and_keep_their_expiry(make_cache, sqlite_backend):
+    worker_a = make_cache("shared", ttl_seconds=0.3, persistent=True)
+    worker_a.set("k", {"price": 10})
+    worker_b = make_cache("shared_b", ttl_seconds=0.3, persistent=True)
+    worker_b.name = worker_a.name  # another process's instance of the same cache
+
+    assert worker_b.get("k") == {"price": 10}
+    assert worker_b.stats()["backend"] == "sqlite"
+    time.sleep(0.35)
+    assert worker_b.get("k") is None  # the remaining TTL came along, not a fresh one
+
+
+def test_persistent_entries_survive_a_restart_and_are_purged(make_cache, sqlite_backend):
+    c = make_cache("restart", ttl_seconds=60, persistent=True)
+    c.set("live", 1)
+    c.set("expired", 2, ttl_seconds=-1)
+    cache_module._backend = None  # restart: new connection, empty memory
+    restarted = make_cache("restart", ttl_seconds=60, persistent=True)
+
+    assert restarted.get("live") == 1
+    assert restarted.get("expired") is None
+    assert restarted.purge_persistent() == 1
+    restarted.clear()
+    assert restarted.get("live") is None
@@ -0,0 +1,103 @@
+import time
+
+import httpx
+import pytest
+
+from app.adapters.circuit import BREAKERS, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def breaker():
+    b = CircuitBreaker("test-upstream", failure_threshold=3, slow_call_seconds=0.05, open_seconds=0.1)
+    yield b
+    BREAKERS.pop("test-upstream", None)
+
+
+def _fail():
+    raise ConnectionError("down")
+
+
+def _http_error(status: int):
+    def call():
+        request = httpx.Request("GET", "https://upstream.test")
+        raise httpx.HTTPStatusError("error", request=request, response=httpx.Response(status, request=request))
+    return call
+
+
+def _trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+
+
+def test_opens_after_consecutive_failures_and_short_circuits(breaker):
+    _trip(breaker)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "never runs")
+    assert breaker.snapshot()["short_circuited"] == 1
+
+
+def test_success_resets_the_failure_count(breaker):
+    for _ in range(5):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+        assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
+
+
+def test_client_errors_do_not_count_but_5xx_and_429_do(breaker):
+    for _ in range(5):
+        with pytest.raises(httpx.HTTPStatusError):
+            breaker.call(_http_error(404))
+    assert breaker.state == "closed"
+    for status in (500, 429, 503):
+        with pytest.raises(httpx.HTTPStatusError):
+            breaker.call(_http_error(status))
+    assert breaker.state == "open"
+
+
+def test_slow_calls_count_as_failures(breaker):
+    for _ in range(3):
+        breaker.call(lambda: time.sleep(0.06))
+    assert breaker.state == "open"
+
+
+def test_half_open_probe_closes_or_reopens(breaker):
+    _trip(breaker)
+    time.sleep(0.12)
+    assert breaker.state == "half_open"
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == "open"
+
+    time.sleep(0.12)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
+
+
+def test_half_open_admits_only_the_configured_probes(breaker):
+    _trip(breaker)
+    time.sleep(0.12)
+    breaker.before_call()  # probe in flight
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+
+
+def test_open_breaker_makes_providers_fall_back_to_the_estimator(upstream):
+    from app.adapters import providers
+    from app.adapters.providers import AirfareProvider
+
+    breaker = providers._AMADEUS_FLIGHTS_BREAKER
+    try:
+        for _ in range(breaker.failure_threshold):
+            breaker.record(False, 0.0)
+        quote = AirfareProvider().search("IAD", "YYZ", 2, "2026-07-05", "2026-07-10")
+        assert "/flights" not in upstream.hits
+        assert quote["source"] == "airfare_adapter_mock"
+    finally:
+        breaker.reset()
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from app.adapters.fanout import ProviderFanout
+
+
+@pytest.fixture
+def fanout():
+    pool = ProviderFanout(limits={"award": 2, "hotel": 2}, mode="concurrent")
+    yield pool
+    pool.shutdown()
+
+
+def test_saturated_provider_does_not_delay_others(fanout):
+    release = threading.Event()
+    awards = {i: fanout.submit("award", release.wait, 5) for i in range(10)}
+
+    started = time.monotonic()
+    hotel = fanout.submit("hotel", lambda: "hotel")
+    assert hotel.result(timeout=1) == "hotel"
+    assert time.monotonic() - started < 0.5
+
+    release.set()
+    results, missed = fanout.join(awards, timeout=2)
+    assert missed == set() and all(results.values())
+
+
+def test_provider_limit_caps_in_flight_calls(fanout):
+    in_flight, peak, lock = 0, 0, threading.Lock()
+
+    def call():
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+
+    results, missed = fanout.join({i: fanout.submit("award", call) for i in range(12)}, timeout=5)
+    assert len(results) == 12 and not missed
+    assert peak == 2
+
+
+def test_join_reports_calls_past_the_deadline(fanout):
+    pending = {"fast": fanout.submit("hotel", lambda: 1), "slow": fanout.submit("award", time.sleep, 0.5)}
+    results, missed = fanout.join(pending, timeout=0.1)
+    assert results == {"fast": 1}
+    assert missed == {"slow"}
+
+
+def test_sequential_mode_runs_inline_and_surfaces_errors():
+    pool = ProviderFanout(limits={"award": 1}, mode="sequential")
+    caller = threading.get_ident()
+    assert pool.submit("award", threading.get_ident).result() == caller
+
+    failed = pool.submit("award", lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        failed.result()
+
+
+def test_unconfigured_provider_gets_its_own_pool(fanout):
+    assert fanout.submit("weather", lambda: "ok").result(timeout=1) == "ok"
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from app.adapters import providers
+from app.adapters.providers import AirfareProvider, AsyncAirfareProvider, AsyncAwardProvider, AwardProvider
+
+AIRFARE_ARGS = ("IAD", "YYZ", 2, "2026-07-05", "2026-07-10")
+AWARD_KWARGS = {"depart_date": "2026-07-05", "return_date": "2026-07-10"}
+
+
+def _wait_for(predicate, timeout: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_stale_airfare_is_served_and_refreshed_in_background(upstream):
+    cache_key = "IAD:YYZ:2026-07-05:2"
+    old = {**AirfareProvider().search(*AIRFARE_ARGS), "cash_price_total": 1.0}
+    providers._AIRFARE_CACHE.set(cache_key, old, ttl_seconds=-1)  # past TTL, inside the grace window
+    upstream.hits.clear()
+
+    served = AirfareProvider().search(*AIRFARE_ARGS)
+    assert served["stale"] is True and served["cash_price_total"] == 1.0
+
+    assert _wait_for(lambda: providers._AIRFARE_CACHE.get(cache_key) is not None)
+    assert providers._AIRFARE_CACHE.get(cache_key)["cash_price_total"] != 1.0
+    assert upstream.hits["/flights"] == 1
+
+
+def test_async_stale_quotes_are_refreshed_like_sync_ones(upstream):
+    award_key = "IAD:YYZ:Y:2026-07-05"
+    airfare_key = "IAD:YYZ:2026-07-05:2"
+    award = {**AwardProvider().search("IAD", "YYZ", 2, **AWARD_KWARGS), "points_cost": 1}
+    airfare = {**AirfareProvider().search(*AIRFARE_ARGS), "cash_price_total": 1.0}
+    providers._AWARD_CACHE.set(award_key, award, ttl_seconds=-1)
+    providers._AIRFARE_CACHE.set(airfare_key, airfare, ttl_seconds=-1)
+    upstream.hits.clear()
+
+    async def search() -> tuple[dict, dict]:
+        return await asyncio.gather(
+            AsyncAwardProvider().search("IAD", "YYZ", 2, **AWARD_KWARGS),
+            AsyncAirfareProvider().search(*AIRFARE_ARGS),
+        )
+
+    served_award, served_airfare = asyncio.run(search())
+    assert served_award["stale"] and served_award["points_cost"] == 1
+    assert served_airfare["stale"] and served_airfare["cash_price_total"] == 1.0
+
+    assert _wait_for(lambda: providers._AWARD_CACHE.get(award_key) and providers._AIRFARE_CACHE.get(airfare_key))
+    assert providers._AWARD_CACHE.get(award_key)["points_cost"] != 1
+    assert providers._AIRFARE_CACHE.get(airfare_key)["cash_price_total"] != 1.0
+    assert upstream.hits["/search"] == upstream.hits["/flights"] == 1
@@ -0,0 +1,126 @@
+import random
+import time
+
+import pytest
+
+from app import store
+from app.domain.models import ScoreWeights
+from app.routers import recommendations as reco
+from app.services import pruning, scoring
+from app.services.allocation import funding_capacity
+from app.services.recommender import generate_destination_candidates
+
+PROGRAMS = ["MR", "CAP1", "BILT", "CITI", "MARRIOTT"]
+WEIGHT_SETS = [
+    dict(scoring.WEIGHTS),
+    {"w1": 0.05, "w2": 0.9, "w3": 0.05},
+    {"w1": 0.1, "w2": 0.1, "w3": 0.8},
+]
+
+
+def _trip(trial: int, rng: random.Random) -> tuple[str, dict, dict[str, int]]:
+    balances = {p: rng.choice([0, 5000, 20000, 60000, 150000]) for p in PROGRAMS}
+    payload = {
+        "origins": rng.sample(["IAD", "DCA", "BWI", "JFK", "LAX"], rng.randint(1, 2)),
+        "date_window_start": "2026-12-01",
+        "date_window_end": "2026-12-15",
+        "duration_nights": rng.choice([3, 4, 6]),
+        "travelers": rng.choice([1, 2]),
+        "balances": [{"program": p, "balance": b} for p, b in balances.items()],
+        "constraints": {"max_travel_hours": rng.choice([8, 12, 20]), "max_stops": 1},
+        "vibe_tags": [],
+        "flexible_dates": trial % 3 == 0,
+    }
+    trip_search_id = f"prune-{trial:04d}"
+    store.trip_searches.upsert(trip_search_id, {"id": trip_search_id, "payload": payload})
+    return trip_search_id, payload, balances
+
+
+def _full_ranking(trip_search_id, payload, balances, weights):
+    """Every candidate of the pool quoted and ranked — what pruning must reproduce."""
+    window = reco._search_window(payload)
+    origins = [o.upper() for o in payload["origins"]]
+    candidates = generate_destination_candidates(payload, limit=reco._PRUNE_CANDIDATE_POOL)
+    quote_set = reco._fetch_quotes(window, origins, candidates, with_awards=True, started=time.monotonic())
+    quote_set.update(top_k=None, pruned=[])
+    return reco._rank(trip_search_id, window, origins, candidates, quote_set, balances, weights, option_prefix="full")
+
+
+def _ranked(bundle, k=None):
+    return [(o.destination, o.origin, round(o.score_final, 9)) for o in bundle.options[:k]]
+
+
+def test_pruned_top_k_matches_unpruned():
+    rng = random.Random(1)
+    for trial in range(12):
+        trip_search_id, payload, balances = _trip(trial, rng)
+        full = _full_ranking(trip_search_id, payload, balances, dict(scoring.WEIGHTS))
+        for k in (1, 3):
+            reco._RECO_CACHE.clear()
+            bundle = reco.generate_recommendations(reco.GenerateRequest(trip_search_id=trip_search_id, top_k=k))
+            assert _ranked(bundle) == _ranked(full, k), (trial, k)
+            kept = {o.destination for o in bundle.options}
+            assert kept.isdisjoint(bundle.pruned_destinations)
+
+
+def test_rerank_after_pruning_matches_unpruned():
+    rng = random.Random(7)
+    lifted = 0
+    for trial in range(10):
+        trip_search_id, payload, _ = _trip(100 + trial, rng)
+        k = rng.choice([1, 2, 3])
+        reco._RECO_CACHE.clear()
+        generated = reco.generate_recommendations(reco.GenerateRequest(trip_search_id=trip_search_id, top_k=k))
+        for weights in WEIGHT_SETS:
+            balances = {p: rng.choice([0, 5000, 60000, 300000]) for p in PROGRAMS}
+            bundle = reco.rerank_recommendations(reco.RerankRequest(
+                trip_search_id=trip_search_id,
+                balances=[{"program": p, "balance": b} for p, b in balances.items()],
+                weights=ScoreWeights(**weights),
+            ))
+            full = _full_ranking(trip_search_id, payload, balances, weights)
+            assert _ranked(bundle) == _ranked(full, k), (trial, weights)
+            lifted += len({o.destination for o in bundle.options} - {o.destination for o in generated.options})
+    assert lifted  # some what-ifs must have needed a destination pruned at generate time
+
+
+def test_survivors_keep_everything_reaching_the_kth_floor():
+    bounds = [(0.5, 0.9), (0.4, 0.6), (0.1, 0.45), (0.0, 0.3), (0.2, 0.5)]
+    # 2nd best pessimistic score is 0.4: only (0.0, 0.3) cannot reach it.
+    assert pruning.survivors(bounds, 2) == [0, 1, 2, 4]
+    assert pruning.survivors(bounds, 5) == [0, 1, 2, 3, 4]
+    assert pruning.survivors(bounds, 1) == [0, 1, 4]
+
+
+@pytest.mark.parametrize("live", [True, False])
+def test_known_route_bounds_are_the_exact_score(live):
+    airfare = {"cash_price_total": (820.0, 820.0)}
+    hotel = {"cash_rate_all_in": (900.0, 900.0), "points_rate": (35000.0, 35000.0), "fees_on_points": (40.0, 40.0)}
+    award = {"points_cost": (30000.0, 30000.0), "taxes_fees": (120.0, 120.0)}
+    balances = {"MR": 80000, "MARRIOTT": 40000}
+    pessimistic, optimistic = pruning.route_score_bounds(
+        "points", airfare, hotel, award, live, 3.0, balances=balances, airline="Delta", award_program=None,
+    )
+    assert pessimistic == optimistic
+
+
+@pytest.mark.parametrize("live", [True, False])
+def test_estimated_route_bounds_contain_the_score(live):
+    estimate = {"points_cost": 30000, "taxes_fees": 120.0}
+    award = pruning.quote_intervals(None, estimate, pruning.AWARD_FIELDS)
+    assert award["points_cost"][0] < 30000 < award["points_cost"][1]
+    airfare = {"cash_price_total": (700.0, 900.0)}
+    hotel = {"cash_rate_all_in": (800.0, 1000.0), "points_rate": (30000.0, 40000.0), "fees_on_points": (0.0, 80.0)}
+    balances = {"MR": 80000, "MARRIOTT": 20000}
+    pessimistic, optimistic = pruning.route_score_bounds(
+        "points", airfare, hotel, award, None, 3.0,
+        balances=balances, capacity=funding_capacity(balances),
+    )
+    # The real quote is any point inside the intervals; score it exactly.
+    point = {k: ((lo + hi) / 2, (lo + hi) / 2) for k, (lo, hi) in {**airfare, **hotel, **award}.items()}
+    exact, _ = pruning.route_score_bounds(
+        "points",
+        {k: point[k] for k in airfare}, {k: point[k] for k in hotel}, {k: point[k] for k in award},
+        live, 3.0, balances=balances, airline="Delta",
+    )
+    assert pessimistic <= exact <= optimistic
@@ -0,0 +1,63 @@
+import pytest
+from fastapi import HTTPException
+
+from app import store
+from app.domain.models import ScoreWeights
+from app.routers import recommendations as reco
+
+BALANCES = [{"program": "MR", "balance": 80000}, {"program": "MARRIOTT", "balance": 40000}]
+
+
+def _trip(trip_search_id: str) -> str:
+    payload = {
+        "origins": ["IAD", "JFK"],
+        "date_window_start": "2026-12-01",
+        "date_window_end": "2026-12-15",
+        "duration_nights": 4,
+        "travelers": 2,
+        "balances": BALANCES,
+        "constraints": {"max_travel_hours": 12, "max_stops": 1},
+        "vibe_tags": [],
+    }
+    store.trip_searches.upsert(trip_search_id, {"id": trip_search_id, "payload": payload})
+    reco._RECO_CACHE.clear()
+    return trip_search_id
+
+
+def _ranked(bundle):
+    return [(o.destination, o.origin, o.points_strategy, round(o.score_final, 9)) for o in bundle.options]
+
+
+def test_rerank_without_stored_quotes_is_404():
+    trip_search_id = _trip("rerank-unknown")
+    reco._QUOTE_SETS.delete(trip_search_id)
+    with pytest.raises(HTTPException) as exc:
+        reco.rerank_recommendations(reco.RerankRequest(trip_search_id=trip_search_id))
+    assert exc.value.status_code == 404
+
+
+def test_rerank_reuses_stored_quotes(upstream):
+    trip_search_id = _trip("rerank-reuse")
+    generated = reco.generate_recommendations(reco.GenerateRequest(trip_search_id=trip_search_id))
+    calls = dict(upstream.hits)
+    assert calls  # the generate priced live
+    assert any(o.points_strategy != "none" for o in generated.options)
+
+    same = reco.rerank_recommendations(reco.RerankRequest(trip_search_id=trip_search_id))
+    assert _ranked(same) == _ranked(generated)
+
+    what_if = reco.rerank_recommendations(reco.RerankRequest(
+        trip_search_id=trip_search_id,
+        balances=[{"program": "MR", "balance": 0}],
+        weights=ScoreWeights(w1=0.1, w2=0.1, w3=0.8),
+    ))
+    assert upstream.hits == calls  # no provider calls
+    assert what_if.winner_tiles["_meta_cache"] == "RERANK"
+    assert all(o.points_strategy == "none" for o in what_if.options)
+    assert {o.destination for o in what_if.options} == {o.destination for o in generated.options}
+
+    # Each variant gets its own option ids; the generated ones stay valid for the playbook.
+    variants = {o.id.rsplit("-opt-", 1)[0] for o in (*generated.options, *same.options, *what_if.options)}
+    assert len(variants) == 3
+    assert all(store.recommendations.get(o.id) for o in generated.options)
+    assert store.recommendations.get(what_if.options[0].id)["balances"] == {"MR": 0}
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+# Import the app in a fresh interpreter with find_dotenv pointed at *env_file*,
+# then report the settings the modules read at import time.
+PROBE = """
+import sys
+import dotenv.main
+dotenv.main.find_dotenv = lambda *args, **kwargs: sys.argv[1]
+import app.main
+from app.adapters import providers
+print(app.main.FANOUT.mode, providers._HOTEL_CACHE.ttl_seconds)
+"""
+
+
+def test_dotenv_settings_apply_to_import_time_config(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("PROVIDER_FANOUT_MODE=sequential\nHOTEL_CACHE_TTL_SECONDS=5\n")
+    env = {k: v for k, v in os.environ.items() if k not in ("PROVIDER_FANOUT_MODE", "HOTEL_CACHE_TTL_SECONDS")}
+
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, str(env_file)],
+        cwd=BACKEND, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["sequential", "5"]
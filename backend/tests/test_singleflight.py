@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.adapters.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def _run_concurrently(n: int, target) -> list:
+    results: list = [None] * n
+    barrier = threading.Barrier(n)
+
+    def run(i: int) -> None:
+        barrier.wait()
+        try:
+            results[i] = target()
+        except BaseException as exc:
+            results[i] = exc
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_callers_share_one_call():
+    flight, calls = SingleFlight(), []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"price": 1}
+
+    results = _run_concurrently(8, lambda: flight.do("k", fetch))
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.coalesced == 7
+
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+
+    results = _run_concurrently(4, lambda: flight.do("k", fail))
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_nothing_is_remembered_after_the_call():
+    flight, calls = SingleFlight(), []
+    for _ in range(3):
+        flight.do("k", lambda: calls.append(1))
+    assert len(calls) == 3
+
+
+def test_async_followers_share_the_leaders_result():
+    flight, calls = AsyncSingleFlight(), []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "quote"
+
+    async def burst():
+        return await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+
+    assert asyncio.run(burst()) == ["quote"] * 5
+    assert len(calls) == 1 and flight.coalesced == 4
+
+
+def test_async_cancelled_follower_does_not_cancel_the_fetch():
+    flight = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "quote"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(scenario()) == "quote"
+
+
+def test_async_cancelled_leader_does_not_cancel_the_fetch():
+    flight, calls = AsyncSingleFlight(), []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "quote"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flight.do("k", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(scenario()) == ["quote"] * 3
+    assert len(calls) == 1
+
+
+def test_async_flight_is_forgotten_once_every_caller_is_cancelled():
+    flight, calls = AsyncSingleFlight(), []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        raise RuntimeError("upstream down")
+
+    async def scenario():
+        caller = asyncio.ensure_future(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0.05)  # the fetch finishes on its own
+        assert not flight._calls
+        with pytest.raises(RuntimeError):
+            await flight.do("k", fetch)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_provider_cache_misses_are_coalesced(upstream):
+    from app.adapters.providers import AwardProvider
+
+    upstream.delay = 0.2
+    results = _run_concurrently(
+        6, lambda: AwardProvider().search("IAD", "YYZ", 2, depart_date="2026-07-05", return_date="2026-07-10"),
+    )
+    assert upstream.hits["/search"] == 1
+    assert all(r == results[0] for r in results)
@@ -0,0 +1,206 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.serialization import loads
+from app.store import JsonCollection, SQLiteCollection, WriteBehindCollection, compact
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def backing(request, tmp_path):
+    """A fresh durable collection on each backend, indexed like `alerts`."""
+    fields = ("trip_search_id", "enabled")
+    if request.param == "json":
+        return JsonCollection("alerts", tmp_path / "alerts.json", index_fields=fields)
+    return SQLiteCollection("alerts", tmp_path / "store.sqlite3", index_fields=fields)
+
+
+def alert(rid: str, trip: str, enabled: bool = True) -> dict:
+    return {"id": rid, "trip_search_id": trip, "enabled": enabled}
+
+
+def test_point_lookups_and_batched_upserts(backing):
+    backing.upsert("a1", alert("a1", "t1"))
+    backing.upsert_many({"a2": alert("a2", "t1"), "a3": alert("a3", "t2")})
+
+    assert backing.get("a2") == alert("a2", "t1")
+    assert backing.get("missing") is None
+    assert backing.get_many(["a3", "missing", "a1"]) == {"a3": alert("a3", "t2"), "a1": alert("a1", "t1")}
+    backing.delete_many(["a1"])
+    assert set(backing.load_all()) == {"a2", "a3"}
+
+
+def test_find_and_update_keep_indexed_fields_in_step(backing):
+    backing.upsert_many({rid: alert(rid, trip) for rid, trip in [("a1", "t1"), ("a2", "t1"), ("a3", "t2")]})
+
+    assert [r["id"] for r in backing.find(trip_search_id="t1")] == ["a1", "a2"]
+    assert backing.update("a1", {"enabled": False}) == alert("a1", "t1", enabled=False)
+    assert backing.update("missing", {"enabled": False}) is None
+    assert [r["id"] for r in backing.find(trip_search_id="t1", enabled=True)] == ["a2"]
+    assert [r["id"] for r in backing.find(enabled=False)] == ["a1"]
+    assert backing.find(id="a3") == [alert("a3", "t2")]  # non-indexed field
+
+
+def test_save_all_replaces_the_collection(backing):
+    backing.upsert_many({"a1": alert("a1", "t1"), "a2": alert("a2", "t1")})
+    backing.save_all({"a2": alert("a2", "t3"), "a4": alert("a4", "t4")})
+
+    assert backing.load_all() == {"a2": alert("a2", "t3"), "a4": alert("a4", "t4")}
+    assert [r["id"] for r in backing.find(trip_search_id="t3")] == ["a2"]
+
+
+def test_sqlite_imports_the_legacy_json_document_once(tmp_path):
+    legacy = tmp_path / "trip_searches.json"
+    legacy.write_text(json.dumps({"t1": {"id": "t1"}}))
+    db = tmp_path / "store.sqlite3"
+
+    first = SQLiteCollection("trip_searches", db, legacy_json=legacy)
+    assert first.get("t1") == {"id": "t1"}
+    first.delete_many(["t1"])
+
+    reopened = SQLiteCollection("trip_searches", db, legacy_json=legacy)
+    assert reopened.get("t1") is None  # not re-imported over a later delete
+
+
+def test_sqlite_adds_and_backfills_new_index_columns(tmp_path):
+    db = tmp_path / "store.sqlite3"
+    SQLiteCollection("alerts", db).upsert("a1", alert("a1", "t1"))
+
+    indexed = SQLiteCollection("alerts", db, index_fields=("trip_search_id", "enabled"))
+    assert indexed.find(trip_search_id="t1", enabled=True) == [alert("a1", "t1")]
+
+
+def test_write_behind_buffers_until_flush(backing):
+    backing.upsert("a1", alert("a1", "t1"))
+    buffered = WriteBehindCollection(backing, flush_interval=3600)
+
+    buffered.upsert("a2", alert("a2", "t1"))
+    buffered.update("a1", {"trip_search_id": "t2"})
+    buffered.delete_many(["a2"])
+    buffered.upsert("a3", alert("a3", "t1"))
+    assert [r["id"] for r in buffered.find(trip_search_id="t1")] == ["a3"]
+    assert [r["id"] for r in buffered.find(trip_search_id="t2")] == ["a1"]
+    assert backing.load_all() == {"a1": alert("a1", "t1")}  # nothing written yet
+
+    assert buffered.pending() == 3
+    assert buffered.flush() == 3
+    assert buffered.pending() == 0 and buffered.flush() == 0
+    assert backing.load_all() == {"a1": alert("a1", "t2"), "a3": alert("a3", "t1")}
+
+
+def test_write_behind_keeps_writes_pending_when_a_flush_fails(backing, monkeypatch):
+    buffered = WriteBehindCollection(backing, flush_interval=3600)
+    buffered.upsert("a1", alert("a1", "t1"))
+
+    def fail(records):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(backing, "upsert_many", fail)
+    with pytest.raises(OSError):
+        buffered.flush()
+    assert buffered.pending() == 1
+
+    monkeypatch.undo()
+    assert buffered.flush() == 1
+    assert backing.get("a1") == alert("a1", "t1")
+
+
+def test_concurrent_writers_do_not_lose_records(backing):
+    # Each thread gets its own collection object (and, on SQLite, its own
+    # connection), like separate workers sharing the store.
+    def writer(worker: int) -> None:
+        mine = type(backing)("alerts", location(backing), index_fields=backing.index_fields)
+        for i in range(25):
+            mine.upsert(f"w{worker}-{i}", alert(f"w{worker}-{i}", f"t{worker}"))
+        mine.update(f"w{worker}-0", {"enabled": False})
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(backing.load_all()) == 100
+    assert len(backing.find(enabled=False)) == 4
+    assert not list(location(backing).parent.glob("*.tmp"))  # atomic writes leave no temp files
+
+
+def location(collection):
+    return collection.db_path if isinstance(collection, SQLiteCollection) else collection.path
+
+
+@pytest.fixture(params=["sqlite", "json", "write_behind"])
+def recommendations(request, tmp_path):
+    """A recommendations-shaped collection: indexed by trip, 100s TTL from `as_of`."""
+    options = {"index_fields": ("trip_search_id",), "ttl_seconds": 100}
+    if request.param == "json":
+        return JsonCollection("recommendations", tmp_path / "recommendations.json", **options)
+    backing = SQLiteCollection("recommendations", tmp_path / "store.sqlite3", **options)
+    return WriteBehindCollection(backing, flush_interval=3600) if request.param == "write_behind" else backing
+
+
+def option(trip: str, as_of: float) -> dict:
+    return {"trip_search_id": trip, "as_of": as_of}
+
+
+def test_compact_drops_expired_and_over_cap_records(recommendations):
+    recommendations.upsert_many({
+        "old": option("t1", 0),  # expired at 100
+        "t1-a": option("t1", 50),
+        "t1-b": option("t1", 60),
+        "t1-c": option("t1", 70),
+        "pinned": {"trip_search_id": "t2", "as_of": 0, "expires_at": 1000},
+        "loose": {"as_of": 50},  # no group, only the TTL applies
+    })
+
+    assert compact(recommendations, "trip_search_id", 2, now=120) == {"expired": 1, "over_cap": 1}
+    assert set(recommendations.load_all()) == {"t1-b", "t1-c", "pinned", "loose"}
+    assert compact(recommendations, "trip_search_id", 2, now=120) == {"expired": 0, "over_cap": 0}
+    assert compact(recommendations, now=170) == {"expired": 3, "over_cap": 0}
+    assert set(recommendations.load_all()) == {"pinned"}
+
+
+def test_compact_archives_before_deleting(tmp_path):
+    db = SQLiteCollection("recommendations", tmp_path / "store.sqlite3", ttl_seconds=100)
+    doc = JsonCollection("recommendations", tmp_path / "recommendations.json", ttl_seconds=100)
+    for collection in (db, doc):
+        collection.upsert_many({"old": option("t1", 0), "new": option("t1", 90)})
+        compact(collection, mode="archive", now=120)
+        assert set(collection.load_all()) == {"new"}
+
+    rows = db._conn().execute("SELECT id, data FROM recommendations_archive").fetchall()
+    assert [(rid, loads(data)) for rid, data in rows] == [("old", option("t1", 0))]
+    lines = (tmp_path / "recommendations.archive.jsonl").read_text().splitlines()
+    assert [(r["id"], r["data"]) for r in map(json.loads, lines)] == [("old", option("t1", 0))]
+
+
+# A JSON-backend write and archive under a non-UTF-8 locale (as on Windows).
+NON_ASCII_PROBE = r"""
+import sys
+from pathlib import Path
+from app.store import JsonCollection, compact
+
+doc = JsonCollection("recommendations", Path(sys.argv[1]) / "recommendations.json", ttl_seconds=100)
+doc.upsert("old", {"as_of": 0, "steps": ["MR \u2192 Flying Blue"]})
+compact(doc, mode="archive", now=120)
+doc.upsert("new", {"as_of": 90, "steps": ["Caf\u00e9"]})
+"""
+
+
+def test_json_backend_writes_utf8_whatever_the_locale(tmp_path):
+    env = {**os.environ, "LC_ALL": "C", "PYTHONCOERCECLOCALE": "0", "PYTHONUTF8": "0"}
+    result = subprocess.run(
+        [sys.executable, "-c", NON_ASCII_PROBE, str(tmp_path)],
+        cwd=Path(__file__).resolve().parents[1], env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+
+    doc = JsonCollection("recommendations", tmp_path / "recommendations.json")
+    assert doc.load_all() == {"new": {"as_of": 90, "steps": ["Café"]}}
+    archived = json.loads((tmp_path / "recommendations.archive.jsonl").read_text(encoding="utf-8"))
+    assert archived["data"]["steps"] == ["MR → Flying Blue"]
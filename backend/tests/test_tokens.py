@@ -0,0 +1,62 @@
+import stat
+import threading
+
+import pytest
+
+from app.adapters import providers
+from app.adapters.tokens import TokenFile, TokenManager
+
+
+class CountingFetch:
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            return f"token-{self.calls}", 1800.0
+
+
+def test_workers_share_one_token_through_the_file(tmp_path):
+    fetch = CountingFetch()
+    path = tmp_path / "token.json"
+    worker_a = TokenManager("amadeus", fetch, shared=TokenFile(path))
+    worker_b = TokenManager("amadeus", fetch, shared=TokenFile(path))
+
+    assert worker_a.get() == "token-1"
+    assert worker_b.get() == "token-1"  # adopted, not fetched
+    assert fetch.calls == 1
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+def test_concurrent_cold_workers_refresh_once(tmp_path):
+    fetch = CountingFetch()
+    path = tmp_path / "token.json"
+    workers = [TokenManager("amadeus", fetch, shared=TokenFile(path)) for _ in range(4)]
+    tokens: list[str | None] = []
+
+    threads = [threading.Thread(target=lambda w=w: tokens.append(w.get())) for w in workers for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert tokens == ["token-1"] * 20
+    assert fetch.calls == 1
+
+
+def test_unreadable_token_file_is_ignored(tmp_path):
+    path = tmp_path / "token.json"
+    path.write_text("not json")
+    fetch = CountingFetch()
+    assert TokenManager("amadeus", fetch, shared=TokenFile(path)).get() == "token-1"
+    assert TokenFile(path).load()[0] == "token-1"
+
+
+@pytest.mark.parametrize("body", [[], "token", {"expires_in": 1799}, {"access_token": "t", "expires_in": "soon"}])
+def test_malformed_auth_response_is_a_failed_fetch(body, monkeypatch):
+    monkeypatch.setenv("AMADEUS_CLIENT_ID", "test-id")
+    monkeypatch.setenv("AMADEUS_CLIENT_SECRET", "test-secret")
+    monkeypatch.setattr(providers, "_post_json", lambda *args, **kwargs: body)
+    assert providers._fetch_amadeus_token() is None
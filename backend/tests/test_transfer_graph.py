@@ -0,0 +1,64 @@
+import pytest
+
+from app.services.transfer_graph import (
+    GRAPH, TRANSFER_EDGES, TransferEdge, TransferGraph, _OPERATOR_ALLIANCES, find_routes,
+)
+
+
+@pytest.mark.parametrize(("name", "airline"), [
+    ("Air France", "Air France/KLM"),
+    ("  klm ", "Air France/KLM"),
+    ("AF", "Air France/KLM"),
+    ("qr", "Qatar"),
+    ("Qatar Airways", "Qatar"),
+    ("American Airlines", "American"),
+    ("united", "United"),
+])
+def test_resolve_airline_exact_names_and_codes(name, airline):
+    assert GRAPH.resolve_airline(name) == airline
+
+
+@pytest.mark.parametrize("name", ["", "Delta Connection", "United Express", "Air", "France", "XX"])
+def test_resolve_airline_rejects_partial_names(name):
+    assert GRAPH.resolve_airline(name) is None
+
+
+def test_graphs_resolve_independently():
+    small = TransferGraph([e for e in TRANSFER_EDGES if e.airline == "United"], {})
+    assert small.resolve_airline("United") == "United"
+    assert small.resolve_airline("Delta") is None
+    assert GRAPH.resolve_airline("Delta") == "Delta"
+
+
+def test_partner_routes_reach_alliance_airlines():
+    routes = find_routes("ANA", ["MR", "CAP1"])
+    assert routes
+    assert all(r.hops[0] in ("MR", "CAP1") and r.hops[-1] == "ANA" for r in routes)
+    assert any(r.partner_booking for r in routes)
+
+
+def _star_graph(aeroplan_promo: float = 0.0, united_ratio: float = 1.0) -> TransferGraph:
+    return TransferGraph([
+        TransferEdge("MR", "United MileagePlus", "United", "Star Alliance", ratio=united_ratio),
+        TransferEdge("MR", "Air Canada Aeroplan", "Air Canada", "Star Alliance",
+                     promo_bonus_percent=aeroplan_promo, transfer_time_minutes=1440),
+    ], {})
+
+
+def test_own_airline_program_wins_equal_multipliers():
+    route = _star_graph().routes["MR"]["United"]
+    assert route.hops == ("MR", "United MileagePlus", "United")
+    assert not route.partner_booking
+
+
+def test_promo_bonus_changes_the_chosen_route():
+    route = _star_graph(aeroplan_promo=30).routes["MR"]["United"]
+    assert route.hops == ("MR", "Air Canada Aeroplan", "United")
+    assert route.partner_booking
+    assert route.multiplier == pytest.approx(1.3)
+
+
+def test_better_ratio_beats_a_faster_transfer():
+    graph = _star_graph(aeroplan_promo=10, united_ratio=0.5)
+    assert graph.routes["MR"]["United"].edge.program == "Air Canada Aeroplan"
+    assert graph.routes["MR"]["Air Canada"].multiplier == pytest.approx(1.1)
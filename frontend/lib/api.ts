@@ -1,4 +1,4 @@
-import { PlaybookResponse, RecommendationBundle, TripSearchPayload } from '@/lib/types';
+import { PlaybookResponse, RecommendationBundle, RerankRequest, TripSearchPayload } from '@/lib/types';
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE || 'http://localhost:8000';
 
@@ -12,16 +12,26 @@ export async function createTripSearch(payload: TripSearchPayload): Promise<{ id
   return res.json();
 }
 
-export async function generateRecommendations(tripSearchId: string): Promise<RecommendationBundle> {
+export async function generateRecommendations(tripSearchId: string, topK?: number): Promise<RecommendationBundle> {
   const res = await fetch(`${API_BASE}/v1/recommendations/generate`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ trip_search_id: tripSearchId })
+    body: JSON.stringify({ trip_search_id: tripSearchId, top_k: topK })
   });
   if (!res.ok) throw new Error(`recommendations failed: ${res.status}`);
   return res.json();
 }
 
+export async function rerankRecommendations(req: RerankRequest): Promise<RecommendationBundle> {
+  const res = await fetch(`${API_BASE}/v1/recommendations/rerank`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(req)
+  });
+  if (!res.ok) throw new Error(`rerank failed: ${res.status}`);
+  return res.json();
+}
+
 export async function generatePlaybook(optionId: string): Promise<PlaybookResponse> {
   const res = await fetch(`${API_BASE}/v1/playbook/generate`, {
     method: 'POST',
@@ -18,6 +18,8 @@ export type TransferPath = {
   promo_bonus_percent: number;
   effective_points: number;
   transfer_time_minutes: number;
+  hops?: string[];            // currency → program → operating airline
+  partner_booking?: boolean;  // alliance-partner award
 };
 
 export type TripSearchPayload = {
@@ -35,9 +37,33 @@ export type TripSearchPayload = {
     nonstop_preferred: boolean;
   };
   balances: Array<{
-    program: 'MR' | 'CAP1';
+    program: 'MR' | 'CAP1' | 'BILT' | 'CITI' | 'MARRIOTT';
     balance: number;
   }>;
+  flexible_dates?: boolean;  // price every departure date in the window
+};
+
+export type PriceCalendarEntry = {
+  depart_date: string;
+  return_date: string;
+  cash_flight_total: number;
+  cash_trip_total: number;   // flight + hotel, all cash
+  source: string;
+};
+
+export type PointsTransfer = {
+  purpose: 'flight' | 'hotel';
+  currency: string;          // e.g. "MR"
+  program: string;           // e.g. "Flying Blue", "Marriott Bonvoy"
+  points: number;            // points moved out of the currency
+  miles: number;             // miles/points landing in the program
+};
+
+export type OriginQuote = {
+  origin: string;
+  oop_total: number;
+  score_final: number;
+  degraded?: boolean;
 };
 
 export type RecommendationOption = {
@@ -61,7 +87,7 @@ export type RecommendationOption = {
   return_date?: string;      // optimal return e.g. "2026-07-07"
   cash_price_pp?: number;    // cash price per person
   // Points details
-  points_strategy?: string;
+  points_strategy?: string;  // "flight" | "hotel" | "both" | "none"
   api_mode?: string;
   award_mode?: string;
   cash_flights_mode?: string;
@@ -82,13 +108,33 @@ export type RecommendationOption = {
   // PRD v1 additions
   valuation?: Valuation;
   transfer_paths?: TransferPath[];
+  points_allocation?: PointsTransfer[];  // balances funding the redemption
   no_award_seats?: boolean;
+  degraded?: boolean;           // live data missed the request deadline
+  degraded_sources?: string[];  // "airfare" | "hotel" | "award"
+  price_calendar?: PriceCalendarEntry[];  // flexible_dates only
+  best_depart_date?: string;              // cheapest all-cash departure
+  origin_comparison?: OriginQuote[];      // multi-origin searches only
+};
+
+export type ScoreWeights = {
+  w1: number;  // out-of-pocket
+  w2: number;  // points value (CPP)
+  w3: number;  // friction
+};
+
+export type RerankRequest = {
+  trip_search_id: string;
+  balances?: TripSearchPayload['balances'];  // default: the trip search's balances
+  weights?: ScoreWeights;                    // default: 0.5 / 0.35 / 0.15
 };
 
 export type RecommendationBundle = {
   trip_search_id: string;
   winner_tiles?: Record<string, string>;
   options: RecommendationOption[];
+  degraded_options?: string[];
+  pruned_destinations?: string[];  // top_k searches: dropped before any provider call
 };
 
 export type PlaybookResponse = {